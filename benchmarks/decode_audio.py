@@ -0,0 +1,95 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares the single-pass ffmpeg decoder with the pydub decoder used by `decode_audio`.
+
+Usage:
+
+```bash
+python benchmarks/decode_audio.py --duration 30 --iterations 20
+python benchmarks/decode_audio.py --files call1.mp3 call2.ogg
+```
+
+Without `--files`, a synthetic stereo 44.1kHz recording is encoded to mp3, ogg and flac with ffmpeg.
+"""
+
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+from typing import Callable, List
+
+import numpy as np
+import soundfile as sf
+
+from geniusrise_audio.s2t.util import decode_audio_ffmpeg, decode_audio_pydub
+
+
+def make_inputs(directory: str, duration: float) -> List[str]:
+    sample_rate = 44_100
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    left = 0.5 * np.sin(2 * np.pi * 220 * t) + 0.05 * np.random.randn(len(t))
+    right = 0.5 * np.sin(2 * np.pi * 330 * t) + 0.05 * np.random.randn(len(t))
+    source = os.path.join(directory, "source.wav")
+    sf.write(source, np.stack([left, right], axis=1).astype(np.float32), sample_rate)
+
+    files = []
+    for extension in ["mp3", "ogg", "flac"]:
+        target = os.path.join(directory, f"sample.{extension}")
+        subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-i", source, target], check=True)
+        files.append(target)
+    return files
+
+
+def timeit(fn: Callable, audio_bytes: bytes, sampling_rate: int, iterations: int) -> float:
+    fn(audio_bytes, sampling_rate)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(audio_bytes, sampling_rate)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", nargs="*", default=None, help="Audio files to decode.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Duration of the synthetic inputs in seconds.")
+    parser.add_argument("--iterations", type=int, default=10, help="Decodes per file and decoder.")
+    parser.add_argument("--sampling-rate", type=int, default=16_000, help="Target sampling rate.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = args.files or make_inputs(directory, args.duration)
+
+        print(f"{'file':<24} {'pydub (ms)':>12} {'ffmpeg (ms)':>12} {'speedup':>8} {'max |diff|':>11}")
+        for path in files:
+            audio_bytes = open(path, "rb").read()
+            pydub_time = timeit(decode_audio_pydub, audio_bytes, args.sampling_rate, args.iterations)
+            ffmpeg_time = timeit(decode_audio_ffmpeg, audio_bytes, args.sampling_rate, args.iterations)
+
+            reference, _ = decode_audio_pydub(audio_bytes, args.sampling_rate)
+            candidate, _ = decode_audio_ffmpeg(audio_bytes, args.sampling_rate)
+            length = min(reference.shape[-1], candidate.shape[-1])
+            diff = (reference[..., :length] - candidate[..., :length]).abs().max().item()
+
+            print(
+                f"{os.path.basename(path):<24} {pydub_time * 1000:>12.1f} {ffmpeg_time * 1000:>12.1f} "
+                f"{pydub_time / ffmpeg_time:>7.2f}x {diff:>11.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
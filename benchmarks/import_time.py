@@ -0,0 +1,110 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measures the import time of geniusrise_audio modules with `python -X importtime`.
+
+Usage:
+
+```bash
+python benchmarks/import_time.py
+python benchmarks/import_time.py --modules geniusrise_audio geniusrise_audio.s2t --top 20
+python benchmarks/import_time.py --max-seconds 2.5 --forbid transformers faster_whisper whispercpp datasets
+```
+
+Every module is imported in a fresh interpreter `--iterations` times and the fastest run is reported, with the
+slowest top-level packages it pulled in. Exits with 1 if an import is slower than `--max-seconds` or loads a
+`--forbid` package, so that it can gate CI against import time regressions.
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from typing import Dict, List, Set, Tuple
+
+# `import time: self [us] | cumulative | imported package`
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)\s*$")
+
+# Packages that `import geniusrise_audio` must not load, they are imported on first use
+HEAVY_PACKAGES = ["transformers", "faster_whisper", "whispercpp", "datasets", "onnxruntime", "pyarrow", "soundfile"]
+
+
+def import_time(module: str) -> Tuple[float, Dict[str, float], Set[str]]:
+    """
+    Imports a module in a fresh interpreter.
+
+    Returns:
+        float: The cumulative import time of the module in seconds.
+        Dict[str, float]: The cumulative import time of every package imported at the top level, in seconds.
+        Set[str]: The top-level package of every module loaded, at any depth.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    packages: Dict[str, float] = {}
+    loaded: Set[str] = set()
+    total = 0.0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative = int(match.group(2)) / 1e6
+        name = match.group(4)
+        loaded.add(name.split(".")[0])
+        # Nesting is shown by two spaces per level, top-level imports have one
+        if len(match.group(3)) == 1:
+            top = name.split(".")[0]
+            packages[top] = packages.get(top, 0.0) + cumulative
+        if name == module:
+            total = cumulative
+    return total, packages, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="*", default=["geniusrise_audio"], help="Modules to import.")
+    parser.add_argument("--iterations", type=int, default=5, help="Fresh imports per module.")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest packages to show.")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fail if an import is slower than this.")
+    parser.add_argument("--forbid", nargs="*", default=HEAVY_PACKAGES, help="Packages an import must not load.")
+    args = parser.parse_args()
+
+    failures: List[str] = []
+    for module in args.modules:
+        runs = [import_time(module) for _ in range(max(args.iterations, 1))]
+        total, packages, loaded = min(runs, key=lambda run: run[0])
+
+        print(f"import {module}: {total * 1000:.1f} ms (best of {len(runs)})")
+        print(f"  {'package':<32} {'cumulative (ms)':>16}")
+        for name, seconds in sorted(packages.items(), key=lambda item: -item[1])[: args.top]:
+            print(f"  {name:<32} {seconds * 1000:>16.1f}")
+
+        forbidden = [name for name in args.forbid if name in loaded]
+        if forbidden:
+            failures.append(f"import {module} loads {', '.join(forbidden)}")
+        if args.max_seconds is not None and total > args.max_seconds:
+            failures.append(f"import {module} took {total:.2f}s, more than {args.max_seconds:.2f}s")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
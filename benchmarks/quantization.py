@@ -0,0 +1,193 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares float32 models with their dynamically quantized int8 versions on CPU: load time, weight memory, latency,
+and the quality delta, word error rate for speech-to-text and spectral distance for text-to-speech.
+
+Usage:
+
+```bash
+python benchmarks/quantization.py --task stt --model-name openai/whisper-small \
+    --model-class WhisperForConditionalGeneration --processor-class AutoProcessor \
+    --files call1.flac call2.flac --references call1.txt call2.txt
+python benchmarks/quantization.py --task stt --model-name facebook/wav2vec2-base-960h \
+    --model-class Wav2Vec2ForCTC --processor-class Wav2Vec2Processor --files call1.flac
+python benchmarks/quantization.py --task tts --model-name facebook/mms-tts-eng \
+    --model-class VitsModel --processor-class VitsTokenizer
+```
+
+Without `--references`, the float32 transcriptions are the reference of the int8 ones. `--cache-dir` also measures
+a reload of the quantized model from the cache.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import torch
+from geniusrise.core import BatchInput, BatchOutput, InMemoryState
+
+from geniusrise_audio.base.registry import model_bytes
+from geniusrise_audio.s2t.inference import SpeechToTextInference
+from geniusrise_audio.s2t.util import decode_audio
+from geniusrise_audio.t2s.inference import TextToSpeechInference
+
+TEXTS = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Dynamic quantization stores the weights of linear layers in eight bits and quantizes activations on the fly.",
+]
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    distances = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        previous, distances[0] = distances[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            previous, distances[j] = distances[j], min(
+                distances[j] + 1, distances[j - 1] + 1, previous + (ref_word != hyp_word)
+            )
+    return distances[-1] / max(len(ref), 1)
+
+
+def spectral_distance(reference: np.ndarray, candidate: np.ndarray) -> float:
+    def log_spectrogram(waveform: np.ndarray) -> torch.Tensor:
+        stft = torch.stft(
+            torch.from_numpy(waveform).float(), n_fft=1024, window=torch.hann_window(1024), return_complex=True
+        )
+        return torch.log(stft.abs() + 1e-5)
+
+    length = min(len(reference), len(candidate))
+    reference_spec, candidate_spec = log_spectrogram(reference[:length]), log_spectrogram(candidate[:length])
+    return (reference_spec - candidate_spec).abs().mean().item()
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return 0
+
+
+def load(task: str, args: argparse.Namespace, quantization: int) -> Tuple[Any, Dict[str, float]]:
+    directory = tempfile.mkdtemp()
+    bolt_class = SpeechToTextInference if task == "stt" else TextToSpeechInference
+    bolt = bolt_class(
+        input=BatchInput(directory, "geniusrise-benchmark", "input"),
+        output=BatchOutput(directory, "geniusrise-benchmark", "output"),
+        state=InMemoryState(1),
+    )
+    bolt.model_name, bolt.use_cuda, bolt.device_map = args.model_name, False, "cpu"
+
+    rss = rss_bytes()
+    start = time.perf_counter()
+    bolt.model, bolt.processor = bolt.load_models(
+        model_name=args.model_name,
+        processor_name=args.model_name,
+        model_class=args.model_class,
+        processor_class=args.processor_class,
+        use_cuda=False,
+        precision="float32",
+        quantization=quantization,
+        device_map="cpu",
+        quantization_cache_dir=args.cache_dir if quantization else None,
+    )
+    stats = {
+        "load_s": time.perf_counter() - start,
+        "weights_mb": model_bytes(bolt.model) / 2**20,
+        "rss_mb": (rss_bytes() - rss) / 2**20,
+    }
+    return bolt, stats
+
+
+def run(task: str, bolt: Any, inputs: List[Any], iterations: int) -> Tuple[List[Any], float]:
+    def infer(item: Any) -> Any:
+        with torch.no_grad():
+            if task == "tts" and bolt.model.config.model_type == "vits":
+                return bolt.process_mms(item, generate_args={})
+            elif task == "tts":
+                return bolt.process_speecht5_tts(item, voice_preset="0", generate_args={})
+            elif bolt.model.config.model_type == "whisper":
+                result = bolt.process_whisper(item, 16_000, {}, 0, 0, {})
+            else:
+                result = bolt.process_wav2vec2(item, 16_000, {}, 0, 0)
+            return result["transcription"]
+
+    outputs = [infer(item) for item in inputs]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for item in inputs:
+            infer(item)
+    return outputs, (time.perf_counter() - start) / max(iterations * len(inputs), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--task", choices=["stt", "tts"], default="stt", help="Speech-to-text or text-to-speech.")
+    parser.add_argument("--model-name", required=True, help="The model to benchmark.")
+    parser.add_argument("--model-class", required=True, help="The transformers class of the model.")
+    parser.add_argument("--processor-class", default="AutoProcessor", help="The transformers class of the processor.")
+    parser.add_argument("--files", nargs="*", default=[], help="Audio files to transcribe.")
+    parser.add_argument("--references", nargs="*", default=[], help="Reference transcripts, one file per audio file.")
+    parser.add_argument("--texts", nargs="*", default=TEXTS, help="Texts to synthesize.")
+    parser.add_argument("--iterations", type=int, default=3, help="Timed runs over all inputs.")
+    parser.add_argument("--threads", type=int, default=0, help="Torch threads, 0 keeps the default.")
+    parser.add_argument("--cache-dir", default=None, help="Cache of quantized models, also times a cached reload.")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    if args.task == "stt":
+        if not args.files:
+            parser.error("--files is required for speech-to-text")
+        model_type = "whisper" if "whisper" in args.model_name else "wav2vec2"
+        inputs = [decode_audio(open(path, "rb").read(), model_type, 16_000)[0] for path in args.files]
+    else:
+        inputs = args.texts
+
+    results = {}
+    for name, quantization in [("float32", 0), ("int8", 8)]:
+        bolt, stats = load(args.task, args, quantization)
+        outputs, latency = run(args.task, bolt, inputs, args.iterations)
+        results[name] = (stats, outputs, latency)
+        del bolt
+
+    if args.cache_dir:
+        _, stats = load(args.task, args, 8)
+        print(f"int8 reload from {args.cache_dir}: {stats['load_s']:.2f}s")
+
+    quality = "WER" if args.task == "stt" else "spec dist"
+    print(f"{'mode':<8} {'load (s)':>9} {'weights (MB)':>13} {'RSS (MB)':>9} {'latency (ms)':>13} {quality:>10}")
+    reference_outputs = results["float32"][1]
+    if args.task == "stt" and args.references:
+        reference_outputs = [open(path).read() for path in args.references]
+    for name, (stats, outputs, latency) in results.items():
+        if args.task == "stt":
+            score = np.mean([word_error_rate(r, h) for r, h in zip(reference_outputs, outputs)])
+        else:
+            score = np.mean([spectral_distance(r, h) for r, h in zip(reference_outputs, outputs)])
+        print(
+            f"{name:<8} {stats['load_s']:>9.2f} {stats['weights_mb']:>13.1f} {stats['rss_mb']:>9.1f} "
+            f"{latency * 1000:>13.1f} {score:>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
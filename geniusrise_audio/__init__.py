@@ -13,6 +13,29 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import importlib
+from typing import Any, List
+
 from .base import AudioAPI, AudioBulk, send_email, send_fine_tuning_email
-from .s2t import SpeechToTextAPI, SpeechToTextBulk
-from .t2s import TextToSpeechAPI, TextToSpeechBulk
+
+# The speech-to-text and text-to-speech stacks are imported on first use, `import geniusrise_audio` stays cheap
+_LAZY_IMPORTS = {
+    "SpeechToTextAPI": "geniusrise_audio.s2t",
+    "SpeechToTextBulk": "geniusrise_audio.s2t",
+    "TextToSpeechAPI": "geniusrise_audio.t2s",
+    "TextToSpeechBulk": "geniusrise_audio.t2s",
+}
+
+__all__ = ["AudioAPI", "AudioBulk", "send_email", "send_fine_tuning_email", *_LAZY_IMPORTS]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
@@ -13,18 +13,45 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import gc
 import json
+import sys
 import threading
-from typing import Any, Dict, Optional
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
 
 import cherrypy
 from geniusrise import BatchInput, BatchOutput, State
 from geniusrise.logging import setup_logger
 
 from .bulk import AudioBulk
+from .cache import ResultCache
+from .registry import ModelRegistry, model_bytes
 
-# Define a global lock for sequential access control
-sequential_lock = threading.Lock()
+
+class _ServedAttribute:
+    """
+    An attribute of the served model, e.g. `model` or `processor`. Inside `AudioAPI.serving_model` it resolves to the
+    model picked by the request running on the current thread, everywhere else to the default model.
+    """
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        served = getattr(instance.__dict__.get("_served"), "attributes", None)
+        if served is not None:
+            return served[self.name]
+        try:
+            return instance.__dict__["_default_served"][self.name]
+        except KeyError:
+            raise AttributeError(self.name)
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        instance.__dict__.setdefault("_default_served", {})[self.name] = value
 
 
 class AudioAPI(AudioBulk):
@@ -56,8 +83,12 @@ class AudioAPI(AudioBulk):
             Starts a CherryPy server to listen for requests to generate text.
     """
 
-    model: Any
-    processor: Any
+    model = _ServedAttribute()
+    processor = _ServedAttribute()
+    model_name = _ServedAttribute()
+    model_revision = _ServedAttribute()
+    processor_name = _ServedAttribute()
+    processor_revision = _ServedAttribute()
 
     def __init__(
         self,
@@ -77,6 +108,25 @@ class AudioAPI(AudioBulk):
         super().__init__(input=input, output=output, state=state)
         self.log = setup_logger(self)
 
+        # Concurrency control, see `listen`
+        self.inference_semaphore: Optional[threading.BoundedSemaphore] = threading.BoundedSemaphore(1)
+        self.max_queued_queries = 0
+        self.queued_queries = 0
+        self.queue_lock = threading.Lock()
+
+        # Inference result cache, see `listen`
+        self.cache: Optional[ResultCache] = None
+
+        # Models served besides the default one, see `listen` and `serving_model`
+        self.models: Optional[ModelRegistry] = None
+        self.default_model = ""
+        self.served_models: List[str] = []
+        self._served = threading.local()
+
+        # Readiness, flips once the warmup has finished, see `listen`
+        self.is_ready = False
+        self.warmup_seconds = 0.0
+
     def __validate_password(self, realm, username, password):
         """
         Validate the username and password against expected values.
@@ -91,6 +141,245 @@ class AudioAPI(AudioBulk):
         """
         return username == self.username and password == self.password
 
+    @contextmanager
+    def queued_request(self) -> Iterator[None]:
+        """
+        Counts the request as waiting for inference for the duration of the block.
+
+        Raises:
+            cherrypy.HTTPError: 429 if `max_queued_queries` requests are already waiting.
+        """
+        with self.queue_lock:
+            if self.max_queued_queries > 0 and self.queued_queries >= self.max_queued_queries:
+                raise cherrypy.HTTPError(429, "Too many queued requests, please retry later.")
+            self.queued_queries += 1
+        try:
+            yield
+        finally:
+            with self.queue_lock:
+                self.queued_queries -= 1
+
+    @contextmanager
+    def inference_slot(self, bounded: bool = True) -> Iterator[None]:
+        """
+        Holds one of the inference slots for the duration of the block. Only model calls should run inside it,
+        pre- and post-processing of requests run outside of the critical section.
+
+        Args:
+            bounded (bool): Whether waiting for the slot counts against `max_queued_queries`.
+
+        Raises:
+            cherrypy.HTTPError: 429 if the wait queue is full.
+        """
+        semaphore = self.inference_semaphore
+        if semaphore is not None:
+            if bounded:
+                with self.queued_request():
+                    semaphore.acquire()
+            else:
+                semaphore.acquire()
+        try:
+            yield
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+    @contextmanager
+    def serving_model(self, name: Optional[str] = None) -> Iterator[None]:
+        """
+        Serves the current thread with the given model for the duration of the block: `model`, `processor`,
+        `model_name` and their revisions resolve to it. Models other than the default one are taken from the model
+        registry, loading them if needed, and are not evicted while the block runs.
+
+        Args:
+            name (Optional[str]): The model, as passed to `listen` (e.g. "openai/whisper-small:main"). None or the
+                default model serve the default model.
+
+        Raises:
+            cherrypy.HTTPError: 404 if the API does not serve the model.
+        """
+        previous = (getattr(self._served, "name", None), getattr(self._served, "attributes", None))
+        if not name or name == self.default_model:
+            self._served.name, self._served.attributes = None, None
+            try:
+                yield
+            finally:
+                self._served.name, self._served.attributes = previous
+            return
+
+        self.check_served_model(name)
+        with self.models.acquire(name) as attributes:
+            self._served.name, self._served.attributes = name, attributes
+            try:
+                yield
+            finally:
+                self._served.name, self._served.attributes = previous
+
+    def check_served_model(self, name: Optional[str]) -> None:
+        """
+        Checks that requests may pick the given model.
+
+        Args:
+            name (Optional[str]): The model, None for the default model.
+
+        Raises:
+            cherrypy.HTTPError: 404 if the API does not serve the model.
+        """
+        if not name or name == self.default_model:
+            return
+        if self.models is None or name not in self.served_models:
+            raise cherrypy.HTTPError(404, f"Model {name} is not served, served models are {self.served_models}.")
+
+    @property
+    def served_model(self) -> str:
+        """
+        The name of the model serving the current thread, see `serving_model`.
+        """
+        return getattr(self._served, "name", None) or self.default_model
+
+    def load_served_model(self, name: str) -> Dict[str, Any]:
+        """
+        Loads a model of the model registry with the loading options of the default model.
+
+        Args:
+            name (str): The model, with an optional revision after a colon.
+
+        Returns:
+            Dict[str, Any]: The model, its processor, and their names and revisions.
+        """
+        model_name, _, revision = name.partition(":")
+        self.log.info(f"Loading model {name}")
+        model, processor = self.load_models(
+            model_name=model_name,
+            processor_name=model_name,
+            model_revision=revision or None,
+            processor_revision=revision or None,
+            model_class=self.model_class,
+            processor_class=self.processor_class,
+            use_cuda=self.use_cuda,
+            precision=self.precision,
+            quantization=self.quantization,
+            device_map=self.device_map,
+            max_memory=self.max_memory,
+            torchscript=self.torchscript,
+            compile=self.compile,
+            use_whisper_cpp=self.use_whisper_cpp,
+            use_faster_whisper=self.use_faster_whisper,
+            use_onnxruntime=self.use_onnxruntime,
+            **self.model_args,
+        )
+        return {
+            "model": model,
+            "processor": processor,
+            "model_name": model_name,
+            "model_revision": revision or None,
+            "processor_name": model_name,
+            "processor_revision": revision or None,
+        }
+
+    def release_model(self, name: str) -> None:
+        """
+        Called when the model registry evicts a model, returns the memory it held.
+
+        Args:
+            name (str): The evicted model.
+        """
+        self.log.info(f"Evicted model {name}")
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def warmup(self, sizes: List[float]) -> None:
+        """
+        Runs synthetic requests through the served model, so that the first real request does not pay for kernel
+        initialization, compilation or downloads. Overridden by the subclasses, the base class has no inference.
+
+        Args:
+            sizes (List[float]): Sizes of the synthetic inputs, e.g. seconds of audio or characters of text.
+        """
+        pass
+
+    def run_warmup(self, sizes: Optional[List[float]] = None) -> None:
+        """
+        Warms up the default model and the pinned models with `warmup`. Results are not cached and failures are
+        logged, they do not keep the API from starting.
+
+        Args:
+            sizes (Optional[List[float]]): Sizes of the synthetic inputs, the subclass' `WARMUP_SIZES` by default.
+        """
+        sizes = sizes or getattr(self, "WARMUP_SIZES", [])
+        names = [self.default_model] + (self.models.stats()["pinned"] if self.models else [])
+
+        cache, self.cache = self.cache, None
+        start = time.perf_counter()
+        try:
+            for name in dict.fromkeys(names):
+                model_start = time.perf_counter()
+                try:
+                    with self.serving_model(name):
+                        self.warmup(sizes)
+                    self.log.info(f"Warmed up {name} in {time.perf_counter() - model_start:.2f}s")
+                except Exception as e:
+                    self.log.warning(f"Warmup of {name} failed: {e}")
+        finally:
+            self.cache = cache
+            self.warmup_seconds = time.perf_counter() - start
+
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    def ready(self):
+        """
+        API endpoint for readiness probes, it does not require authentication.
+
+        Returns:
+            Dict[str, Any]: Whether the API is ready and how long its warmup took.
+
+        Raises:
+            cherrypy.HTTPError: 503 until the warmup has finished.
+        """
+        if not self.is_ready:
+            raise cherrypy.HTTPError(503, "Warming up.")
+        return {"ready": True, "warmup_seconds": round(self.warmup_seconds, 3)}
+
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    def model_stats(self):
+        """
+        API endpoint returning the served models and the state of the model registry.
+
+        Returns:
+            Dict[str, Any]: The default and served models, the loaded models and the registry counters.
+        """
+        stats = self.models.stats() if self.models is not None else {}
+        return {"default": self.default_model, "served": self.served_models, **stats}
+
+    def create_cache(self, max_memory_bytes: int, max_disk_bytes: int) -> ResultCache:
+        """
+        Creates the inference result cache. Subclasses add a persistent tier suited to their results.
+
+        Args:
+            max_memory_bytes (int): Maximum size of the in-memory tier.
+            max_disk_bytes (int): Maximum size of the persistent tier, 0 disables it.
+
+        Returns:
+            ResultCache: The cache.
+        """
+        return ResultCache(max_memory_bytes=max_memory_bytes)
+
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    def cache_stats(self):
+        """
+        API endpoint returning the hit and miss counters of the inference result cache.
+
+        Returns:
+            Dict[str, Any]: The counters, or `{"enabled": false}` if caching is disabled.
+        """
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.stats()}
+
     def listen(
         self,
         model_name: str,
@@ -104,8 +393,22 @@ class AudioAPI(AudioBulk):
         torchscript: bool = False,
         compile: bool = False,
         concurrent_queries: bool = False,
+        inference_slots: Optional[int] = None,
+        max_queued_queries: int = 0,
+        max_batch_size: int = 1,
+        max_batch_wait_ms: float = 10.0,
+        cache: bool = False,
+        cache_memory_mb: float = 256,
+        cache_disk_mb: float = 0,
         use_whisper_cpp: bool = False,
         use_faster_whisper: bool = False,
+        use_onnxruntime: bool = False,
+        models: Optional[str | List[str]] = None,
+        pinned_models: Optional[str | List[str]] = None,
+        max_loaded_models: int = 0,
+        models_memory_mb: float = 0,
+        warmup: bool = False,
+        warmup_sizes: Optional[str | List[float]] = None,
         endpoint: str = "*",
         port: int = 3000,
         cors_domain: str = "http://localhost:3000",
@@ -127,9 +430,23 @@ class AudioAPI(AudioBulk):
             max_memory (Dict[int, str], optional): The maximum memory to use for inference. Defaults to {0: "24GB"}.
             torchscript (bool, optional): Whether to use a TorchScript-optimized version of the pre-trained language model. Defaults to True.
             compile (bool): Enable Torch JIT compilation.
-            concurrent_queries: (bool): Whether the API supports concurrent API calls (usually false).
+            concurrent_queries: (bool): Whether inference may run for several requests at once (usually false). Decoding and encoding always run concurrently.
+            inference_slots (Optional[int]): Number of inferences that may run at once when `concurrent_queries` is set, e.g. the number of model replicas. Defaults to unlimited.
+            max_queued_queries (int): Maximum number of requests waiting for an inference slot, further requests are rejected with HTTP 429. Defaults to 0 (unbounded).
+            max_batch_size (int): Maximum number of concurrent requests batched into one model call, on endpoints that support dynamic batching. Defaults to 1 (no batching).
+            max_batch_wait_ms (float): Maximum time a request waits for other requests to share its batch. Defaults to 10ms.
+            cache (bool): Whether to cache inference results, on endpoints that support caching. Defaults to False.
+            cache_memory_mb (float): Size of the in-memory tier of the cache. Defaults to 256MB.
+            cache_disk_mb (float): Size of the on-disk tier of the cache, 0 keeps the cache in memory only. Defaults to 0.
             use_whisper_cpp (bool): Whether to use whisper.cpp to load the model. Defaults to False. Note: only works for these models: https://github.com/aarnphm/whispercpp/blob/524dd6f34e9d18137085fb92a42f1c31c9c6bc29/src/whispercpp/utils.py#L32
             use_faster_whisper (bool): Whether to use faster-whisper.
+            use_onnxruntime (bool): Whether to export wav2vec2 CTC and VITS (MMS) models to ONNX and run them on onnxruntime's CPU execution provider. Threads are set with the `onnx_intra_op_threads` and `onnx_inter_op_threads` model arguments. Defaults to False.
+            models (Optional[str | List[str]]): Further models requests may pick with their `model` argument, as a list or a comma separated string. They are loaded on first use with the options of the default model. Defaults to None (only the default model is served).
+            pinned_models (Optional[str | List[str]]): Served models that are loaded on start and never evicted. Defaults to None.
+            max_loaded_models (int): Maximum number of models loaded at once besides the pinned ones, least recently used models are evicted. Defaults to 0 (no limit).
+            models_memory_mb (float): Memory budget of the loaded models, least recently used models are evicted. Only the weights of torch and onnxruntime models are counted. Defaults to 0 (no limit).
+            warmup (bool): Whether to run synthetic requests through the default and pinned models before the port opens. The `ready` endpoint fails until then. Defaults to False.
+            warmup_sizes (Optional[str | List[float]]): Sizes of the synthetic requests, seconds of audio for speech-to-text and characters of text for text-to-speech, as a list or a comma separated string. Defaults to the `WARMUP_SIZES` of the API.
             endpoint (str, optional): The endpoint to listen on. Defaults to "*".
             port (int, optional): The port to listen on. Defaults to 3000.
             cors_domain (str, optional): The domain to allow CORS requests from. Defaults to "http://localhost:3000".
@@ -148,8 +465,13 @@ class AudioAPI(AudioBulk):
         self.torchscript = torchscript
         self.compile = compile
         self.concurrent_queries = concurrent_queries
+        self.inference_slots = inference_slots
+        self.max_queued_queries = max_queued_queries
+        self.max_batch_size = max_batch_size
+        self.max_batch_wait_ms = max_batch_wait_ms
         self.use_whisper_cpp = use_whisper_cpp
         self.use_faster_whisper = use_faster_whisper
+        self.use_onnxruntime = use_onnxruntime
         self.model_args = model_args
         self.username = username
         self.password = password
@@ -184,16 +506,54 @@ class AudioAPI(AudioBulk):
             compile=self.compile,
             use_whisper_cpp=use_whisper_cpp,
             use_faster_whisper=use_faster_whisper,
+            use_onnxruntime=use_onnxruntime,
             **self.model_args,
         )
 
-        def sequential_locker():
-            if self.concurrent_queries:
-                sequential_lock.acquire()
+        # The default model is always loaded, further models are loaded on demand
+        self.default_model = f"{model_name}:{model_revision}" if model_revision else model_name
+        extra_models = _model_list(models) + _model_list(pinned_models)
+        self.served_models = list(dict.fromkeys([self.default_model, *extra_models]))
+        if extra_models:
+            self.models = ModelRegistry(
+                load_fn=self.load_served_model,
+                max_memory_bytes=int(models_memory_mb * 1024 * 1024),
+                max_models=max_loaded_models,
+                sizeof=lambda attributes: model_bytes(attributes["model"]),
+                on_evict=self.release_model,
+            )
+            self.models.put(
+                self.default_model,
+                {
+                    "model": self.model,
+                    "processor": self.processor,
+                    "model_name": self.model_name,
+                    "model_revision": self.model_revision,
+                    "processor_name": self.processor_name,
+                    "processor_revision": self.processor_revision,
+                },
+                pinned=True,
+            )
+            for name in _model_list(pinned_models):
+                self.models.pin(name)
 
-        def sequential_unlocker():
-            if self.concurrent_queries:
-                sequential_lock.release()
+        if cache:
+            self.cache = self.create_cache(
+                max_memory_bytes=int(cache_memory_mb * 1024 * 1024), max_disk_bytes=int(cache_disk_mb * 1024 * 1024)
+            )
+
+        if not concurrent_queries:
+            self.inference_semaphore = threading.BoundedSemaphore(1)
+        elif inference_slots:
+            self.inference_semaphore = threading.BoundedSemaphore(inference_slots)
+        else:
+            self.inference_semaphore = None
+
+        if warmup:
+            if isinstance(warmup_sizes, str):
+                warmup_sizes = [float(size) for size in warmup_sizes.split(",") if size.strip()]
+            self.run_warmup(warmup_sizes)
+        self.is_ready = True
 
         def CORS():
             cherrypy.response.headers["Access-Control-Allow-Origin"] = cors_domain
@@ -234,33 +594,39 @@ class AudioAPI(AudioBulk):
             # Configure basic authentication
             conf = {
                 "/": {
-                    "tools.sequential_locker.on": True,
-                    "tools.sequential_unlocker.on": True,
                     "tools.auth_basic.on": True,
                     "tools.auth_basic.realm": "geniusrise",
                     "tools.auth_basic.checkpassword": self.__validate_password,
                     "tools.CORS.on": True,
-                }
+                },
+                # Load balancers probe readiness without credentials
+                "/ready": {
+                    "tools.auth_basic.on": False,
+                },
             }
         else:
             # Configuration without authentication
             conf = {
                 "/": {
-                    "tools.sequential_locker.on": True,
-                    "tools.sequential_unlocker.on": True,
                     "tools.CORS.on": True,
                 }
             }
 
-        cherrypy.tools.sequential_locker = cherrypy.Tool("before_handler", sequential_locker)
         cherrypy.tools.CORS = cherrypy.Tool("before_handler", CORS)
         cherrypy.tree.mount(self, "/api/v1/", conf)
         cherrypy.tools.CORS = cherrypy.Tool("before_finalize", CORS)
-        cherrypy.tools.sequential_unlocker = cherrypy.Tool("before_finalize", sequential_unlocker)
         cherrypy.engine.start()
         cherrypy.engine.block()
 
 
+def _model_list(models: Optional[str | List[str]]) -> List[str]:
+    if not models:
+        return []
+    if isinstance(models, str):
+        models = models.split(",")
+    return [model.strip() for model in models if model.strip()]
+
+
 def error_page(status, message, traceback, version):
     response = {
         "status": status,
@@ -0,0 +1,131 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, List, Tuple
+
+
+class MicroBatcher:
+    """
+    MicroBatcher collects concurrent requests and runs them through the model as one batch.
+
+    Requests are grouped by a key, only requests with the same key (e.g. the same generation arguments) are batched
+    together. A batch is dispatched as soon as it holds `max_batch_size` requests, or when its oldest request has
+    waited `max_wait_ms`. Batches run one at a time on a single background thread.
+
+    Attributes:
+        batch_fn (Callable[[Hashable, List[Any]], List[Any]]): Runs a batch, returns one result per item.
+        max_batch_size (int): Maximum number of requests in a batch.
+        max_wait_ms (float): Maximum time the oldest request of a batch waits for the batch to fill up.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[Hashable, List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+    ):
+        """
+        Initializes the MicroBatcher and starts its worker thread.
+
+        Args:
+            batch_fn (Callable[[Hashable, List[Any]], List[Any]]): Runs a batch, returns one result per item.
+            max_batch_size (int): Maximum number of requests in a batch.
+            max_wait_ms (float): Maximum time the oldest request of a batch waits for the batch to fill up.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait_ms = max_wait_ms
+
+        self._pending: "OrderedDict[Hashable, List[Tuple[Any, Future, float]]]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, key: Hashable, item: Any) -> Future:
+        """
+        Queues an item for batching.
+
+        Args:
+            key (Hashable): Only items with equal keys are batched together.
+            item (Any): The item to process.
+
+        Returns:
+            Future: Resolves to the result of the item.
+        """
+        future: Future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._pending.setdefault(key, []).append((item, future, time.monotonic()))
+            self._condition.notify_all()
+        return future
+
+    def close(self) -> None:
+        """
+        Stops the worker thread after the queued requests have been processed.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._worker.join()
+
+    def _next_batch(self) -> Tuple[Hashable, List[Tuple[Any, Future, float]]]:
+        """
+        Waits for the next batch to be ready, the key whose oldest request arrived first is served first.
+
+        Returns:
+            Tuple[Hashable, List[Tuple[Any, Future, float]]]: The key and the requests of the batch, an empty list
+                once the batcher is closed and drained.
+        """
+        with self._condition:
+            while not self._pending:
+                if self._closed:
+                    return None, []
+                self._condition.wait()
+
+            key = min(self._pending, key=lambda k: self._pending[k][0][2])
+            deadline = self._pending[key][0][2] + self.max_wait_ms / 1000
+            while len(self._pending[key]) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            requests = self._pending[key][: self.max_batch_size]
+            remaining_requests = self._pending[key][self.max_batch_size :]
+            if remaining_requests:
+                self._pending[key] = remaining_requests
+            else:
+                del self._pending[key]
+            return key, requests
+
+    def _run(self) -> None:
+        while True:
+            key, requests = self._next_batch()
+            if not requests:
+                return
+
+            try:
+                results = self.batch_fn(key, [item for item, _, _ in requests])
+                for (_, future, _), result in zip(requests, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future, _ in requests:
+                    future.set_exception(e)
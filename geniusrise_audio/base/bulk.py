@@ -15,22 +15,18 @@
 
 import multiprocessing
 import os
-from typing import Any, Dict, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Union
 
-import torch
-import transformers
-from faster_whisper import WhisperModel
 from geniusrise import BatchInput, BatchOutput, Bolt, State
 from geniusrise.logging import setup_logger
-from transformers import (
-    AutoConfig,
-    AutoFeatureExtractor,
-    AutoModelForAudioClassification,
-    AutoProcessor,
-)
-from whispercpp import Whisper
 
 from geniusrise_audio.base.communication import send_email
+from geniusrise_audio.base.onnx_model import ONNX_MODEL_TYPES, ONNXModel, export_onnx
+
+# torch, transformers, faster-whisper and whisper.cpp take seconds to import, they are imported by the loaders
+if TYPE_CHECKING:
+    import torch
+    from transformers import AutoFeatureExtractor, AutoModelForAudioClassification, AutoProcessor
 
 
 class AudioBulk(Bolt):
@@ -57,8 +53,8 @@ class AudioBulk(Bolt):
             Processes the audio input based on the provided parameters. Supports multiple processing methods.
     """
 
-    model: AutoModelForAudioClassification
-    processor: AutoFeatureExtractor | AutoProcessor
+    model: "AutoModelForAudioClassification"
+    processor: "AutoFeatureExtractor | AutoProcessor"
 
     def __init__(
         self,
@@ -401,8 +397,15 @@ class AudioBulk(Bolt):
         better_transformers: bool = False,
         use_whisper_cpp: bool = False,
         use_faster_whisper: bool = False,
+        cpu_threads: int = 0,
+        num_workers: int = 1,
+        quantization_cache_dir: Optional[str] = None,
+        use_onnxruntime: bool = False,
+        onnx_intra_op_threads: int = 0,
+        onnx_inter_op_threads: int = 0,
+        onnx_cache_dir: Optional[str] = None,
         **model_args: Any,
-    ) -> Tuple[AutoModelForAudioClassification, AutoFeatureExtractor]:
+    ) -> Tuple["AutoModelForAudioClassification", "AutoFeatureExtractor"]:
         """
         Loads and configures the specified audio model and processor for audio processing.
 
@@ -415,7 +418,7 @@ class AudioBulk(Bolt):
             processor_class (str): Class of the processor to be loaded.
             use_cuda (bool): Flag to use CUDA for GPU acceleration.
             precision (str): Desired precision for computations ("float32", "float16", etc.).
-            quantization (int): Bit level for model quantization (0 for none, 8 for 8-bit).
+            quantization (int): Bit level for model quantization (0 for none, 8 for 8-bit). Without CUDA, 8-bit applies dynamic int8 quantization to the Linear layers of a float32 model instead of bitsandbytes.
             device_map (Union[str, Dict, None]): Specific device(s) for model operations.
             max_memory (Dict[int, str]): Maximum memory allocation for the model.
             torchscript (bool): Enable TorchScript for model optimization.
@@ -424,6 +427,13 @@ class AudioBulk(Bolt):
             better_transformers (bool): Flag to enable Better Transformers optimization for faster processing.
             use_whisper_cpp (bool): Whether to use whisper.cpp to load the model. Defaults to False. Note: only works for these models: https://github.com/aarnphm/whispercpp/blob/524dd6f34e9d18137085fb92a42f1c31c9c6bc29/src/whispercpp/utils.py#L32
             use_faster_whisper (bool): Whether to use faster-whisper.
+            cpu_threads (int): Threads used by each faster-whisper worker on CPU, 0 uses all cores.
+            num_workers (int): Number of faster-whisper workers sharing the model weights, for transcribing from several threads at once.
+            quantization_cache_dir (Optional[str]): Folder caching dynamically quantized CPU models, reloads skip reading and quantizing the float32 weights.
+            use_onnxruntime (bool): Whether to export the model to ONNX and run it on onnxruntime's CPU execution provider. Only works for wav2vec2 CTC and VITS (MMS) models.
+            onnx_intra_op_threads (int): Threads of a single onnxruntime op, 0 uses `cpu_threads` or all cores.
+            onnx_inter_op_threads (int): Number of onnxruntime ops run in parallel, 0 or 1 runs ops sequentially.
+            onnx_cache_dir (Optional[str]): Folder of the ONNX exports, defaults to `onnx` in the output folder. Cached exports are loaded without the torch weights.
             **model_args (Any): Additional arguments for model loading.
 
         Returns:
@@ -449,13 +459,16 @@ class AudioBulk(Bolt):
                     model_name=model_name,
                     device_map=device_map if type(device_map) is str else "auto",
                     precision=precision,
-                    cpu_threads=multiprocessing.cpu_count(),
-                    num_workers=1,
+                    cpu_threads=cpu_threads or multiprocessing.cpu_count(),
+                    num_workers=num_workers,
                     download_root=None,
                 ),
                 None,
             )
 
+        import torch
+        import transformers
+
         # Determine torch dtype based on precision
         torch_dtype = self._get_torch_dtype(precision)
 
@@ -465,11 +478,14 @@ class AudioBulk(Bolt):
 
         # Load the model and processor
         FeatureExtractorClass = getattr(transformers, processor_class)
-        config = AutoConfig.from_pretrained(processor_name, revision=processor_revision)
+        if model_name == "local":
+            config = transformers.AutoConfig.from_pretrained(os.path.join(self.input.get(), "model"))
+        else:
+            config = transformers.AutoConfig.from_pretrained(processor_name, revision=processor_revision)
 
         if model_name == "local":
             processor = FeatureExtractorClass.from_pretrained(
-                os.path.join(self.input.get(), "/model"), torch_dtype=torch_dtype
+                os.path.join(self.input.get(), "model"), torch_dtype=torch_dtype
             )
         else:
             processor = FeatureExtractorClass.from_pretrained(
@@ -477,10 +493,33 @@ class AudioBulk(Bolt):
             )
 
         ModelClass = getattr(transformers, model_class)
-        if quantization == 8:
+        if use_onnxruntime:
+            model = self.load_models_onnxruntime(
+                ModelClass=ModelClass,
+                model_name=os.path.join(self.input.get(), "model") if model_name == "local" else model_name,
+                model_revision=model_revision,
+                config=config,
+                cache_dir=onnx_cache_dir or os.path.join(self.output.output_folder, "onnx"),
+                intra_op_threads=onnx_intra_op_threads or cpu_threads,
+                inter_op_threads=onnx_inter_op_threads,
+                **model_args,
+            )
+            self.log.debug("Audio model and processor loaded successfully.")
+            return model, processor
+        elif quantization == 8 and not use_cuda:
+            # bitsandbytes needs a GPU, on CPU the Linear layers are quantized dynamically
+            model = self.load_models_dynamic_int8(
+                ModelClass=ModelClass,
+                model_name=os.path.join(self.input.get(), "model") if model_name == "local" else model_name,
+                model_revision=model_revision,
+                config=config,
+                cache_dir=quantization_cache_dir,
+                **model_args,
+            )
+        elif quantization == 8:
             if model_name == "local":
                 model = ModelClass.from_pretrained(
-                    os.path.join(self.input.get(), "/model"),
+                    os.path.join(self.input.get(), "model"),
                     max_memory=max_memory,
                     load_in_8bit=True,
                     config=config,
@@ -498,7 +537,7 @@ class AudioBulk(Bolt):
         elif quantization == 4:
             if model_name == "local":
                 model = ModelClass.from_pretrained(
-                    os.path.join(self.input.get(), "/model"),
+                    os.path.join(self.input.get(), "model"),
                     max_memory=max_memory,
                     load_in_4bit=True,
                     config=config,
@@ -516,7 +555,7 @@ class AudioBulk(Bolt):
         else:
             if model_name == "local":
                 model = ModelClass.from_pretrained(
-                    os.path.join(self.input.get(), "/model"),
+                    os.path.join(self.input.get(), "model"),
                     torch_dtype=torch_dtype,
                     max_memory=max_memory,
                     config=config,
@@ -549,7 +588,120 @@ class AudioBulk(Bolt):
         self.log.debug("Audio model and processor loaded successfully.")
         return model, processor
 
+    def load_models_dynamic_int8(
+        self,
+        ModelClass: Any,
+        model_name: str,
+        model_revision: Optional[str],
+        config: Any,
+        cache_dir: Optional[str] = None,
+        **model_args: Any,
+    ) -> Any:
+        """
+        Loads a model in float32 on CPU and quantizes its Linear layers to int8 with PyTorch dynamic quantization.
+        Weights are stored in int8, activations are quantized on the fly.
+
+        With a cache folder, the quantized state dict is saved after the first load. Later loads build the model
+        from its config without initializing weights and load the quantized state dict into it.
+
+        Args:
+            ModelClass (Any): The transformers class of the model.
+            model_name (str): Name or path of the model.
+            model_revision (Optional[str]): Revision of the model.
+            config (Any): The config of the model.
+            cache_dir (Optional[str]): Folder of the quantized state dicts, None disables the cache.
+            **model_args (Any): Additional arguments for model loading.
+
+        Returns:
+            Any: The quantized model.
+        """
+        import torch
+        from transformers.modeling_utils import no_init_weights
+
+        cache_path = None
+        if cache_dir:
+            name = f"{model_name}@{model_revision or 'main'}".strip("/").replace("/", "--")
+            # Packed int8 weights are tied to the torch version that packed them
+            cache_path = os.path.join(cache_dir, f"{name}-torch{torch.__version__}.int8.pt")
+            if os.path.exists(cache_path):
+                self.log.info(f"Loading quantized model from {cache_path}")
+                with no_init_weights():
+                    model = ModelClass.from_config(config)
+                model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                # Only tensors are unpickled, the modules come from the config and `quantize_dynamic`
+                model.load_state_dict(torch.load(cache_path, map_location="cpu", weights_only=True))
+                return model
+
+        model = ModelClass.from_pretrained(
+            model_name, revision=model_revision, torch_dtype=torch.float32, config=config, **model_args
+        )
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)  # type: ignore
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            torch.save(model.state_dict(), tmp_path)
+            os.replace(tmp_path, cache_path)
+            self.log.info(f"Saved quantized model to {cache_path}")
+        return model
+
+    def load_models_onnxruntime(
+        self,
+        ModelClass: Any,
+        model_name: str,
+        model_revision: Optional[str],
+        config: Any,
+        cache_dir: str,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        **model_args: Any,
+    ) -> ONNXModel:
+        """
+        Loads a wav2vec2 CTC or VITS model as an onnxruntime session on CPU.
+
+        The model is loaded in float32 and exported to ONNX on the first load, with dynamic batch and sequence axes.
+        Later loads only create a session from the cached export.
+
+        Args:
+            ModelClass (Any): The transformers class of the model.
+            model_name (str): Name or path of the model.
+            model_revision (Optional[str]): Revision of the model.
+            config (Any): The config of the model.
+            cache_dir (str): Folder of the ONNX exports.
+            intra_op_threads (int): Threads of a single op, 0 for all cores.
+            inter_op_threads (int): Ops run in parallel, 0 or 1 runs ops sequentially.
+            **model_args (Any): Additional arguments for model loading.
+
+        Returns:
+            ONNXModel: The model, called like the transformers model.
+
+        Raises:
+            ValueError: If the model type cannot be exported.
+        """
+        if config.model_type not in ONNX_MODEL_TYPES:
+            raise ValueError(
+                f"Unsupported model type for onnxruntime: {config.model_type}. Supported types are {ONNX_MODEL_TYPES}."
+            )
+
+        name = f"{model_name}@{model_revision or 'main'}".strip("/").replace("/", "--")
+        cache_path = os.path.join(cache_dir, f"{name}.{config.model_type}.onnx")
+        if not os.path.exists(cache_path):
+            import torch
+
+            model = ModelClass.from_pretrained(
+                model_name, revision=model_revision, torch_dtype=torch.float32, config=config, **model_args
+            )
+            export_onnx(model.eval(), cache_path)
+            self.log.info(f"Exported model to {cache_path}")
+            del model
+        else:
+            self.log.info(f"Loading ONNX model from {cache_path}")
+
+        return ONNXModel(cache_path, config, intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads)
+
     def load_models_whisper_cpp(self, model_name: str, basedir: str):
+        from whispercpp import Whisper
+
         return Whisper.from_pretrained(
             model_name=model_name,
             basedir=basedir,
@@ -565,6 +717,8 @@ class AudioBulk(Bolt):
         num_workers=1,
         download_root=None,
     ):
+        from faster_whisper import WhisperModel
+
         return WhisperModel(
             model_size_or_path=model_name,
             device=device_map.split(":")[0] if ":" in device_map else device_map,
@@ -576,7 +730,7 @@ class AudioBulk(Bolt):
             local_files_only=False,
         )
 
-    def _get_torch_dtype(self, precision: str) -> torch.dtype:
+    def _get_torch_dtype(self, precision: str) -> "torch.dtype":
         """
         Determines the torch dtype based on the specified precision.
 
@@ -589,6 +743,8 @@ class AudioBulk(Bolt):
         Raises:
             ValueError: If an unsupported precision is specified.
         """
+        import torch
+
         dtype_map = {
             "float32": torch.float32,
             "float": torch.float,
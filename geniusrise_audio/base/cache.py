@@ -0,0 +1,340 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Protocol
+
+
+def cache_key(*parts: Any) -> str:
+    """
+    Hashes the parts of a cache key, e.g. the model, the input and the generation arguments.
+
+    Args:
+        *parts (Any): JSON serializable parts of the key, bytes are hashed as they are.
+
+    Returns:
+        str: The hex digest of the key.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(b"b")
+            digest.update(part)
+        else:
+            digest.update(b"j")
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class CacheStore(Protocol):
+    """
+    The persistent tier of a `ResultCache`.
+    """
+
+    def get(self, key: str) -> Optional[Any]: ...
+
+    def put(self, key: str, value: Any) -> None: ...
+
+
+class FileStore:
+    """
+    FileStore keeps binary cache entries as files in a directory, evicting the least recently used files once the
+    directory holds more than `max_bytes`.
+
+    Entries already in the directory are picked up on start, so the cache survives restarts.
+
+    Attributes:
+        directory (str): The directory of the cache files.
+        max_bytes (int): Maximum total size of the cache files.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Initializes the FileStore, indexing the files already in `directory`.
+
+        Args:
+            directory (str): The directory of the cache files, created if it does not exist.
+            max_bytes (int): Maximum total size of the cache files.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+
+        entries = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.startswith(".") or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._sizes[name] = size
+            self._total += size
+        with self._lock:
+            self._evict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Reads a cache entry, marking it as recently used.
+
+        Args:
+            key (str): The key of the entry.
+
+        Returns:
+            Optional[bytes]: The entry, or None if it is not cached.
+        """
+        with self._lock:
+            if key not in self._sizes:
+                return None
+            self._sizes.move_to_end(key)
+
+        path = os.path.join(self.directory, key)
+        try:
+            with open(path, "rb") as f:
+                value = f.read()
+            os.utime(path)
+            return value
+        except OSError:
+            with self._lock:
+                self._total -= self._sizes.pop(key, 0)
+            return None
+
+    def put(self, key: str, value: bytes) -> None:
+        """
+        Writes a cache entry, evicting the least recently used entries if the store is full.
+
+        Args:
+            key (str): The key of the entry.
+            value (bytes): The entry.
+        """
+        if len(value) > self.max_bytes:
+            return
+
+        # Write to a temporary file first, readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".")
+        with os.fdopen(fd, "wb") as f:
+            f.write(value)
+        os.replace(tmp_path, os.path.join(self.directory, key))
+
+        with self._lock:
+            self._total += len(value) - self._sizes.pop(key, 0)
+            self._sizes[key] = len(value)
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._total > self.max_bytes and self._sizes:
+            key, size = self._sizes.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(os.path.join(self.directory, key))
+            except OSError:
+                pass
+
+
+class SQLiteStore:
+    """
+    SQLiteStore keeps JSON serializable cache entries in an SQLite database, evicting the least recently used
+    entries once they take up more than `max_bytes`.
+
+    Attributes:
+        path (str): The path of the database file.
+        max_bytes (int): Maximum total size of the serialized entries, 0 for no limit.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0):
+        """
+        Initializes the SQLiteStore, creating the database if it does not exist.
+
+        Args:
+            path (str): The path of the database file.
+            max_bytes (int): Maximum total size of the serialized entries, 0 for no limit.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, size INTEGER, accessed REAL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Reads a cache entry, marking it as recently used.
+
+        Args:
+            key (str): The key of the entry.
+
+        Returns:
+            Optional[Any]: The entry, or None if it is not cached.
+        """
+        with self._lock, self._connection:
+            row = self._connection.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute("UPDATE cache SET accessed = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Writes a cache entry, evicting the least recently used entries if the store is full.
+
+        Args:
+            key (str): The key of the entry.
+            value (Any): The entry.
+        """
+        serialized = json.dumps(value, default=str)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, serialized, len(serialized), time.time()),
+            )
+            if self.max_bytes <= 0:
+                return
+            (total,) = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()
+            for evicted, size in self._connection.execute("SELECT key, size FROM cache ORDER BY accessed").fetchall():
+                if total <= self.max_bytes:
+                    break
+                self._connection.execute("DELETE FROM cache WHERE key = ?", (evicted,))
+                total -= size
+
+    def close(self) -> None:
+        """
+        Closes the database.
+        """
+        with self._lock:
+            self._connection.close()
+
+
+class ResultCache:
+    """
+    ResultCache caches inference results in a bounded in-memory LRU, optionally backed by a persistent store.
+
+    Entries found in the store are promoted to memory. Hits on each tier and misses are counted.
+
+    Attributes:
+        max_memory_bytes (int): Maximum total size of the entries held in memory.
+        store (Optional[CacheStore]): The persistent tier.
+        sizeof (Callable[[Any], int]): Returns the size of an entry in bytes.
+    """
+
+    def __init__(
+        self,
+        max_memory_bytes: int,
+        store: Optional[CacheStore] = None,
+        sizeof: Callable[[Any], int] = len,
+    ):
+        """
+        Initializes an empty ResultCache.
+
+        Args:
+            max_memory_bytes (int): Maximum total size of the entries held in memory.
+            store (Optional[CacheStore]): The persistent tier.
+            sizeof (Callable[[Any], int]): Returns the size of an entry in bytes.
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.store = store
+        self.sizeof = sizeof
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._total = 0
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Looks up an entry in memory, then in the store.
+
+        Args:
+            key (str): The key of the entry.
+
+        Returns:
+            Optional[Any]: The entry, or None if it is not cached.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return self._entries[key]
+
+        value = self.store.get(key) if self.store is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.store_hits += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Caches an entry in memory and in the store.
+
+        Args:
+            key (str): The key of the entry.
+            value (Any): The entry.
+        """
+        with self._lock:
+            self._remember(key, value)
+        if self.store is not None:
+            self.store.put(key, value)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the hit and miss counters of the cache.
+
+        Returns:
+            Dict[str, int]: Hits per tier, misses, and the number and size of the entries held in memory.
+        """
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "store_hits": self.store_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._entries),
+                "memory_bytes": self._total,
+            }
+
+    def _remember(self, key: str, value: Any) -> None:
+        size = self.sizeof(value)
+        if size > self.max_memory_bytes:
+            return
+
+        self._total += size - self._sizes.pop(key, 0)
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._sizes[key] = size
+        while self._total > self.max_memory_bytes:
+            evicted, _ = self._entries.popitem(last=False)
+            self._total -= self._sizes.pop(evicted)
@@ -0,0 +1,139 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+
+def file_sha256(path: str) -> str:
+    """
+    Hashes the contents of a file.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        str: The hex digest of the contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    Manifest is an append-only JSONL record of the input files a bulk job has completed, so that reruns can skip
+    them.
+
+    Every line records one input: its path relative to the input folder, size, modification time, content hash and
+    the output file holding its result. Later lines for the same input supersede earlier ones. Lines are only
+    appended once the output they point to has been written, a crash loses at most the batch in flight.
+
+    Attributes:
+        path (str): The path of the manifest file.
+        records (Dict[str, Dict[str, Any]]): The latest record of every completed input.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initializes the Manifest, loading the records of earlier runs.
+
+        Args:
+            path (str): The path of the manifest file, created on the first record.
+        """
+        self.path = path
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._terminated = True
+
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    self._terminated = line.endswith("\n")
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # The last line of a crashed run may be cut short
+                        continue
+                    self.records[record["input"]] = record
+
+    def is_done(self, input: str, path: str, incremental: bool = False) -> bool:
+        """
+        Checks whether an input file has already been processed.
+
+        Args:
+            input (str): The key of the input, its path relative to the input folder.
+            path (str): The path of the input file.
+            incremental (bool): Also check that the file did not change since it was processed. Files whose size or
+                modification time changed are hashed, and only count as done if their contents are unchanged.
+
+        Returns:
+            bool: True if the input can be skipped.
+        """
+        record = self.records.get(input)
+        if record is None:
+            return False
+        if not incremental:
+            return True
+
+        stat = os.stat(path)
+        if stat.st_size != record["size"]:
+            return False
+        if stat.st_mtime == record["mtime"]:
+            return True
+        return file_sha256(path) == record["sha256"]
+
+    def record(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Appends the records of completed inputs and flushes them to disk.
+
+        Args:
+            entries (List[Dict[str, Any]]): One record per input with "input", "size", "mtime", "sha256" and "output".
+        """
+        with self._lock:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a") as f:
+                if not self._terminated:
+                    f.write("\n")
+                    self._terminated = True
+                for entry in entries:
+                    f.write(json.dumps(entry) + "\n")
+                    self.records[entry["input"]] = entry
+                f.flush()
+                os.fsync(f.fileno())
+
+    @staticmethod
+    def entry(input: str, path: str, output: Optional[str], contents: Optional[bytes] = None) -> Dict[str, Any]:
+        """
+        Builds the record of a completed input.
+
+        Args:
+            input (str): The key of the input, its path relative to the input folder.
+            path (str): The path of the input file.
+            output (Optional[str]): The output file holding the result of the input.
+            contents (Optional[bytes]): The contents of the file if already read, saves reading it again.
+
+        Returns:
+            Dict[str, Any]: The record.
+        """
+        stat = os.stat(path)
+        sha256 = hashlib.sha256(contents).hexdigest() if contents is not None else file_sha256(path)
+        return {"input": input, "size": stat.st_size, "mtime": stat.st_mtime, "sha256": sha256, "output": output}
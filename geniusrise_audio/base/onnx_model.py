@@ -0,0 +1,194 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+# Model types that can be exported, the CTC models of `process_wav2vec2` and the VITS models of `process_mms`
+ONNX_MODEL_TYPES = ["wav2vec2", "vits"]
+
+# Opset of the exports, the first one with all the ops of VITS
+ONNX_OPSET = 17
+
+
+def onnx_signature(config: Any) -> Tuple[List[str], List[str], Dict[str, Dict[int, str]]]:
+    """
+    Returns the inputs and outputs of the export of a model, with their dynamic axes.
+
+    Args:
+        config (Any): The config of the model.
+
+    Returns:
+        List[str]: The names of the inputs.
+        List[str]: The names of the outputs.
+        Dict[str, Dict[int, str]]: The dynamic axes of every input and output.
+
+    Raises:
+        ValueError: If the model type cannot be exported.
+    """
+    if config.model_type == "vits":
+        return (
+            ["input_ids", "attention_mask"],
+            ["waveform", "sequence_lengths"],
+            {
+                "input_ids": {0: "batch", 1: "tokens"},
+                "attention_mask": {0: "batch", 1: "tokens"},
+                "waveform": {0: "batch", 1: "samples"},
+                "sequence_lengths": {0: "batch"},
+            },
+        )
+    elif config.model_type == "wav2vec2":
+        # Models with group norm feature extractors are not trained with attention masks
+        inputs = ["input_values", "attention_mask"] if config.feat_extract_norm == "layer" else ["input_values"]
+        axes = {name: {0: "batch", 1: "samples"} for name in inputs}
+        return inputs, ["logits"], {**axes, "logits": {0: "batch", 1: "frames"}}
+    raise ValueError(
+        f"Unsupported model type for onnxruntime: {config.model_type}. Supported types are {ONNX_MODEL_TYPES}."
+    )
+
+
+def export_onnx(model: Any, path: str) -> None:
+    """
+    Exports a wav2vec2 CTC or VITS model to ONNX, with dynamic batch and sequence axes.
+
+    Args:
+        model (Any): The transformers model, in float32 on CPU.
+        path (str): The path of the ONNX file, written atomically.
+    """
+    import torch
+
+    inputs, outputs, dynamic_axes = onnx_signature(model.config)
+
+    class Exported(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *args):
+            if model.config.model_type == "vits":
+                result = self.model(input_ids=args[0], attention_mask=args[1])
+                return result.waveform, result.sequence_lengths
+            return self.model(args[0], attention_mask=args[1] if len(args) > 1 else None).logits
+
+    if model.config.model_type == "vits":
+        # A padded batch of two, so masking and the predicted lengths are traced as computed from the inputs
+        input_ids = torch.randint(1, model.config.vocab_size, (2, 16))
+        attention_mask = torch.ones((2, 16), dtype=torch.long)
+        attention_mask[1, 8:] = 0
+        dummy = (input_ids * attention_mask, attention_mask)
+    else:
+        dummy = (torch.randn(1, 16_000), torch.ones((1, 16_000), dtype=torch.long))[: len(inputs)]
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            Exported().eval(),
+            dummy,
+            tmp_path,
+            input_names=inputs,
+            output_names=outputs,
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET,
+            do_constant_folding=True,
+        )
+    os.replace(tmp_path, path)
+
+
+class ONNXModel:
+    """
+    ONNXModel runs an exported model on onnxruntime's CPU execution provider. It is called like the transformers
+    model it was exported from, with the inputs used by `process_wav2vec2` and `process_mms`, and returns torch
+    tensors. Sessions are thread safe, one model serves concurrent requests.
+
+    Attributes:
+        path (str): The path of the ONNX file.
+        config (Any): The config of the exported model.
+        intra_op_threads (int): Threads of a single op, 0 for all cores.
+        inter_op_threads (int): Ops run in parallel, 0 or 1 runs ops sequentially.
+    """
+
+    # Not a generating model, like VITS
+    generation_config = None
+
+    def __init__(self, path: str, config: Any, intra_op_threads: int = 0, inter_op_threads: int = 0):
+        """
+        Initializes the ONNXModel, creating its inference session.
+
+        Args:
+            path (str): The path of the ONNX file.
+            config (Any): The config of the exported model.
+            intra_op_threads (int): Threads of a single op, 0 for all cores.
+            inter_op_threads (int): Ops run in parallel, 0 or 1 runs ops sequentially.
+        """
+        import onnxruntime as ort
+
+        self.path = path
+        self.config = config
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads > 1:
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+            options.inter_op_num_threads = inter_op_threads
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.output_names = [o.name for o in self.session.get_outputs()]
+
+    def __call__(self, input_values: Any = None, input_ids: Any = None, attention_mask: Any = None, **kwargs: Any):
+        """
+        Runs the model.
+
+        Args:
+            input_values (Any): Audio of CTC models, of shape (batch, samples).
+            input_ids (Any): Tokens of VITS models, of shape (batch, tokens).
+            attention_mask (Any): The attention mask of the inputs, all ones if the export needs one and it is None.
+
+        Returns:
+            SimpleNamespace: The outputs of the export by name, e.g. `logits` or `waveform` and `sequence_lengths`.
+
+        Raises:
+            ValueError: If other arguments are given, they are baked into the export.
+        """
+        import torch
+
+        if kwargs:
+            raise ValueError(f"Arguments {sorted(kwargs)} are not supported by onnxruntime models.")
+
+        main = input_values if input_values is not None else input_ids
+        feeds = {}
+        for name in self.input_names:
+            if name == "input_values":
+                feeds[name] = np.asarray(main, dtype=np.float32)
+            elif name == "input_ids":
+                feeds[name] = np.asarray(main, dtype=np.int64)
+            elif name == "attention_mask":
+                mask = attention_mask if attention_mask is not None else np.ones(np.shape(main))
+                feeds[name] = np.asarray(mask, dtype=np.int64)
+
+        outputs = self.session.run(self.output_names, feeds)
+        return SimpleNamespace(**{name: torch.from_numpy(output) for name, output in zip(self.output_names, outputs)})
+
+    def eval(self) -> "ONNXModel":
+        return self
+
+    def to(self, *args: Any, **kwargs: Any) -> "ONNXModel":
+        return self
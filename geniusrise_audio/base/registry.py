@@ -0,0 +1,276 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from geniusrise_audio.base.onnx_model import ONNXModel
+
+
+def model_bytes(model: Any) -> int:
+    """
+    Estimates the memory taken by a model from its parameters, buffers and packed quantized weights. onnxruntime
+    models are estimated by the size of their export.
+
+    Args:
+        model (Any): The model.
+
+    Returns:
+        int: The size of the weights of torch and onnxruntime models, 0 for other backends (e.g. faster-whisper or
+            whisper.cpp).
+    """
+    if isinstance(model, ONNXModel):
+        return os.path.getsize(model.path)
+    if not (hasattr(model, "parameters") and hasattr(model, "buffers")):
+        return 0
+    size = sum(t.numel() * t.element_size() for t in itertools.chain(model.parameters(), model.buffers()))
+
+    # Dynamically quantized Linear layers keep their int8 weights outside of the parameters
+    for module in model.modules():
+        packed = getattr(module, "_packed_params", None)
+        if packed is not None and hasattr(packed, "_weight_bias"):
+            size += sum(t.numel() * t.element_size() for t in packed._weight_bias() if t is not None)
+    return size
+
+
+class _Entry:
+    def __init__(self, value: Any, size: int):
+        self.value = value
+        self.size = size
+        self.pinned = False
+        self.users = 0
+
+
+class ModelRegistry:
+    """
+    ModelRegistry keeps the loaded models of a process in a pool, loading them on first use and evicting the least
+    recently used ones once the pool outgrows its budget.
+
+    Models are loaded outside of the registry lock, concurrent requests for a model that is being loaded wait for
+    that load instead of starting their own. Models in use and pinned models are never evicted, the pool may exceed
+    its budget while they alone fill it.
+
+    Attributes:
+        load_fn (Callable[[str], Any]): Loads a model by name.
+        max_memory_bytes (int): Memory budget of the pool, 0 for no limit.
+        max_models (int): Maximum number of loaded models that are not pinned, 0 for no limit.
+        sizeof (Callable[[Any], int]): Returns the memory taken by a loaded model.
+        on_evict (Optional[Callable[[str], None]]): Called with the name of every evicted model, e.g. to free GPU
+            memory.
+    """
+
+    def __init__(
+        self,
+        load_fn: Callable[[str], Any],
+        max_memory_bytes: int = 0,
+        max_models: int = 0,
+        sizeof: Callable[[Any], int] = model_bytes,
+        on_evict: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Initializes the ModelRegistry, models are loaded on first use.
+
+        Args:
+            load_fn (Callable[[str], Any]): Loads a model by name.
+            max_memory_bytes (int): Memory budget of the pool, 0 for no limit.
+            max_models (int): Maximum number of loaded models that are not pinned, 0 for no limit.
+            sizeof (Callable[[Any], int]): Returns the memory taken by a loaded model.
+            on_evict (Optional[Callable[[str], None]]): Called with the name of every evicted model.
+        """
+        self.load_fn = load_fn
+        self.max_memory_bytes = max_memory_bytes
+        self.max_models = max_models
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._loading: Dict[str, Future] = {}
+        self._total = 0
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    @contextmanager
+    def acquire(self, name: str) -> Iterator[Any]:
+        """
+        Holds a model for the duration of the block, loading it if needed. Held models are never evicted.
+
+        Args:
+            name (str): The name of the model.
+
+        Yields:
+            Any: The model, as returned by `load_fn`.
+        """
+        entry = self._checkout(name)
+        try:
+            yield entry.value
+        finally:
+            with self._lock:
+                entry.users -= 1
+                evicted = self._evict()
+            self._notify(evicted)
+
+    def get(self, name: str) -> Any:
+        """
+        Returns a model, loading it if needed. The model may be evicted as soon as it is returned.
+
+        Args:
+            name (str): The name of the model.
+
+        Returns:
+            Any: The model.
+        """
+        with self.acquire(name) as value:
+            return value
+
+    def put(self, name: str, value: Any, pinned: bool = False) -> None:
+        """
+        Adds a model that has been loaded elsewhere, e.g. the default model of an API.
+
+        Args:
+            name (str): The name of the model.
+            value (Any): The model.
+            pinned (bool): Whether the model is never evicted.
+        """
+        entry = _Entry(value, self.sizeof(value))
+        entry.pinned = pinned
+        with self._lock:
+            previous = self._entries.pop(name, None)
+            self._total += entry.size - (previous.size if previous else 0)
+            self._entries[name] = entry
+            evicted = self._evict()
+        self._notify(evicted)
+
+    def pin(self, name: str) -> None:
+        """
+        Loads a model if needed and exempts it from eviction.
+
+        Args:
+            name (str): The name of the model.
+        """
+        entry = self._checkout(name)
+        with self._lock:
+            entry.pinned = True
+            entry.users -= 1
+
+    def unpin(self, name: str) -> None:
+        """
+        Makes a pinned model evictable again.
+
+        Args:
+            name (str): The name of the model.
+        """
+        with self._lock:
+            if name in self._entries:
+                self._entries[name].pinned = False
+            evicted = self._evict()
+        self._notify(evicted)
+
+    def loaded(self) -> List[str]:
+        """
+        Returns the names of the loaded models, least recently used first.
+
+        Returns:
+            List[str]: The names.
+        """
+        with self._lock:
+            return list(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the state of the pool and its counters.
+
+        Returns:
+            Dict[str, Any]: The loaded and pinned models, their total size, hits, loads and evictions.
+        """
+        with self._lock:
+            return {
+                "models": list(self._entries),
+                "pinned": [name for name, entry in self._entries.items() if entry.pinned],
+                "loading": list(self._loading),
+                "bytes": self._total,
+                "max_memory_bytes": self.max_memory_bytes,
+                "max_models": self.max_models,
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+    def _checkout(self, name: str) -> _Entry:
+        while True:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None:
+                    self._entries.move_to_end(name)
+                    entry.users += 1
+                    self.hits += 1
+                    return entry
+                future = self._loading.get(name)
+                if future is None:
+                    future = Future()
+                    self._loading[name] = future
+                    break
+            # Another request is loading the model, wait for it and look again, it may already be evicted
+            future.result()
+
+        try:
+            value = self.load_fn(name)
+            entry = _Entry(value, self.sizeof(value))
+        except BaseException as e:
+            with self._lock:
+                del self._loading[name]
+            future.set_exception(e)
+            raise
+
+        entry.users = 1
+        with self._lock:
+            self._entries[name] = entry
+            self._total += entry.size
+            self.loads += 1
+            del self._loading[name]
+            evicted = self._evict()
+        future.set_result(None)
+        self._notify(evicted)
+        return entry
+
+    def _evict(self) -> List[str]:
+        evicted: List[str] = []
+        unpinned = sum(not entry.pinned for entry in self._entries.values())
+        for name in list(self._entries):
+            over_memory = self.max_memory_bytes > 0 and self._total > self.max_memory_bytes
+            over_count = self.max_models > 0 and unpinned > self.max_models
+            if not (over_memory or over_count):
+                break
+            entry = self._entries[name]
+            if entry.pinned or entry.users > 0:
+                continue
+            del self._entries[name]
+            self._total -= entry.size
+            self.evictions += 1
+            unpinned -= 1
+            evicted.append(name)
+        return evicted
+
+    def _notify(self, evicted: List[str]) -> None:
+        # The registry holds no reference to evicted models anymore, the callback can free their memory
+        if self.on_evict is not None:
+            for name in evicted:
+                self.on_evict(name)
@@ -0,0 +1,160 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+from typing import Callable, Dict, List, TypeVar
+
+T = TypeVar("T")
+
+
+def shard_of(key: str, num_shards: int) -> int:
+    """
+    Assigns a key to a shard by a stable hash, the same on every node and process.
+
+    Args:
+        key (str): The key, e.g. the path of an input file relative to the input folder.
+        num_shards (int): The number of shards.
+
+    Returns:
+        int: The shard of the key, in [0, num_shards).
+    """
+    digest = hashlib.sha256(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % num_shards
+
+
+def select_shard(items: List[T], shard_index: int, num_shards: int, key: Callable[[T], str] = str) -> List[T]:
+    """
+    Returns the items that belong to a shard, keeping their order.
+
+    Args:
+        items (List[T]): All items of the job.
+        shard_index (int): The shard to select.
+        num_shards (int): The number of shards.
+        key (Callable[[T], str]): Returns the key an item is sharded by.
+
+    Returns:
+        List[T]: The items of the shard.
+
+    Raises:
+        ValueError: If the shard index is out of range.
+    """
+    if num_shards < 1 or not 0 <= shard_index < num_shards:
+        raise ValueError(f"Invalid shard {shard_index} of {num_shards} shards.")
+    if num_shards == 1:
+        return list(items)
+    return [item for item in items if shard_of(key(item), num_shards) == shard_index]
+
+
+def shard_folder(output_path: str, shard_index: int, num_shards: int) -> str:
+    """
+    Returns the output folder of a shard, the output folder itself for unsharded jobs.
+
+    Args:
+        output_path (str): The output folder of the job.
+        shard_index (int): The shard.
+        num_shards (int): The number of shards.
+
+    Returns:
+        str: The output folder of the shard.
+    """
+    if num_shards <= 1:
+        return output_path
+    return os.path.join(output_path, f"shard-{shard_index:05d}-of-{num_shards:05d}")
+
+
+def merge_shards(output_path: str, num_shards: int) -> Dict[str, List[str]]:
+    """
+    Merges the outputs of all shards of a job into the output folder.
+
+    Per-batch `predictions-*.json` lists are merged into `predictions-merged.json`, row files (`.jsonl`,
+    `.parquet`, `.arrow`) into one `predictions-merged.*` file each, and the shard manifests into `manifest.jsonl`.
+    Any other file, e.g. synthesized audio, is copied into the output folder.
+
+    Args:
+        output_path (str): The output folder of the job.
+        num_shards (int): The number of shards.
+
+    Returns:
+        Dict[str, List[str]]: The merged files, and the shards that have no output folder.
+    """
+    shard_paths = [shard_folder(output_path, i, num_shards) for i in range(num_shards)]
+    missing = [path for path in shard_paths if not os.path.isdir(path)]
+
+    groups: Dict[str, List[str]] = {}
+    copied: List[str] = []
+    for shard_path in shard_paths:
+        for filename in sorted(glob.glob(os.path.join(shard_path, "**", "*"), recursive=True)):
+            if not os.path.isfile(filename):
+                continue
+            name = os.path.basename(filename)
+            extension = os.path.splitext(name)[1]
+            if name.startswith("manifest") and extension == ".jsonl":
+                groups.setdefault("manifest.jsonl", []).append(filename)
+            elif name.startswith("predictions") and extension in [".json", ".jsonl", ".parquet", ".arrow"]:
+                groups.setdefault(f"predictions-merged{extension}", []).append(filename)
+            else:
+                target = os.path.join(output_path, os.path.relpath(filename, shard_path))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(filename, target)
+                copied.append(target)
+
+    merged = []
+    for name, filenames in groups.items():
+        target = os.path.join(output_path, name)
+        extension = os.path.splitext(name)[1]
+        if extension == ".json":
+            rows = []
+            for filename in filenames:
+                with open(filename, "r") as f:
+                    rows.extend(json.load(f))
+            with open(target, "w") as f:
+                json.dump(rows, f)
+        elif extension == ".jsonl":
+            with open(target, "wb") as out:
+                for filename in filenames:
+                    with open(filename, "rb") as f:
+                        data = f.read()
+                    out.write(data if not data or data.endswith(b"\n") else data + b"\n")
+        elif extension == ".parquet":
+            import pyarrow.parquet as pq
+
+            writer = None
+            for filename in filenames:
+                table = pq.read_table(filename)
+                if writer is None:
+                    writer = pq.ParquetWriter(target, table.schema)
+                writer.write_table(table)
+            if writer is not None:
+                writer.close()
+        elif extension == ".arrow":
+            import pyarrow as pa
+
+            sink, arrow_writer = None, None
+            for filename in filenames:
+                table = pa.ipc.open_file(filename).read_all()
+                if arrow_writer is None:
+                    sink = pa.OSFile(target, "wb")
+                    arrow_writer = pa.ipc.new_file(sink, table.schema)
+                arrow_writer.write_table(table)
+            if arrow_writer is not None and sink is not None:
+                arrow_writer.close()
+                sink.close()
+        merged.append(target)
+
+    return {"merged": merged, "copied": copied, "missing_shards": missing}
@@ -0,0 +1,293 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import uuid
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+# pyarrow is only needed by the columnar formats, it is imported by their sink
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# Formats supported by `create_sink`
+SINK_FORMATS = ["jsonl", "parquet", "arrow"]
+
+
+def transcription_schema() -> "pa.Schema":
+    """
+    Returns the schema of the transcription rows written by `SpeechToTextBulk`, the same for every backend.
+
+    Returns:
+        pa.Schema: The schema.
+    """
+    import pyarrow as pa
+
+    segment = pa.struct([("text", pa.string()), ("start", pa.float64()), ("end", pa.float64())])
+    return pa.schema(
+        [
+            ("input", pa.string()),
+            ("transcription", pa.string()),
+            ("segments", pa.list_(segment)),
+            ("audio_duration", pa.float64()),
+            ("inference_time", pa.float64()),
+            ("model", pa.string()),
+            ("model_revision", pa.string()),
+            ("backend", pa.string()),
+        ]
+    )
+
+
+class PredictionSink(ABC):
+    """
+    PredictionSink appends prediction rows to rolling output files as they are produced.
+
+    Every row can carry a key, e.g. a manifest entry. Writes return the keys of the rows that are durably on disk
+    together with the file holding them, so that callers only mark inputs as done once their results are safe.
+
+    Files are named `{prefix}-{run_id}-{part}.{extension}` and rotate once they grow beyond `max_file_bytes`.
+
+    Attributes:
+        output_path (str): The folder of the output files.
+        prefix (str): The prefix of the output file names.
+        max_file_bytes (int): Size after which a new file is started.
+        run_id (str): Identifies the files of one run, so that reruns never overwrite earlier files.
+    """
+
+    extension = ""
+
+    def __init__(
+        self,
+        output_path: str,
+        prefix: str = "predictions",
+        max_file_bytes: int = 256 * 1024 * 1024,
+        run_id: Optional[str] = None,
+    ):
+        """
+        Initializes the PredictionSink, files are created on the first write.
+
+        Args:
+            output_path (str): The folder of the output files.
+            prefix (str): The prefix of the output file names.
+            max_file_bytes (int): Size after which a new file is started.
+            run_id (Optional[str]): Identifies the files of one run, random by default.
+        """
+        self.output_path = output_path
+        self.prefix = prefix
+        self.max_file_bytes = max_file_bytes
+        self.run_id = run_id or uuid.uuid4().hex[:8]
+        self.part = 0
+        self.files: List[str] = []
+
+    @abstractmethod
+    def write(self, rows: List[Dict[str, Any]], keys: Optional[List[Any]] = None) -> List[Tuple[Any, str]]:
+        """
+        Appends rows to the current file.
+
+        Args:
+            rows (List[Dict[str, Any]]): The rows.
+            keys (Optional[List[Any]]): One key per row.
+
+        Returns:
+            List[Tuple[Any, str]]: The keys of all rows that reached disk since the last call, with their file.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self) -> List[Tuple[Any, str]]:
+        """
+        Flushes and closes the current file.
+
+        Returns:
+            List[Tuple[Any, str]]: The keys of the rows that reached disk, with their file.
+        """
+        raise NotImplementedError
+
+    def _next_file(self) -> str:
+        path = os.path.join(self.output_path, f"{self.prefix}-{self.run_id}-{self.part:05d}.{self.extension}")
+        self.part += 1
+        self.files.append(path)
+        return path
+
+
+class JSONLSink(PredictionSink):
+    """
+    JSONLSink writes one JSON object per line. Rows are flushed on every write, so they are committed right away.
+    """
+
+    extension = "jsonl"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._file: Optional[Any] = None
+        self._path = ""
+
+    def write(self, rows: List[Dict[str, Any]], keys: Optional[List[Any]] = None) -> List[Tuple[Any, str]]:
+        if self._file is None:
+            self._path = self._next_file()
+            self._file = open(self._path, "w")
+
+        for row in rows:
+            self._file.write(json.dumps(row, default=str) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        committed = [(key, self._path) for key in keys or []]
+
+        if self._file.tell() >= self.max_file_bytes:
+            self.close()
+        return committed
+
+    def close(self) -> List[Tuple[Any, str]]:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return []
+
+
+class ColumnarSink(PredictionSink):
+    """
+    ColumnarSink writes rows to Parquet or Arrow IPC files with a fixed schema, in row groups of `row_group_size`
+    rows. Both formats are only readable once their footer is written, so rows are committed when their file is
+    closed, on rotation or at the end of the job.
+
+    Attributes:
+        schema (pa.Schema): The schema of the rows.
+        format (str): Either "parquet" or "arrow".
+        row_group_size (int): Number of rows buffered into one row group (record batch for Arrow).
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        schema: "pa.Schema",
+        format: str = "parquet",
+        row_group_size: int = 10_000,
+        **kwargs,
+    ):
+        """
+        Initializes the ColumnarSink.
+
+        Args:
+            output_path (str): The folder of the output files.
+            schema (pa.Schema): The schema of the rows.
+            format (str): Either "parquet" or "arrow".
+            row_group_size (int): Number of rows buffered into one row group (record batch for Arrow).
+            **kwargs: Arguments of `PredictionSink`.
+        """
+        import pyarrow  # noqa: F401, fails early if pyarrow is missing
+
+        super().__init__(output_path, **kwargs)
+        self.schema = schema
+        self.format = format
+        self.extension = format
+        self.row_group_size = max(row_group_size, 1)
+
+        self._writer: Optional[Any] = None
+        self._file: Optional[Any] = None
+        self._path = ""
+        self._rows: List[Dict[str, Any]] = []
+        self._keys: List[Any] = []
+        self._pending: List[Any] = []
+
+    def write(self, rows: List[Dict[str, Any]], keys: Optional[List[Any]] = None) -> List[Tuple[Any, str]]:
+        self._rows.extend(rows)
+        self._keys.extend(keys or [])
+
+        committed: List[Tuple[Any, str]] = []
+        while len(self._rows) >= self.row_group_size:
+            self._write_row_group(self._rows[: self.row_group_size])
+            self._rows = self._rows[self.row_group_size :]
+            if os.path.getsize(self._path) >= self.max_file_bytes:
+                committed.extend(self._close_file())
+        return committed
+
+    def close(self) -> List[Tuple[Any, str]]:
+        if self._rows:
+            self._write_row_group(self._rows)
+            self._rows = []
+        return self._close_file()
+
+    def _write_row_group(self, rows: List[Dict[str, Any]]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            self._path = self._next_file()
+            if self.format == "parquet":
+                self._writer = pq.ParquetWriter(self._path, self.schema)
+            else:
+                self._file = pa.OSFile(self._path, "wb")
+                self._writer = pa.ipc.new_file(self._file, self.schema)
+
+        table = pa.Table.from_pylist(rows, schema=self.schema)
+        if self.format == "parquet":
+            self._writer.write_table(table, row_group_size=len(rows))
+        else:
+            self._writer.write_table(table, max_chunksize=len(rows))
+
+        # The keys of these rows are committed with the file
+        self._pending.extend(self._keys[: len(rows)])
+        self._keys = self._keys[len(rows) :]
+
+    def _close_file(self) -> List[Tuple[Any, str]]:
+        if self._writer is None:
+            return []
+        self._writer.close()
+        self._writer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        committed = [(key, self._path) for key in self._pending]
+        self._pending = []
+        return committed
+
+
+def create_sink(
+    format: str,
+    output_path: str,
+    schema: Optional["pa.Schema"] = None,
+    row_group_size: int = 10_000,
+    max_file_bytes: int = 256 * 1024 * 1024,
+    prefix: str = "predictions",
+) -> PredictionSink:
+    """
+    Creates a prediction sink for the given output format.
+
+    Args:
+        format (str): One of `SINK_FORMATS`.
+        output_path (str): The folder of the output files.
+        schema (Optional[pa.Schema]): The schema of the rows, required by the columnar formats.
+        row_group_size (int): Number of rows per row group of the columnar formats.
+        max_file_bytes (int): Size after which a new file is started.
+        prefix (str): The prefix of the output file names.
+
+    Returns:
+        PredictionSink: The sink.
+    """
+    if format == "jsonl":
+        return JSONLSink(output_path, prefix=prefix, max_file_bytes=max_file_bytes)
+    elif format in ["parquet", "arrow"]:
+        if schema is None:
+            raise ValueError(f"A schema is required for {format} output.")
+        return ColumnarSink(
+            output_path,
+            schema=schema,
+            format=format,
+            row_group_size=row_group_size,
+            prefix=prefix,
+            max_file_bytes=max_file_bytes,
+        )
+    raise ValueError(f"Unsupported output format: {format}. Supported formats are {SINK_FORMATS}.")
@@ -14,17 +14,31 @@
 # limitations under the License.
 
 import base64
+import io
+import json
 import multiprocessing
+import os
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 import cherrypy
+import numpy as np
 import torch
 from geniusrise import BatchInput, BatchOutput, State
-from transformers import AutoModelForCTC, AutoProcessor
 
+from geniusrise_audio.base.batching import MicroBatcher
+from geniusrise_audio.base.cache import ResultCache, SQLiteStore
 from geniusrise_audio.s2t.inference import _SpeechToTextInference
-from geniusrise_audio.s2t.util import decode_audio
+from geniusrise_audio.s2t.streaming import STREAM_IDLE_TIMEOUT_S, StreamingSession, pcm_to_float32
+from geniusrise_audio.s2t.util import decode_audio, normalize_transcription, resample, transcription_size
+from geniusrise_audio.s2t.vad import VAD_METHODS, detect_speech, merge_region_results
 from geniusrise_audio import AudioAPI
 
+if TYPE_CHECKING:
+    from transformers import AutoModelForCTC, AutoProcessor
+
 
 class SpeechToTextAPI(AudioAPI, _SpeechToTextInference):
     r"""
@@ -38,6 +52,10 @@ class SpeechToTextAPI(AudioAPI, _SpeechToTextInference):
     Methods:
         transcribe(audio_input: bytes) -> str:
             Transcribes the given audio input to text using the speech-to-text model.
+        transcribe_raw() -> str:
+            Transcribes an audio file uploaded as a binary or multipart body.
+        transcribe_stream() -> Dict[str, Any]:
+            Transcribes a live stream of PCM frames, returning partial and committed transcripts.
 
     Example CLI Usage:
 
@@ -87,10 +105,36 @@ class SpeechToTextAPI(AudioAPI, _SpeechToTextInference):
                 username="user" \
                 password="password"
     ```
+
+    or serving several models from one process, requests pick one with `"model": "openai/whisper-medium"`:
+
+    ```bash
+    genius SpeechToTextAPI rise \
+        batch \
+                --input_folder ./input \
+        batch \
+                --output_folder ./output \
+        none \
+        listen \
+            --args \
+                model_name="openai/whisper-small" \
+                model_class="WhisperForConditionalGeneration" \
+                processor_class="AutoProcessor" \
+                use_cuda=True \
+                device_map="cuda:0" \
+                models="openai/whisper-medium,openai/whisper-large-v3" \
+                pinned_models="openai/whisper-medium" \
+                models_memory_mb=8000 \
+                endpoint="*" \
+                port=3000
+    ```
     """
 
-    model: AutoModelForCTC
-    processor: AutoProcessor
+    model: "AutoModelForCTC"
+    processor: "AutoProcessor"
+
+    # Seconds of audio of the synthetic warmup requests, see `AudioAPI.listen`
+    WARMUP_SIZES = [1.0, 10.0, 30.0]
 
     def __init__(
         self,
@@ -110,6 +154,10 @@ class SpeechToTextAPI(AudioAPI, _SpeechToTextInference):
         """
         super().__init__(input=input, output=output, state=state, **kwargs)
         self.hf_pipeline = None
+        self.batcher: Optional[MicroBatcher] = None
+        self.batcher_lock = threading.Lock()
+        self.streams: Dict[str, StreamingSession] = {}
+        self.streams_lock = threading.Lock()
 
     @cherrypy.expose
     @cherrypy.tools.json_out()
@@ -118,6 +166,9 @@ class SpeechToTextAPI(AudioAPI, _SpeechToTextInference):
         r"""
         API endpoint to transcribe the given audio input to text using the speech-to-text model.
         Expects a JSON input with 'audio_file' as a key containing the base64 encoded audio data.
+        When the API listens with `max_batch_size > 1`, concurrent requests with the same arguments are transcribed
+        together in one batch. With `"vad": "energy"` or `"vad": "silero"` only the detected speech is transcribed.
+        When the API serves several models (see `listen`), `"model"` picks the one transcribing the request.
 
         Returns:
             Dict[str, str]: A dictionary containing the transcribed text.
@@ -133,15 +184,293 @@ class SpeechToTextAPI(AudioAPI, _SpeechToTextInference):
         """
         input_json = cherrypy.request.json
         audio_data = input_json.get("audio_file")
-        model_sampling_rate = input_json.get("model_sampling_rate", 16_000)
-        processor_args = input_json.get("processor_args", {})
-        chunk_size = input_json.get("chunk_size", 0)
-        overlap_size = input_json.get("overlap_size", 0)
 
-        generate_args = input_json.copy()
+        if not audio_data:
+            raise cherrypy.HTTPError(400, "No audio data provided.")
+
+        params = input_json.copy()
+        del params["audio_file"]
+
+        # Convert base64 encoded data to bytes
+        audio_bytes = base64.b64decode(audio_data)
+        with self.serving_model(params.pop("model", None)):
+            return self._transcribe(audio_bytes, params)
+
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    @cherrypy.config(**{"request.process_request_body": False})
+    def transcribe_raw(self, **kwargs):
+        r"""
+        API endpoint to transcribe raw audio uploads, avoiding the base64 and JSON overhead of `transcribe`.
+        Accepts either an `application/octet-stream` body holding the audio file, or a `multipart/form-data` body
+        with the audio file uploaded as a file (with a filename) in the `audio_file` field.
+
+        The arguments accepted by `transcribe` are passed in the query string, as multipart form fields, or as a JSON
+        object in the `X-Transcribe-Args` header. Values are parsed as JSON where possible, e.g. `num_beams=4` is an
+        integer and `tgt_lang=eng` a string.
+
+        Returns:
+            Dict[str, str]: A dictionary containing the transcribed text.
+
+        Example CURL Requests for transcription:
+        ```bash
+        curl -X POST "http://localhost:3000/api/v1/transcribe_raw?model_sampling_rate=16000&tgt_lang=eng" \
+            -H "Content-Type: application/octet-stream" \
+            -u user:password \
+            --data-binary @sample.flac | jq
+
+        curl -X POST http://localhost:3000/api/v1/transcribe_raw \
+            -H 'X-Transcribe-Args: {"processor_args": {"return_attention_mask": true}}' \
+            -u user:password \
+            -F audio_file=@sample.flac \
+            -F model_sampling_rate=16000 | jq
+        ```
+        """
+        request = cherrypy.request
+        if request.method != "POST":
+            raise cherrypy.HTTPError(405, "Use POST to upload audio.")
+
+        params = {k: self._parse_param(v) for k, v in kwargs.items()}
+        header_args = request.headers.get("X-Transcribe-Args")
+        if header_args:
+            try:
+                params.update(json.loads(header_args))
+            except ValueError:
+                raise cherrypy.HTTPError(400, "X-Transcribe-Args is not a valid JSON object.")
+
+        if request.headers.get("Content-Type", "").startswith("multipart/form-data"):
+            # Parse the multipart body ourselves, large file parts are spooled to disk by cherrypy
+            request.body.process()
+            audio_bytes = None
+            for name, value in request.body.params.items():
+                if name == "audio_file":
+                    # Fields without a filename arrive decoded as text, their raw bytes are gone
+                    if getattr(value, "filename", None) is None or value.file is None:
+                        raise cherrypy.HTTPError(400, "audio_file must be a single file upload.")
+                    value.file.seek(0)
+                    audio_bytes = value.file.read()
+                else:
+                    params[name] = self._parse_param(value)
+        else:
+            # The body is not consumed by cherrypy, read it once from the socket
+            audio_bytes = request.rfile.read()
+
+        if not audio_bytes:
+            raise cherrypy.HTTPError(400, "No audio data provided.")
+
+        with self.serving_model(params.pop("model", None)):
+            return self._transcribe(audio_bytes, params)
+
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    @cherrypy.config(**{"request.process_request_body": False})
+    def transcribe_stream(self, **kwargs):
+        r"""
+        API endpoint to transcribe live audio, e.g. a phone call, while it is being recorded.
+        Each request posts the next raw mono PCM frames of a stream as an `application/octet-stream` body. The first
+        request opens a session and the response carries its `session_id`, which is passed along with the following
+        frames. Posting `end=true` flushes and closes the session.
+
+        The audio of a session is kept in a rolling buffer that is transcribed again whenever at least
+        `min_chunk_ms` of new audio has arrived. Words are committed once two consecutive transcriptions agree on
+        them (local agreement), the rest of the latest transcription is returned as the partial transcript. Once the
+        buffer grows beyond `max_buffer_s` its transcription is committed and the window slides on.
+
+        Query parameters (all optional, the streaming parameters are only read when a session is opened):
+            session_id (str): The session to append the frames to.
+            encoding (str): "pcm_s16le" (default) or "pcm_f32le".
+            sample_rate (int): The sampling rate of the frames, defaults to `model_sampling_rate`.
+            end (bool): Whether these are the last frames of the stream.
+            min_chunk_ms (float): Minimum new audio between transcriptions. Defaults to 500.
+            max_buffer_s (float): Maximum length of the rolling buffer. Defaults to 15.
+            overlap_s (float): Audio kept when the buffer slides. Defaults to 1.
+        Everything else, like `model`, `model_sampling_rate` or generation arguments, is handled like in
+        `transcribe_raw` and fixed when the session is opened.
+
+        Returns:
+            Dict[str, Any]: The session id, the text committed by this request, the partial transcript, the whole
+                committed transcript and whether the returned text is final.
+
+        Example CURL Requests for streaming transcription:
+        ```bash
+        curl -X POST "http://localhost:3000/api/v1/transcribe_stream?sample_rate=16000" \
+            -H "Content-Type: application/octet-stream" \
+            -u user:password \
+            --data-binary @frames-0.pcm | jq
+
+        curl -X POST "http://localhost:3000/api/v1/transcribe_stream?session_id=<session_id>&end=true" \
+            -H "Content-Type: application/octet-stream" \
+            -u user:password \
+            --data-binary @frames-1.pcm | jq
+        ```
+        """
+        request = cherrypy.request
+        if request.method != "POST":
+            raise cherrypy.HTTPError(405, "Use POST to stream audio.")
+
+        params = {k: self._parse_param(v) for k, v in kwargs.items()}
+        header_args = request.headers.get("X-Transcribe-Args")
+        if header_args:
+            try:
+                params.update(json.loads(header_args))
+            except ValueError:
+                raise cherrypy.HTTPError(400, "X-Transcribe-Args is not a valid JSON object.")
+
+        session_id = params.pop("session_id", None)
+        encoding = params.pop("encoding", "pcm_s16le")
+        end = params.pop("end", False) is True
+        sample_rate = params.pop("sample_rate", None)
+
+        pcm = request.rfile.read()
+        try:
+            samples = pcm_to_float32(pcm, encoding)
+        except ValueError as e:
+            raise cherrypy.HTTPError(400, str(e))
+
+        session = self._get_stream(str(session_id) if session_id is not None else None, params)
+        with session.lock, self.serving_model(session.params.get("model")):
+            model_sampling_rate = session.params.get("model_sampling_rate", 16_000)
+            if len(samples):
+                if sample_rate and sample_rate != model_sampling_rate:
+                    samples = resample(torch.from_numpy(samples), sample_rate, model_sampling_rate).numpy()
+                session.append(samples)
+
+            if end:
+                with self.streams_lock:
+                    self.streams.pop(session.session_id, None)
+                if len(session.buffer) == 0:
+                    return session.result(final=True)
+            elif not session.ready():
+                return session.result()
+
+            text = self._transcribe_window(session.buffer, session.params)
+            return session.update(text, final=end)
+
+    def _get_stream(self, session_id: Optional[str], params: Dict[str, Any]) -> StreamingSession:
+        """
+        Returns the streaming session with the given id, or opens a new one. Sessions that have been idle for
+        `STREAM_IDLE_TIMEOUT_S` are dropped.
+
+        Args:
+            session_id (Optional[str]): The id of the session, None opens a new session.
+            params (Dict[str, Any]): The request arguments, used to configure a new session.
+
+        Returns:
+            StreamingSession: The session.
+
+        Raises:
+            cherrypy.HTTPError: 404 if there is no session with the given id.
+        """
+        now = time.monotonic()
+        with self.streams_lock:
+            for expired in [k for k, v in self.streams.items() if now - v.last_active > STREAM_IDLE_TIMEOUT_S]:
+                del self.streams[expired]
+
+            if session_id is not None:
+                if session_id not in self.streams:
+                    raise cherrypy.HTTPError(404, f"Unknown or expired streaming session {session_id}.")
+                return self.streams[session_id]
+
+            self.check_served_model(params.get("model"))
+            session = StreamingSession(
+                session_id=uuid.uuid4().hex,
+                sampling_rate=params.get("model_sampling_rate", 16_000),
+                min_chunk_ms=params.pop("min_chunk_ms", 500.0),
+                max_buffer_s=params.pop("max_buffer_s", 15.0),
+                overlap_s=params.pop("overlap_s", 1.0),
+                params=params,
+            )
+            self.streams[session.session_id] = session
+            return session
+
+    def _transcribe_window(self, audio: Any, params: Dict[str, Any]) -> str:
+        """
+        Transcribes the rolling buffer of a streaming session as a whole.
+
+        Args:
+            audio (np.ndarray): Mono float32 audio at the model's sampling rate.
+            params (Dict[str, Any]): The arguments of the session, as in `_transcribe`.
+
+        Returns:
+            str: The transcription of the buffer.
+        """
+        model_sampling_rate = params.get("model_sampling_rate", 16_000)
+        processor_args = params.get("processor_args", {})
+        generate_args = {
+            k: v
+            for k, v in params.items()
+            if k
+            not in ["model", "model_sampling_rate", "processor_args", "chunk_size", "overlap_size", "max_batch_samples"]
+        }
+        audio_input = torch.from_numpy(audio).unsqueeze(0)
+
+        if self._can_batch(0):
+            # Streams share batches with each other and with one-shot requests
+            key = (
+                self.served_model,
+                self.model.config.model_type,
+                model_sampling_rate,
+                json.dumps(processor_args, sort_keys=True, default=str),
+                json.dumps(generate_args, sort_keys=True, default=str),
+            )
+            with self.queued_request():
+                return normalize_transcription(self._get_batcher().submit(key, audio_input).result())[0]
+
+        with self.inference_slot(), torch.no_grad():
+            if self.use_whisper_cpp:
+                return self.model.transcribe(audio, num_proc=multiprocessing.cpu_count())
+            elif self.use_faster_whisper:
+                output = self.process_faster_whisper(audio, model_sampling_rate, 0, generate_args)
+                return " ".join(output["transcriptions"])
+            elif self.model.config.model_type == "whisper":
+                results = self.process_whisper_batch([audio_input], model_sampling_rate, processor_args, generate_args)
+            elif self.model.config.model_type == "seamless_m4t_v2":
+                results = self.process_seamless_batch([audio_input], model_sampling_rate, processor_args, generate_args)
+            else:
+                results = self.process_wav2vec2_batch([audio_input], model_sampling_rate, processor_args)
+        return normalize_transcription(results[0])[0]
+
+    @staticmethod
+    def _parse_param(value: Any) -> Any:
+        """
+        Parses a query string or form field value as JSON, falling back to the raw string.
+
+        Args:
+            value (Any): The value as received.
+
+        Returns:
+            Any: The parsed value.
+        """
+        if not isinstance(value, str):
+            return value
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+
+    def _transcribe(self, audio_bytes: bytes, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Decodes and transcribes the audio of a request.
+
+        Args:
+            audio_bytes (bytes): The encoded audio file.
+            params (Dict[str, Any]): The request arguments, everything other than the sampling rate, processor args,
+                chunking, batching and VAD arguments is passed on to generation.
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the transcription.
+        """
+        model_sampling_rate = params.get("model_sampling_rate", 16_000)
+        processor_args = params.get("processor_args", {})
+        chunk_size = params.get("chunk_size", 0)
+        overlap_size = params.get("overlap_size", 0)
+        max_batch_samples = params.get("max_batch_samples", 0)
+        vad = params.get("vad", "")
+        if vad and vad not in VAD_METHODS:
+            raise cherrypy.HTTPError(400, f"Unsupported VAD method: {vad}. Supported methods are {VAD_METHODS}.")
+
+        generate_args = params.copy()
 
-        if "audio_file" in generate_args:
-            del generate_args["audio_file"]
         if "model_sampling_rate" in generate_args:
             del generate_args["model_sampling_rate"]
         if "processor_args" in generate_args:
@@ -150,40 +479,358 @@ class SpeechToTextAPI(AudioAPI, _SpeechToTextInference):
             del generate_args["chunk_size"]
         if "overlap_size" in generate_args:
             del generate_args["overlap_size"]
+        if "max_batch_samples" in generate_args:
+            del generate_args["max_batch_samples"]
+        if "vad" in generate_args:
+            del generate_args["vad"]
+        if vad and self.use_faster_whisper:
+            generate_args.setdefault("vad_filter", True)
 
         if chunk_size > 0 and overlap_size == 0:
             overlap_size = int(chunk_size / 6)
 
         # TODO: support voice presets
 
-        if not audio_data:
-            raise cherrypy.HTTPError(400, "No audio data provided.")
-
-        # Convert base64 encoded data to bytes
-        audio_bytes = base64.b64decode(audio_data)
         audio_input, input_sampling_rate = decode_audio(
             audio_bytes=audio_bytes,
             model_type=self.model.config.model_type if not (self.use_faster_whisper or self.use_whisper_cpp) else None,
             model_sampling_rate=model_sampling_rate,
         )
 
-        # Perform inference
-        with torch.no_grad():
-            if self.use_whisper_cpp:
-                transcription = self.model.transcribe(audio_input, num_proc=multiprocessing.cpu_count())
-            elif self.use_faster_whisper:
-                transcription = self.process_faster_whisper(audio_bytes, model_sampling_rate, chunk_size, generate_args)
-            elif self.model.config.model_type == "whisper":
-                transcription = self.process_whisper(
-                    audio_input, model_sampling_rate, processor_args, chunk_size, overlap_size, generate_args
+        # Identical audio with identical arguments is only transcribed once
+        result_key = None
+        if self.cache is not None:
+            result_key = self.transcription_cache_key(
+                audio_input, model_sampling_rate, processor_args, chunk_size, overlap_size, generate_args, vad=vad
+            )
+            transcription = self.cache.get(result_key)
+            if transcription is not None:
+                return {"transcriptions": transcription}
+
+        if vad and not self.use_faster_whisper:
+            # Only the speech regions are transcribed, their timestamps are mapped back to the request's audio
+            regions = detect_speech(audio_input, model_sampling_rate, method=vad)
+            results = self._transcribe_regions(
+                audio_input,
+                regions,
+                model_sampling_rate,
+                processor_args,
+                chunk_size,
+                overlap_size,
+                generate_args,
+                max_batch_samples,
+            )
+            transcription = merge_region_results(results, regions, model_sampling_rate)
+        else:
+            transcription = self._run_transcription(
+                audio_bytes,
+                audio_input,
+                model_sampling_rate,
+                processor_args,
+                chunk_size,
+                overlap_size,
+                generate_args,
+                max_batch_samples,
+            )
+        if self.cache is not None and result_key is not None:
+            self.cache.put(result_key, transcription)
+        return {"transcriptions": transcription}
+
+    def _run_transcription(
+        self,
+        audio_bytes: bytes,
+        audio_input: torch.Tensor,
+        model_sampling_rate: int,
+        processor_args: Dict[str, Any],
+        chunk_size: int,
+        overlap_size: int,
+        generate_args: Dict[str, Any],
+        max_batch_samples: int,
+    ) -> Any:
+        """
+        Runs the model on the audio of a request, through the dynamic batcher when possible.
+
+        Args:
+            audio_bytes (bytes): The encoded audio file, used by faster-whisper.
+            audio_input (torch.Tensor): The decoded audio.
+            model_sampling_rate (int): The sampling rate of the model.
+            processor_args (Dict[str, Any]): Arguments for the audio processor.
+            chunk_size (int): The size of audio chunks to process.
+            overlap_size (int): The size of overlap between audio chunks.
+            generate_args (Dict[str, Any]): Additional arguments for transcription.
+            max_batch_samples (int): Memory budget of a single forward pass over the chunks, in audio samples.
+
+        Returns:
+            Any: The transcription.
+        """
+        if self._can_batch(chunk_size):
+            key = (
+                self.served_model,
+                self.model.config.model_type,
+                model_sampling_rate,
+                json.dumps(processor_args, sort_keys=True, default=str),
+                json.dumps(generate_args, sort_keys=True, default=str),
+            )
+            with self.queued_request():
+                return self._get_batcher().submit(key, audio_input).result()
+
+        with self.inference_slot(), torch.no_grad():
+            return self._process_audio(
+                audio_bytes,
+                audio_input,
+                model_sampling_rate,
+                processor_args,
+                chunk_size,
+                overlap_size,
+                generate_args,
+                max_batch_samples,
+            )
+
+    def _transcribe_regions(
+        self,
+        audio_input: torch.Tensor,
+        regions: List[Tuple[int, int]],
+        model_sampling_rate: int,
+        processor_args: Dict[str, Any],
+        chunk_size: int,
+        overlap_size: int,
+        generate_args: Dict[str, Any],
+        max_batch_samples: int,
+    ) -> List[Any]:
+        """
+        Transcribes the speech regions of a request inside a single inference slot. Without chunking the regions are
+        batched longest first, each batch padded to at most `max_batch_samples` samples.
+
+        Args:
+            audio_input (torch.Tensor): The decoded audio.
+            regions (List[Tuple[int, int]]): Start and end sample of every speech region.
+            model_sampling_rate (int): The sampling rate of the model.
+            processor_args (Dict[str, Any]): Arguments for the audio processor.
+            chunk_size (int): The size of audio chunks to process.
+            overlap_size (int): The size of overlap between audio chunks.
+            generate_args (Dict[str, Any]): Additional arguments for transcription.
+            max_batch_samples (int): Memory budget of a single forward pass in audio samples. 0 runs all regions in
+                one batch.
+
+        Returns:
+            List[Any]: The transcription of every region, in the order of the regions.
+        """
+        clips = [audio_input[..., start:end] for start, end in regions]
+        model_type = None if self.use_whisper_cpp else self.model.config.model_type
+
+        with self.inference_slot(), torch.no_grad():
+            if chunk_size > 0 or model_type not in ["whisper", "seamless_m4t_v2", "wav2vec2"]:
+                return [
+                    self._process_audio(
+                        b"",
+                        clip,
+                        model_sampling_rate,
+                        processor_args,
+                        chunk_size,
+                        overlap_size,
+                        generate_args,
+                        max_batch_samples,
+                    )
+                    for clip in clips
+                ]
+
+            # Longest first, so the first clip of a batch sets its padded length
+            order = sorted(range(len(clips)), key=lambda i: -clips[i].shape[-1])
+            batches: List[List[int]] = []
+            for i in order:
+                if batches and (
+                    max_batch_samples <= 0
+                    or (len(batches[-1]) + 1) * clips[batches[-1][0]].shape[-1] <= max_batch_samples
+                ):
+                    batches[-1].append(i)
+                else:
+                    batches.append([i])
+
+            results: List[Any] = [None] * len(clips)
+            for batch in batches:
+                batch_inputs = [clips[i] for i in batch]
+                if model_type == "whisper":
+                    batch_results = self.process_whisper_batch(
+                        batch_inputs, model_sampling_rate, processor_args, generate_args
+                    )
+                elif model_type == "seamless_m4t_v2":
+                    batch_results = self.process_seamless_batch(
+                        batch_inputs, model_sampling_rate, processor_args, generate_args
+                    )
+                else:
+                    batch_results = self.process_wav2vec2_batch(batch_inputs, model_sampling_rate, processor_args)
+                for i, result in zip(batch, batch_results):
+                    results[i] = result
+        return results
+
+    def _process_audio(
+        self,
+        audio_bytes: bytes,
+        audio_input: torch.Tensor,
+        model_sampling_rate: int,
+        processor_args: Dict[str, Any],
+        chunk_size: int,
+        overlap_size: int,
+        generate_args: Dict[str, Any],
+        max_batch_samples: int,
+    ) -> Any:
+        """
+        Runs the model on decoded audio. The caller holds the inference slot.
+
+        Args:
+            audio_bytes (bytes): The encoded audio file, used by faster-whisper.
+            audio_input (torch.Tensor): The decoded audio.
+            model_sampling_rate (int): The sampling rate of the model.
+            processor_args (Dict[str, Any]): Arguments for the audio processor.
+            chunk_size (int): The size of audio chunks to process.
+            overlap_size (int): The size of overlap between audio chunks.
+            generate_args (Dict[str, Any]): Additional arguments for transcription.
+            max_batch_samples (int): Memory budget of a single forward pass over the chunks, in audio samples.
+
+        Returns:
+            Any: The transcription.
+        """
+        if self.use_whisper_cpp:
+            transcription = self.model.transcribe(audio_input, num_proc=multiprocessing.cpu_count())
+        elif self.use_faster_whisper:
+            transcription = self.process_faster_whisper(audio_bytes, model_sampling_rate, chunk_size, generate_args)
+        elif self.model.config.model_type == "whisper":
+            transcription = self.process_whisper(
+                audio_input, model_sampling_rate, processor_args, chunk_size, overlap_size, generate_args
+            )
+        elif self.model.config.model_type == "seamless_m4t_v2":
+            transcription = self.process_seamless(
+                audio_input,
+                model_sampling_rate,
+                processor_args,
+                chunk_size,
+                overlap_size,
+                generate_args,
+                max_batch_samples=max_batch_samples,
+            )
+        elif self.model.config.model_type == "wav2vec2":
+            transcription = self.process_wav2vec2(
+                audio_input,
+                model_sampling_rate,
+                processor_args,
+                chunk_size,
+                overlap_size,
+                max_batch_samples=max_batch_samples,
+            )
+
+        return transcription
+
+    def warmup(self, sizes: List[float]) -> None:
+        """
+        Transcribes low level noise of every duration in `sizes` through the request path, and a full batch of the
+        shortest duration when dynamic batching is enabled.
+
+        Args:
+            sizes (List[float]): Durations of the synthetic recordings in seconds.
+        """
+        import soundfile as sf
+
+        sampling_rate = 16_000
+        rng = np.random.default_rng(0)
+        params: Dict[str, Any] = {"model_sampling_rate": sampling_rate}
+        if not (self.use_whisper_cpp or self.use_faster_whisper) and self.model.config.model_type == "seamless_m4t_v2":
+            params["tgt_lang"] = "eng"
+
+        files = []
+        for duration in sorted(sizes):
+            audio = (0.01 * rng.standard_normal(int(duration * sampling_rate))).astype(np.float32)
+            buffer = io.BytesIO()
+            sf.write(buffer, audio, sampling_rate, format="WAV")
+            files.append(buffer.getvalue())
+
+        for audio_bytes in files:
+            self._transcribe(audio_bytes, dict(params))
+
+        max_batch_size = getattr(self, "max_batch_size", 1)
+        if files and max_batch_size > 1:
+            model = self.served_model
+
+            def transcribe():
+                with self.serving_model(model):
+                    self._transcribe(files[0], dict(params))
+
+            threads = [threading.Thread(target=transcribe) for _ in range(max_batch_size)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+    def create_cache(self, max_memory_bytes: int, max_disk_bytes: int) -> ResultCache:
+        """
+        Creates the transcription result cache, the on-disk tier is an SQLite database in the output folder.
+
+        Args:
+            max_memory_bytes (int): Maximum size of the in-memory tier.
+            max_disk_bytes (int): Maximum size of the on-disk tier, 0 disables it.
+
+        Returns:
+            ResultCache: The cache.
+        """
+        store = (
+            SQLiteStore(os.path.join(self.output.output_folder, "stt_cache.sqlite"), max_disk_bytes)
+            if max_disk_bytes > 0
+            else None
+        )
+        return ResultCache(max_memory_bytes=max_memory_bytes, store=store, sizeof=transcription_size)
+
+    def _can_batch(self, chunk_size: int) -> bool:
+        """
+        Whether a request can go through the dynamic batcher instead of running on its own.
+
+        Args:
+            chunk_size (int): The chunk size of the request, chunked requests are already batched per file.
+
+        Returns:
+            bool: True if the request should be batched with concurrent requests.
+        """
+        if getattr(self, "max_batch_size", 1) <= 1 or self.use_whisper_cpp or self.use_faster_whisper:
+            return False
+        if self.model.config.model_type == "whisper":
+            return True
+        return self.model.config.model_type in ["seamless_m4t_v2", "wav2vec2"] and chunk_size == 0
+
+    def _get_batcher(self) -> MicroBatcher:
+        """
+        Returns the dynamic batcher, creating it on first use.
+
+        Returns:
+            MicroBatcher: Batches concurrent requests that share a model, sampling rate and arguments.
+        """
+        with self.batcher_lock:
+            if self.batcher is None:
+                self.batcher = MicroBatcher(
+                    batch_fn=self._transcribe_batch,
+                    max_batch_size=self.max_batch_size,
+                    max_wait_ms=self.max_batch_wait_ms,
                 )
-            elif self.model.config.model_type == "seamless_m4t_v2":
-                transcription = self.process_seamless(
-                    audio_input, model_sampling_rate, processor_args, chunk_size, overlap_size, generate_args
+            return self.batcher
+
+    def _transcribe_batch(self, key: Tuple[str, str, int, str, str], audio_inputs: List[torch.Tensor]) -> List[Any]:
+        """
+        Transcribes a batch of concurrent requests with a single padded model call.
+
+        Args:
+            key (Tuple[str, str, int, str, str]): Served model, model type, sampling rate, and JSON encoded processor
+                and generate args.
+            audio_inputs (List[torch.Tensor]): The decoded audio of each request.
+
+        Returns:
+            List[Any]: The transcription of each request.
+        """
+        model, model_type, model_sampling_rate, processor_args, generate_args = key
+        # The requests of the batch are already counted as queued by their handlers, and hold the model
+        with self.serving_model(model), self.inference_slot(bounded=False):
+            if model_type == "whisper":
+                return self.process_whisper_batch(
+                    audio_inputs, model_sampling_rate, json.loads(processor_args), json.loads(generate_args)
                 )
-            elif self.model.config.model_type == "wav2vec2":
-                transcription = self.process_wav2vec2(
-                    audio_input, model_sampling_rate, processor_args, chunk_size, overlap_size
+            elif model_type == "seamless_m4t_v2":
+                return self.process_seamless_batch(
+                    audio_inputs, model_sampling_rate, json.loads(processor_args), json.loads(generate_args)
                 )
-
-        return {"transcriptions": transcription}
+            return self.process_wav2vec2_batch(audio_inputs, model_sampling_rate, json.loads(processor_args))
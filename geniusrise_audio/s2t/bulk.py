@@ -17,14 +17,31 @@ import glob
 import json
 import multiprocessing
 import os
+import queue
+import threading
+import time
+import traceback
 import uuid
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
+import torch
 from geniusrise import BatchInput, BatchOutput, State
-from transformers import AutoModelForCTC, AutoProcessor
 
+from geniusrise_audio.base.cache import ResultCache, SQLiteStore
+from geniusrise_audio.base.manifest import Manifest
+from geniusrise_audio.base.sharding import merge_shards, select_shard, shard_folder
+from geniusrise_audio.base.sinks import PredictionSink, create_sink, transcription_schema
 from geniusrise_audio.s2t.inference import SpeechToTextInference
-from geniusrise_audio.s2t.util import decode_audio
+from geniusrise_audio.s2t.util import (
+    normalize_transcription,
+    prefetch_audio,
+    sort_by_duration,
+    transcription_size,
+)
+from geniusrise_audio.s2t.vad import VAD_METHODS, detect_speech, merge_region_results
+
+if TYPE_CHECKING:
+    from transformers import AutoModelForCTC, AutoProcessor
 
 
 class SpeechToTextBulk(SpeechToTextInference):
@@ -93,8 +110,8 @@ class SpeechToTextBulk(SpeechToTextInference):
     ```
     """
 
-    model: AutoModelForCTC
-    processor: AutoProcessor
+    model: "AutoModelForCTC"
+    processor: "AutoProcessor"
 
     def __init__(
         self,
@@ -113,6 +130,11 @@ class SpeechToTextBulk(SpeechToTextInference):
             **kwargs: Additional keyword arguments.
         """
         super().__init__(input=input, output=output, state=state, **kwargs)
+        self.cache: Optional[ResultCache] = None
+        self.manifest: Optional[Manifest] = None
+        self.sink: Optional[PredictionSink] = None
+        self.cpu_threads = 0
+        self.vad = ""
 
     def transcribe(
         self,
@@ -129,10 +151,29 @@ class SpeechToTextBulk(SpeechToTextInference):
         batch_size: int = 8,
         use_whisper_cpp: bool = False,
         use_faster_whisper: bool = False,
+        use_onnxruntime: bool = False,
         notification_email: Optional[str] = None,
         model_sampling_rate: int = 16_000,
         chunk_size: int = 0,
         overlap_size: int = 0,
+        max_batch_samples: int = 0,
+        prefetch_workers: int = 2,
+        prefetch_depth: int = 16,
+        prefetch_processes: bool = False,
+        cache: bool = True,
+        cache_memory_mb: float = 256,
+        cache_db: Optional[str] = None,
+        resume: bool = True,
+        incremental: bool = False,
+        manifest_path: Optional[str] = None,
+        output_format: str = "json",
+        output_row_group_size: int = 10_000,
+        output_max_file_mb: float = 256,
+        shard_index: int = 0,
+        num_shards: int = 1,
+        num_workers: int = 1,
+        sort_by_length: bool = False,
+        vad: str = "",
         **kwargs: Any,
     ):
         """
@@ -149,12 +190,31 @@ class SpeechToTextBulk(SpeechToTextInference):
             max_memory (Dict): Maximum memory configuration for devices.
             torchscript (bool, optional): Whether to use a TorchScript-optimized version of the pre-trained language model. Defaults to False.
             compile (bool, optional): Whether to compile the model before fine-tuning. Defaults to True.
-            batch_size (int): Number of classifications to process simultaneously (default 8).
+            batch_size (int): Number of audio files padded together into a single forward pass (default 8).
             use_whisper_cpp (bool): Whether to use whisper.cpp to load the model. Defaults to False. Note: only works for these models: https://github.com/aarnphm/whispercpp/blob/524dd6f34e9d18137085fb92a42f1c31c9c6bc29/src/whispercpp/utils.py#L32
             use_faster_whisper (bool): Whether to use faster-whisper.
+            use_onnxruntime (bool): Whether to export wav2vec2 CTC models to ONNX and run them on onnxruntime's CPU execution provider, threads are set with `model_onnx_intra_op_threads` and `model_onnx_inter_op_threads`.
             model_sampling_rate (int): Rate of sampling supported by the model, usually 16000 Hz.
             chunk_size (int): size of chunks to divide the audio file into to decode, 16000 = 1 second, 30s is a decent value, does not apply for longform models like whisper.
             overlap_size (int): how much of the chunks to overlap, usually around 50% of chunk size.
+            max_batch_samples (int): Memory budget in audio samples for a single forward pass over the chunks of one file, 0 runs all chunks at once.
+            prefetch_workers (int): Number of background workers reading and decoding upcoming files, 0 disables prefetching.
+            prefetch_depth (int): Maximum number of files decoded ahead of inference, caps the memory used by prefetching.
+            prefetch_processes (bool): Decode in a process pool instead of a thread pool.
+            cache (bool): Transcribe identical audio only once, the result is written for every file (default True).
+            cache_memory_mb (float): Size of the in-memory result cache (default 256MB).
+            cache_db (Optional[str]): Path of an SQLite database keeping results across jobs, e.g. re-uploaded files.
+            resume (bool): Skip files recorded as completed in the manifest by an earlier run (default True).
+            incremental (bool): Also reprocess completed files whose contents changed since (default False).
+            manifest_path (Optional[str]): Path of the manifest of completed files, defaults to manifest.jsonl in the output folder.
+            output_format (str): "json" writes one file per batch, "jsonl", "parquet" or "arrow" append rows with input, transcription, segments, timing and model info to rolling files (default "json").
+            output_row_group_size (int): Rows per row group of parquet and arrow files (default 10000).
+            output_max_file_mb (float): Size after which jsonl, parquet and arrow files rotate (default 256MB).
+            shard_index (int): The shard of the files processed by this job, in [0, num_shards) (default 0).
+            num_shards (int): Number of jobs the files are split between by a stable hash of their path, each shard writes to its own subfolder of the output folder, see `merge_shards` (default 1).
+            num_workers (int): Number of workers transcribing batches in parallel on CPU, each using an equal share of the cores. Workers are processes forked after the model is loaded, sharing its weights copy-on-write, or threads sharing one faster-whisper model or onnxruntime session. Forked workers cannot be combined with `use_cuda` (default 1).
+            sort_by_length (bool): Batch files of similar duration together, read from the file headers, so that the padded batches of wav2vec2 and seamless models waste little compute. Results are keyed by input path (default False).
+            vad (str): Voice activity detection run on the decoded audio, only the detected speech is transcribed: "energy" or "silero", see `detect_speech`. faster-whisper uses its own silero VAD filter (default "" for none).
             **kwargs: Arbitrary keyword arguments for model and generation configurations.
         """
         self.model_class = model_class
@@ -169,10 +229,28 @@ class SpeechToTextBulk(SpeechToTextInference):
         self.batch_size = batch_size
         self.use_whisper_cpp = use_whisper_cpp
         self.use_faster_whisper = use_faster_whisper
+        self.use_onnxruntime = use_onnxruntime
         self.notification_email = notification_email
         self.model_sampling_rate = model_sampling_rate
         self.chunk_size = chunk_size
         self.overlap_size = overlap_size
+        self.max_batch_samples = max_batch_samples
+        if vad and vad not in VAD_METHODS:
+            raise ValueError(f"Unsupported VAD method: {vad}. Supported methods are {VAD_METHODS}.")
+        self.vad = vad
+        if num_workers > 1 and use_cuda and not (use_faster_whisper or use_onnxruntime):
+            # Forked workers cannot use the CUDA context of the job process
+            raise ValueError("num_workers > 1 transcribes with forked CPU workers, it cannot be used with use_cuda.")
+        self.cpu_threads = max(multiprocessing.cpu_count() // num_workers, 1) if num_workers > 1 else 0
+        self.cache = (
+            ResultCache(
+                max_memory_bytes=int(cache_memory_mb * 1024 * 1024),
+                store=SQLiteStore(cache_db) if cache_db else None,
+                sizeof=transcription_size,
+            )
+            if cache
+            else None
+        )
 
         if ":" in model_name:
             model_revision = model_name.split(":")[1]
@@ -192,13 +270,16 @@ class SpeechToTextBulk(SpeechToTextInference):
         self.model_args = model_args
 
         generation_args = {k.replace("generation_", ""): v for k, v in kwargs.items() if "generation_" in k}
+        if vad and use_faster_whisper:
+            generation_args.setdefault("vad_filter", True)
         self.generation_args = generation_args
 
         processor_args = {k.replace("processor_", ""): v for k, v in kwargs.items() if "processor_" in k}
         self.processor_args = processor_args
 
         dataset_path = self.input.input_folder
-        output_path = self.output.output_folder
+        output_path = shard_folder(self.output.output_folder, shard_index, num_shards)
+        os.makedirs(output_path, exist_ok=True)
 
         self.model, self.processor = self.load_models(
             model_name=self.model_name,
@@ -216,6 +297,9 @@ class SpeechToTextBulk(SpeechToTextInference):
             compile=self.compile,
             use_whisper_cpp=use_whisper_cpp,
             use_faster_whisper=use_faster_whisper,
+            use_onnxruntime=use_onnxruntime,
+            cpu_threads=self.cpu_threads,
+            num_workers=num_workers if use_faster_whisper else 1,
             **self.model_args,
         )
 
@@ -230,61 +314,499 @@ class SpeechToTextBulk(SpeechToTextInference):
                 audio_files.append(filepath)
             else:
                 audio_files.append(filename)
+        audio_files = sorted(audio_files)
+        audio_files = select_shard(audio_files, shard_index, num_shards, key=lambda f: os.path.relpath(f, dataset_path))
+
+        # Skip the files completed by earlier runs
+        self.manifest = Manifest(manifest_path or os.path.join(output_path, "manifest.jsonl"))
+        if resume:
+            total_files = len(audio_files)
+            audio_files = [
+                f
+                for f in audio_files
+                if not self.manifest.is_done(os.path.relpath(f, dataset_path), f, incremental=incremental)
+            ]
+            self.log.info(f"Skipping {total_files - len(audio_files)} of {total_files} files completed earlier.")
+
+        if sort_by_length:
+            audio_files = sort_by_duration(audio_files, num_workers=max(prefetch_workers, 1))
+
+        self.sink = (
+            create_sink(
+                output_format,
+                output_path,
+                schema=transcription_schema() if output_format != "jsonl" else None,
+                row_group_size=output_row_group_size,
+                max_file_bytes=int(output_max_file_mb * 1024 * 1024),
+            )
+            if output_format != "json"
+            else None
+        )
+
+        if num_workers > 1:
+            self._run_workers(audio_files, output_path, num_workers, prefetch_workers)
+            if self.sink is not None:
+                self._record_completed(self.sink.close())
+            self._done()
+            return
+
+        model_type = None if (self.use_whisper_cpp or self.use_faster_whisper) else self.model.config.model_type
+
+        # Decode upcoming files in the background while the model works on the current batch
+        prefetched = prefetch_audio(
+            audio_files,
+            model_type=model_type,
+            model_sampling_rate=model_sampling_rate,
+            decode=not self.use_faster_whisper,
+            num_workers=prefetch_workers,
+            queue_depth=max(prefetch_depth, self.batch_size),
+            use_processes=prefetch_processes,
+        )
 
         # process batchwise
-        for i in range(0, len(audio_files), self.batch_size):
-            batch = audio_files[i : i + self.batch_size]
-
-            results = []
-            for audio_file in batch:
-                # Load and preprocess audio
-                if not self.use_faster_whisper:
-                    audio_input, sampling_rate = decode_audio(
-                        audio_bytes=open(audio_file, "rb").read(),
-                        model_type=self.model.config.model_type,
-                        model_sampling_rate=model_sampling_rate,
-                    )
+        batch: List[Tuple[str, bytes, Any]] = []
+        batch_idx = 0
+        for item in prefetched:
+            batch.append(item)
+            if len(batch) < self.batch_size:
+                continue
+            self._process_batch(batch, batch_idx, output_path)
+            batch_idx += len(batch)
+            batch = []
+        if batch:
+            self._process_batch(batch, batch_idx, output_path)
+        if self.sink is not None:
+            self._record_completed(self.sink.close())
+        self._done()
+
+    def merge_shards(self, num_shards: int, **kwargs: Any) -> None:
+        """
+        Merges the outputs of a job run as `num_shards` shards into one result set in the output folder.
+
+        Args:
+            num_shards (int): The number of shards the job was split into.
+            **kwargs: Arbitrary keyword arguments.
+        """
+        result = merge_shards(self.output.output_folder, num_shards)
+        if result["missing_shards"]:
+            self.log.warning(f"Shards without output: {result['missing_shards']}")
+        self.log.info(f"Merged {num_shards} shards into {result['merged']}.")
+        self._done()
+
+    def _run_workers(self, audio_files: List[str], output_path: str, num_workers: int, prefetch_workers: int) -> None:
+        """
+        Transcribes the audio files with a pool of workers pulling batches from a shared queue. The results are
+        written by the calling process, through the output sink and the manifest.
+
+        Workers are processes forked after the model was loaded, so that they share its weights copy-on-write.
+        faster-whisper models cannot be forked once loaded, its workers are threads calling one model loaded with
+        `num_workers` replicas that share the weights. onnxruntime sessions cannot be forked either, their workers are
+        threads calling one thread-safe session.
+
+        Args:
+            audio_files (List[str]): Paths of the audio files.
+            output_path (str): Path to the output folder.
+            num_workers (int): Number of workers.
+            prefetch_workers (int): Number of threads reading and decoding the files of a batch in each worker.
+
+        Raises:
+            ValueError: If workers would be forked after CUDA was initialized.
+            RuntimeError: If a worker fails or exits before the job is done.
+        """
+        use_processes = not (self.use_faster_whisper or self.use_onnxruntime)
+        if use_processes and torch.cuda.is_initialized():
+            # e.g. a `device_map` placing the model on a GPU, a forked child cannot use the parent's CUDA context
+            raise ValueError("Cannot fork CPU workers after CUDA was initialized, use num_workers=1 on GPUs.")
+        context = multiprocessing.get_context("fork")
+        if use_processes:
+            tasks: Any = context.Queue()
+            done: Any = context.Queue()
+            # SQLite connections must not cross a fork, every worker opens its own
+            if self.cache is not None and isinstance(self.cache.store, SQLiteStore):
+                self.cache.store.close()
+        else:
+            tasks, done = queue.Queue(), queue.Queue()
+
+        batches = [(i, audio_files[i : i + self.batch_size]) for i in range(0, len(audio_files), self.batch_size)]
+        for batch in batches:
+            tasks.put(batch)
+        for _ in range(num_workers):
+            tasks.put(None)
 
-                if self.use_whisper_cpp:
-                    transcription = self.model.transcribe(audio_input, num_proc=multiprocessing.cpu_count())
-                elif self.use_faster_whisper:
-                    transcription = self.process_faster_whisper(
-                        open(audio_file, "rb").read(), model_sampling_rate, chunk_size, generation_args
+        workers = [
+            (context.Process if use_processes else threading.Thread)(
+                target=self._worker_loop, args=(i, tasks, done, use_processes, prefetch_workers), daemon=True
+            )
+            for i in range(num_workers)
+        ]
+        for worker in workers:
+            worker.start()
+        self.log.info(f"Transcribing {len(audio_files)} files with {num_workers} workers.")
+
+        failed = True
+        try:
+            remaining = len(batches)
+            while remaining:
+                try:
+                    kind, index, payload = done.get(timeout=1.0)
+                except queue.Empty:
+                    if not any(worker.is_alive() for worker in workers):
+                        raise RuntimeError("Transcription workers exited before the job was done.")
+                    continue
+                if kind == "error":
+                    raise RuntimeError(f"Transcription worker {index} failed:\n{payload}")
+                self._save_batch(payload, index, output_path)
+                remaining -= 1
+            failed = False
+        finally:
+            if failed:
+                # Stop the remaining workers
+                while True:
+                    try:
+                        tasks.get_nowait()
+                    except queue.Empty:
+                        break
+                for worker in workers:
+                    if use_processes and worker.is_alive():
+                        worker.terminate()  # type: ignore
+            for worker in workers:
+                worker.join()
+
+    def _worker_loop(self, worker_idx: int, tasks: Any, done: Any, use_processes: bool, prefetch_workers: int) -> None:
+        """
+        Transcribes batches of audio files from the task queue until it yields None.
+
+        Args:
+            worker_idx (int): Index of the worker.
+            tasks (Any): Queue of (batch index, file paths) tuples.
+            done (Any): Queue receiving ("batch", batch index, transcribed batch) or ("error", worker index, traceback).
+            use_processes (bool): Whether the worker is a forked process.
+            prefetch_workers (int): Number of threads reading and decoding the files of a batch.
+        """
+        try:
+            if use_processes:
+                torch.set_num_threads(self.cpu_threads)
+                if self.cache is not None and isinstance(self.cache.store, SQLiteStore):
+                    self.cache.store = SQLiteStore(self.cache.store.path, self.cache.store.max_bytes)
+
+            model_type = None if (self.use_whisper_cpp or self.use_faster_whisper) else self.model.config.model_type
+            while True:
+                task = tasks.get()
+                if task is None:
+                    break
+                batch_idx, audio_files = task
+                batch = list(
+                    prefetch_audio(
+                        audio_files,
+                        model_type=model_type,
+                        model_sampling_rate=self.model_sampling_rate,
+                        decode=not self.use_faster_whisper,
+                        num_workers=prefetch_workers,
+                        queue_depth=len(audio_files),
                     )
-                elif self.model.config.model_type == "whisper":
-                    transcriptions = self.process_whisper(
+                )
+                done.put(("batch", batch_idx, self._transcribe_prefetched(batch)))
+        except Exception:
+            done.put(("error", worker_idx, traceback.format_exc()))
+
+    def _process_batch(self, batch: List[Tuple[str, bytes, Any]], batch_idx: int, output_path: str) -> None:
+        """
+        Transcribes a batch of prefetched audio files and saves the results.
+
+        Args:
+            batch (List[Tuple[str, bytes, Any]]): Tuples of file path, raw bytes and decoded audio.
+            batch_idx (int): Index of the first file of the batch (for naming files).
+            output_path (str): Path to the output folder.
+        """
+        self._save_batch(self._transcribe_prefetched(batch), batch_idx, output_path)
+
+    def _transcribe_prefetched(self, batch: List[Tuple[str, bytes, Any]]) -> Dict[str, Any]:
+        """
+        Transcribes a batch of prefetched audio files.
+
+        Args:
+            batch (List[Tuple[str, bytes, Any]]): Tuples of file path, raw bytes and decoded audio.
+
+        Returns:
+            Dict[str, Any]: The file paths, their manifest entries, and either the transcriptions or the output rows
+                of the sink.
+        """
+        filenames = [audio_file for audio_file, _, _ in batch]
+        start = time.perf_counter()
+        if self.cache is not None:
+            results = self._transcribe_batch_cached(batch)
+        else:
+            results = self._transcribe_batch(
+                audio_bytes=[audio_bytes for _, audio_bytes, _ in batch],
+                audio_inputs=[audio_input for _, _, audio_input in batch],
+            )
+        inference_time = (time.perf_counter() - start) / len(batch)
+
+        dataset_path = self.input.input_folder
+        entries = [
+            Manifest.entry(os.path.relpath(audio_file, dataset_path), audio_file, None, audio_bytes)
+            for audio_file, audio_bytes, _ in batch
+        ]
+
+        if self.sink is None:
+            return {"filenames": filenames, "entries": entries, "transcriptions": results}
+
+        rows = [
+            self._transcription_row(audio_file, audio_input, result, inference_time)
+            for (audio_file, _, audio_input), result in zip(batch, results)
+        ]
+        return {"filenames": filenames, "entries": entries, "rows": rows}
+
+    def _save_batch(self, transcribed: Dict[str, Any], batch_idx: int, output_path: str) -> None:
+        """
+        Saves a transcribed batch and records its files in the manifest once their results are written.
+
+        Args:
+            transcribed (Dict[str, Any]): The transcribed batch, see `_transcribe_prefetched`.
+            batch_idx (int): Index of the first file of the batch (for naming files).
+            output_path (str): Path to the output folder.
+        """
+        if self.sink is None:
+            output_file = self._save_transcriptions(
+                transcriptions=transcribed["transcriptions"],
+                filenames=transcribed["filenames"],
+                chunk_idx=batch_idx,
+                output_path=output_path,
+            )
+            self._record_completed([(entry, output_file) for entry in transcribed["entries"]])
+            return
+
+        self._record_completed(self.sink.write(transcribed["rows"], keys=transcribed["entries"]))
+
+    def _transcription_row(
+        self, audio_file: str, audio_input: Any, result: Any, inference_time: float
+    ) -> Dict[str, Any]:
+        """
+        Builds the output row of a transcribed file, see `transcription_schema`.
+
+        Args:
+            audio_file (str): The path of the audio file.
+            audio_input (Any): The decoded audio, None for faster-whisper.
+            result (Any): The transcription result of the backend.
+            inference_time (float): Inference time attributed to the file, in seconds.
+
+        Returns:
+            Dict[str, Any]: The row.
+        """
+        transcription, segments = normalize_transcription(result)
+        if audio_input is not None:
+            audio_duration: Optional[float] = audio_input.shape[-1] / self.model_sampling_rate
+        elif isinstance(result, dict) and "transcription_info" in result:
+            audio_duration = result["transcription_info"].get("duration")
+        else:
+            audio_duration = None
+
+        if self.use_whisper_cpp:
+            backend = "whisper.cpp"
+        elif self.use_faster_whisper:
+            backend = "faster-whisper"
+        else:
+            backend = "onnxruntime" if self.use_onnxruntime else "hf"
+        return {
+            "input": audio_file,
+            "transcription": transcription,
+            "segments": segments,
+            "audio_duration": audio_duration,
+            "inference_time": inference_time,
+            "model": self.model_name,
+            "model_revision": self.model_revision,
+            "backend": backend,
+        }
+
+    def _record_completed(self, completed: List[Tuple[Dict[str, Any], str]]) -> None:
+        """
+        Records files whose results are safely written in the manifest.
+
+        Args:
+            completed (List[Tuple[Dict[str, Any], str]]): The manifest entries of the files, with their output file.
+        """
+        if self.manifest is None or not completed:
+            return
+        for entry, output_file in completed:
+            entry["output"] = output_file
+        self.manifest.record([entry for entry, _ in completed])
+
+    def _transcribe_batch_cached(self, batch: List[Tuple[str, bytes, Any]]) -> List[Any]:
+        """
+        Transcribes a batch of prefetched audio files, looking up each file in the result cache first. Files with
+        identical audio are transcribed once.
+
+        Args:
+            batch (List[Tuple[str, bytes, Any]]): Tuples of file path, raw bytes and decoded audio.
+
+        Returns:
+            List[Any]: The transcription results, in the same order as the batch.
+        """
+        # faster-whisper decodes files itself, its files are keyed by their raw bytes
+        keys = [
+            self.transcription_cache_key(
+                audio_input if audio_input is not None else audio_bytes,
+                self.model_sampling_rate,
+                self.processor_args,
+                self.chunk_size,
+                self.overlap_size,
+                self.generation_args,
+                vad=self.vad,
+            )
+            for _, audio_bytes, audio_input in batch
+        ]
+
+        results: Dict[str, Any] = {}
+        misses: Dict[str, Tuple[bytes, Any]] = {}
+        for key, (_, audio_bytes, audio_input) in zip(keys, batch):
+            if key in results or key in misses:
+                continue
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                results[key] = cached
+            else:
+                misses[key] = (audio_bytes, audio_input)
+
+        if misses:
+            transcriptions = self._transcribe_batch(
+                audio_bytes=[audio_bytes for audio_bytes, _ in misses.values()],
+                audio_inputs=[audio_input for _, audio_input in misses.values()],
+            )
+            for key, transcription in zip(misses, transcriptions):
+                results[key] = transcription
+                if self.cache is not None:
+                    self.cache.put(key, transcription)
+
+        return [results[key] for key in keys]
+
+    def _transcribe_batch(self, audio_bytes: List[bytes], audio_inputs: List[Any]) -> List[Any]:
+        """
+        Transcribes a batch of audio files. Whisper, seamless and (unchunked) wav2vec2 models run the whole batch
+        through a single padded forward / `generate` call, other backends transcribe file by file. With voice
+        activity detection only the speech regions of the files are transcribed.
+
+        Args:
+            audio_bytes (List[bytes]): Raw contents of the audio files in the batch.
+            audio_inputs (List[Any]): Decoded audio of the files in the batch, unused by faster-whisper.
+
+        Returns:
+            List[Any]: The transcription results, in the same order as the inputs.
+        """
+        if self.use_faster_whisper:
+            return [
+                self.process_faster_whisper(_bytes, self.model_sampling_rate, self.chunk_size, self.generation_args)
+                for _bytes in audio_bytes
+            ]
+        if self.vad:
+            return self._transcribe_speech_regions(audio_inputs)
+        return self._transcribe_audio(audio_inputs)
+
+    def _transcribe_speech_regions(self, audio_inputs: List[Any]) -> List[Any]:
+        """
+        Transcribes only the speech of a batch of audio files. Every file is cut into speech regions, the regions
+        of all files are transcribed in batches of similar length, and their timestamps mapped back to the file.
+
+        Args:
+            audio_inputs (List[Any]): Decoded audio of the files in the batch.
+
+        Returns:
+            List[Any]: The transcription results, in the same order as the inputs.
+        """
+        regions = [
+            detect_speech(audio_input, self.model_sampling_rate, method=self.vad) for audio_input in audio_inputs
+        ]
+        clips = [
+            (i, j, audio_input[..., start:end])
+            for i, (audio_input, file_regions) in enumerate(zip(audio_inputs, regions))
+            for j, (start, end) in enumerate(file_regions)
+        ]
+        total = sum(audio_input.shape[-1] for audio_input in audio_inputs)
+        speech = sum(clip.shape[-1] for _, _, clip in clips)
+        self.log.debug(f"Transcribing {speech / max(total, 1):.0%} of the audio, {len(clips)} speech regions.")
+
+        clips.sort(key=lambda clip: -clip[2].shape[-1])
+        clip_results: Dict[Tuple[int, int], Any] = {}
+        for k in range(0, len(clips), self.batch_size):
+            batch = clips[k : k + self.batch_size]
+            for (i, j, _), result in zip(batch, self._transcribe_audio([clip for _, _, clip in batch])):
+                clip_results[(i, j)] = result
+
+        return [
+            merge_region_results(
+                [clip_results[(i, j)] for j in range(len(file_regions))], file_regions, self.model_sampling_rate
+            )
+            for i, file_regions in enumerate(regions)
+        ]
+
+    def _transcribe_audio(self, audio_inputs: List[Any]) -> List[Any]:
+        """
+        Transcribes a batch of decoded audio with the whisper.cpp or transformers backends.
+
+        Args:
+            audio_inputs (List[Any]): Decoded audio of the files in the batch.
+
+        Returns:
+            List[Any]: The transcription results, in the same order as the inputs.
+        """
+        model_type = None if self.use_whisper_cpp else self.model.config.model_type
+        if self.use_whisper_cpp:
+            return [
+                self.model.transcribe(audio_input, num_proc=self.cpu_threads or multiprocessing.cpu_count())
+                for audio_input in audio_inputs
+            ]
+        elif model_type == "whisper":
+            if self.chunk_size > 0:
+                return [
+                    self.process_whisper(
                         audio_input,
-                        model_sampling_rate,
-                        processor_args,
-                        chunk_size,
-                        overlap_size,
-                        generation_args,
+                        self.model_sampling_rate,
+                        self.processor_args,
+                        self.chunk_size,
+                        self.overlap_size,
+                        self.generation_args,
                     )
-                    results.append(transcriptions)
-                elif self.model.config.model_type == "seamless_m4t_v2":
-                    transcriptions = self.process_seamless(
+                    for audio_input in audio_inputs
+                ]
+            return self.process_whisper_batch(
+                audio_inputs, self.model_sampling_rate, self.processor_args, self.generation_args
+            )
+        elif model_type == "seamless_m4t_v2":
+            if self.chunk_size > 0:
+                return [
+                    self.process_seamless(
                         audio_input,
-                        model_sampling_rate,
-                        processor_args,
-                        chunk_size,
-                        overlap_size,
-                        generation_args,
+                        self.model_sampling_rate,
+                        self.processor_args,
+                        self.chunk_size,
+                        self.overlap_size,
+                        self.generation_args,
+                        max_batch_samples=self.max_batch_samples,
                     )
-                    results.append(transcriptions)
-                elif self.model.config.model_type == "wav2vec2":
-                    transcriptions = self.process_wav2vec2(
+                    for audio_input in audio_inputs
+                ]
+            return self.process_seamless_batch(
+                audio_inputs, self.model_sampling_rate, self.processor_args, self.generation_args
+            )
+        elif model_type == "wav2vec2":
+            if self.chunk_size > 0:
+                return [
+                    self.process_wav2vec2(
                         audio_input,
-                        model_sampling_rate,
-                        processor_args,
-                        chunk_size,
-                        overlap_size,
+                        self.model_sampling_rate,
+                        self.processor_args,
+                        self.chunk_size,
+                        self.overlap_size,
+                        max_batch_samples=self.max_batch_samples,
                     )
-                    results.append(transcriptions)
+                    for audio_input in audio_inputs
+                ]
+            return self.process_wav2vec2_batch(audio_inputs, self.model_sampling_rate, self.processor_args)
 
-            self._save_transcriptions(transcriptions=results, filenames=batch, chunk_idx=i, output_path=output_path)
-        self._done()
+        raise ValueError(f"Unsupported model type for transcription: {model_type}")
 
-    def _save_transcriptions(self, filenames: List[str], transcriptions: List[str], chunk_idx: int, output_path: str):
+    def _save_transcriptions(
+        self, filenames: List[str], transcriptions: List[str], chunk_idx: int, output_path: str
+    ) -> str:
         """
         Saves the transcriptions to the specified output folder.
 
@@ -293,14 +815,16 @@ class SpeechToTextBulk(SpeechToTextInference):
             transcriptions (List[str]): List of transcribed texts.
             chunk_idx (int): Index of the current batch (for naming files).
             output_path (str): Path to the output folder.
+
+        Returns:
+            str: The path of the written file.
         """
         data_to_save = [
             {"input": filename, "prediction": transcription}
             for filename, transcription in zip(filenames, transcriptions)
         ]
 
-        with open(
-            os.path.join(output_path, f"predictions-{chunk_idx}-{str(uuid.uuid4())}.json"),
-            "w",
-        ) as f:
+        output_file = os.path.join(output_path, f"predictions-{chunk_idx}-{str(uuid.uuid4())}.json")
+        with open(output_file, "w") as f:
             json.dump(data_to_save, f)
+        return output_file
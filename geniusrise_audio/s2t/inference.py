@@ -14,14 +14,19 @@
 # limitations under the License.
 
 from io import BytesIO
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, List
 
+import numpy as np
 import torch
+from torch.nn.utils.rnn import pad_sequence
 from geniusrise import BatchInput, BatchOutput, State
-from transformers import AutoModelForCTC, AutoProcessor
 
 from geniusrise_audio.base import AudioBulk
-from geniusrise_audio.s2t.util import chunk_audio, whisper_alignment_heads
+from geniusrise_audio.base.cache import cache_key
+from geniusrise_audio.s2t.util import chunk_audio_strided, chunk_batches, whisper_alignment_heads
+
+if TYPE_CHECKING:
+    from transformers import AutoModelForCTC, AutoProcessor
 
 
 class _SpeechToTextInference:
@@ -36,12 +41,58 @@ class _SpeechToTextInference:
         device_map (str | Dict | None): Device mapping for model execution.
     """
 
-    model: AutoModelForCTC
-    processor: AutoProcessor
+    model: "AutoModelForCTC"
+    processor: "AutoProcessor"
+
+    def transcription_cache_key(
+        self,
+        audio: torch.Tensor | bytes,
+        model_sampling_rate: int,
+        processor_args: Dict[str, Any],
+        chunk_size: int,
+        overlap_size: int,
+        generate_args: Dict[str, Any],
+        vad: str = "",
+    ) -> str:
+        """
+        Builds the result cache key of a transcription from the audio, the model and the arguments that affect the
+        result.
+
+        Args:
+            audio (torch.Tensor | bytes): The decoded audio, or the raw file for backends that decode it themselves.
+            model_sampling_rate (int): The sampling rate of the model.
+            processor_args (Dict[str, Any]): Arguments for the audio processor.
+            chunk_size (int): The size of audio chunks to process.
+            overlap_size (int): The size of overlap between audio chunks.
+            generate_args (Dict[str, Any]): Additional arguments for transcription.
+            vad (str): The voice activity detection method the audio is segmented with, if any.
+
+        Returns:
+            str: The cache key.
+        """
+        pcm = audio if isinstance(audio, bytes) else audio.detach().cpu().contiguous().numpy().tobytes()
+        if self.use_whisper_cpp:
+            backend = "whisper.cpp"
+        elif self.use_faster_whisper:
+            backend = "faster-whisper"
+        else:
+            backend = "onnxruntime" if self.use_onnxruntime else "hf"
+        return cache_key(
+            self.model_name,
+            self.model_revision,
+            backend,
+            model_sampling_rate,
+            processor_args,
+            chunk_size,
+            overlap_size,
+            generate_args,
+            *([{"vad": vad}] if vad else []),
+            pcm,
+        )
 
     def process_faster_whisper(
         self,
-        audio_input: bytes,
+        audio_input: bytes | np.ndarray,
         model_sampling_rate: int,
         chunk_size: int,
         generate_args: Dict[str, Any],
@@ -50,7 +101,7 @@ class _SpeechToTextInference:
         Processes audio input with the faster-whisper model.
 
         Args:
-            audio_input (bytes): The audio input for transcription.
+            audio_input (bytes | np.ndarray): The audio file, or decoded mono float32 audio at 16kHz.
             model_sampling_rate (int): The sampling rate of the model.
             chunk_size (int): The size of audio chunks to process.
             generate_args (Dict[str, Any]): Additional arguments for transcription.
@@ -59,7 +110,7 @@ class _SpeechToTextInference:
             Dict[str, Any]: A dictionary containing the transcription results.
         """
         transcribed_segments, transcription_info = self.model.transcribe(
-            audio=BytesIO(audio_input),
+            audio=audio_input if isinstance(audio_input, np.ndarray) else BytesIO(audio_input),
             beam_size=generate_args.get("beam_size", 5),
             best_of=generate_args.get("best_of", 5),
             patience=generate_args.get("patience", 1.0),
@@ -113,8 +164,10 @@ class _SpeechToTextInference:
         Returns:
             Dict[str, Any]: A dictionary containing the transcription results.
         """
-        alignment_heads = [v for k, v in whisper_alignment_heads.items() if k in self.model_name][0]
-        self.model.generation_config.alignment_heads = alignment_heads
+        # Local and fine-tuned models keep the alignment heads of their config
+        alignment_heads = next((v for k, v in whisper_alignment_heads.items() if k in self.model_name), None)
+        if alignment_heads is not None:
+            self.model.generation_config.alignment_heads = alignment_heads
 
         # Preprocess and transcribe
         input_values = self.processor(
@@ -156,8 +209,91 @@ class _SpeechToTextInference:
             ]
             return {"transcription": transcription, "segments": timestamps}
 
+    def process_whisper_batch(
+        self,
+        audio_inputs: List[torch.Tensor],
+        model_sampling_rate: int,
+        processor_args: Dict[str, Any],
+        generate_args: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        """
+        Processes a batch of audio inputs with the Whisper model in a single `generate` call.
+
+        Args:
+            audio_inputs (List[torch.Tensor]): The decoded audio inputs for transcription.
+            model_sampling_rate (int): The sampling rate of the model.
+            processor_args (Dict[str, Any]): Arguments for the audio processor.
+            generate_args (Dict[str, Any]): Additional arguments for transcription.
+
+        Returns:
+            List[Dict[str, Any]]: One dictionary of transcription results per audio input.
+        """
+        # Local and fine-tuned models keep the alignment heads of their config
+        alignment_heads = next((v for k, v in whisper_alignment_heads.items() if k in self.model_name), None)
+        if alignment_heads is not None:
+            self.model.generation_config.alignment_heads = alignment_heads
+
+        audios = [audio_input.squeeze(0).cpu().numpy() for audio_input in audio_inputs]
+
+        # Pad to the longest input so that long-form audio is not truncated
+        input_values = self.processor(
+            audios,
+            return_tensors="pt",
+            sampling_rate=model_sampling_rate,
+            truncation=False,
+            padding="longest",
+            return_attention_mask=True,
+            do_normalize=True,
+            **processor_args,
+        )
+        # The whole batch is short-form, whisper expects exactly 30s of features
+        if input_values.input_features.shape[-1] < 3000:
+            input_values = self.processor(
+                audios,
+                return_tensors="pt",
+                sampling_rate=model_sampling_rate,
+                return_attention_mask=True,
+                do_normalize=True,
+                **processor_args,
+            )
+
+        if self.use_cuda:
+            input_values = input_values.to(self.device_map)
+
+        with torch.no_grad():
+            logits = self.model.generate(**input_values, **generate_args)
+
+        # Decode the model output
+        if type(logits) is torch.Tensor:
+            transcriptions = self.processor.batch_decode(logits, skip_special_tokens=True)
+            return [{"transcription": transcription, "segments": []} for transcription in transcriptions]
+
+        transcriptions = self.processor.batch_decode(logits["sequences"], skip_special_tokens=True)
+        results = []
+        for idx, transcription in enumerate(transcriptions):
+            item_segments = logits["segments"][idx] if "segments" in logits else []
+            segments = self.processor.batch_decode([x["tokens"] for x in item_segments], skip_special_tokens=True)
+            timestamps = [
+                {
+                    "tokens": t,
+                    "start": l["start"].cpu().numpy().tolist(),
+                    "end": l["end"].cpu().numpy().tolist(),
+                }
+                for t, l in zip(segments, item_segments)
+            ]
+            # Same layout as `process_whisper`, the transcription is a list of one sequence
+            results.append({"transcription": [transcription], "segments": timestamps})
+        return results
+
     def process_seamless(
-        self, audio_input, model_sampling_rate, processor_args, chunk_size, overlap_size, generate_args
+        self,
+        audio_input,
+        model_sampling_rate,
+        processor_args,
+        chunk_size,
+        overlap_size,
+        generate_args,
+        max_batch_samples: int = 0,
     ):
         """
         Processes audio input with the Seamless model.
@@ -169,20 +305,25 @@ class _SpeechToTextInference:
             chunk_size (int): The size of audio chunks to process.
             overlap_size (int): The size of overlap between audio chunks.
             generate_args (Dict[str, Any]): Additional arguments for transcription.
+            max_batch_samples (int): Memory budget of a single `generate` call in audio samples, chunks are batched up
+                to this budget. 0 runs all chunks in one call.
 
         Returns:
             Dict[str, Any]: A dictionary containing the transcription results.
         """
-        audio_input = audio_input.squeeze(0)
+        audio_input = torch.as_tensor(audio_input).squeeze(0)
 
-        # Split audio input into chunks with overlap
-        chunks = chunk_audio(audio_input, chunk_size, overlap_size, overlap_size) if chunk_size > 0 else [audio_input]
+        # Split audio input into chunks with overlap, chunks are transcribed in batches
+        if chunk_size > 0:
+            chunks, strides = chunk_audio_strided(audio_input, chunk_size, overlap_size, overlap_size)
+        else:
+            chunks, strides = audio_input.unsqueeze(0), [(0, audio_input.shape[-1], 0, 0)]
 
-        segments = []
-        for chunk_id, chunk in enumerate(chunks):
+        chunk_transcriptions: List[str] = []
+        for batch in chunk_batches(chunks, max_batch_samples):
             # Preprocess and transcribe
             input_values = self.processor(
-                audios=chunk,
+                audios=batch.cpu().numpy(),
                 return_tensors="pt",
                 sampling_rate=model_sampling_rate,
                 do_normalize=True,
@@ -193,82 +334,201 @@ class _SpeechToTextInference:
                 input_values = input_values.to(self.device_map)
 
             # TODO: make generate generic
-            logits = self.model.generate(**input_values, **generate_args)[0]
+            with torch.no_grad():
+                outputs = self.model.generate(**input_values, **generate_args)
+            sequences = outputs if type(outputs) is torch.Tensor else outputs[0]
 
             # Decode the model output
-            _transcription = self.processor.batch_decode(logits, skip_special_tokens=True)
-            segments.append(
-                {
-                    "tokens": " ".join([x.strip() for x in _transcription]).strip(),
-                    "start": chunk_id * overlap_size,
-                    "end": (chunk_id + 1) * overlap_size,
-                }
-            )
+            chunk_transcriptions.extend(self.processor.batch_decode(sequences, skip_special_tokens=True))
+
+        segments = [
+            {
+                "tokens": _transcription.strip(),
+                "start": start / model_sampling_rate,
+                "end": end / model_sampling_rate,
+            }
+            for _transcription, (start, end, _, _) in zip(chunk_transcriptions, strides)
+        ]
 
         transcription = " ".join([s["tokens"].strip() for s in segments])
         return {"transcription": transcription, "segments": segments}
 
-    def process_wav2vec2(self, audio_input, model_sampling_rate, processor_args, chunk_size, overlap_size):
+    def process_seamless_batch(
+        self,
+        audio_inputs: List[torch.Tensor],
+        model_sampling_rate: int,
+        processor_args: Dict[str, Any],
+        generate_args: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        """
+        Processes a batch of unchunked audio inputs with the Seamless model in a single `generate` call.
+
+        Args:
+            audio_inputs (List[torch.Tensor]): The decoded audio inputs for transcription.
+            model_sampling_rate (int): The sampling rate of the model.
+            processor_args (Dict[str, Any]): Arguments for the audio processor.
+            generate_args (Dict[str, Any]): Additional arguments for transcription.
+
+        Returns:
+            List[Dict[str, Any]]: One dictionary of transcription results per audio input.
+        """
+        audios = [audio_input.squeeze(0).cpu().numpy() for audio_input in audio_inputs]
+
+        input_values = self.processor(
+            audios=audios,
+            return_tensors="pt",
+            sampling_rate=model_sampling_rate,
+            padding=True,
+            do_normalize=True,
+            **processor_args,
+        )
+
+        if self.use_cuda:
+            input_values = input_values.to(self.device_map)
+
+        with torch.no_grad():
+            outputs = self.model.generate(**input_values, **generate_args)
+        sequences = outputs if type(outputs) is torch.Tensor else outputs[0]
+
+        transcriptions = self.processor.batch_decode(sequences, skip_special_tokens=True)
+        return [
+            {
+                "transcription": transcription.strip(),
+                "segments": [{"tokens": transcription.strip(), "start": 0.0, "end": len(audio) / model_sampling_rate}],
+            }
+            for transcription, audio in zip(transcriptions, audios)
+        ]
+
+    def process_wav2vec2(
+        self,
+        audio_input,
+        model_sampling_rate,
+        processor_args,
+        chunk_size,
+        overlap_size,
+        max_batch_samples: int = 0,
+    ):
         """
         Processes audio input with the Wav2Vec2 model.
 
+        Long inputs are split into overlapping chunks which run through the model in batches. The logit frames that
+        belong to the overlap are dropped and the remaining logits of all chunks are concatenated before decoding,
+        so words on chunk boundaries are neither cut nor duplicated.
+
         Args:
             audio_input (Any): The audio input for transcription.
             model_sampling_rate (int): The sampling rate of the model.
             processor_args (Dict[str, Any]): Arguments for the audio processor.
             chunk_size (int): The size of audio chunks to process.
             overlap_size (int): The size of overlap between audio chunks.
+            max_batch_samples (int): Memory budget of a single forward pass in audio samples, chunks are batched up
+                to this budget. 0 runs all chunks in one forward pass.
 
         Returns:
             Dict[str, Any]: A dictionary containing the transcription results.
         """
         # TensorFloat32 tensor cores for float32 matrix multiplication availabl
         torch.set_float32_matmul_precision("high")
-        audio_input = audio_input.squeeze(0)
+        audio_input = torch.as_tensor(audio_input).squeeze(0)
 
         # Split audio input into chunks with overlap
-        chunks = chunk_audio(audio_input, chunk_size, overlap_size, overlap_size) if chunk_size > 0 else [audio_input]
+        if chunk_size > 0:
+            chunks, strides = chunk_audio_strided(audio_input, chunk_size, overlap_size, overlap_size)
+        else:
+            chunks, strides = audio_input.unsqueeze(0), [(0, audio_input.shape[-1], 0, 0)]
+
+        # Keep only the logit frames of each chunk that are not part of the overlap
+        chunk_ids: List[torch.Tensor] = []
+        offset = 0
+        for batch in chunk_batches(chunks, max_batch_samples):
+            logits = self._wav2vec2_logits(batch.cpu().numpy(), model_sampling_rate, processor_args)
+            ratio = logits.shape[1] / batch.shape[-1]
+            for row, (_, _, left, right) in zip(logits, strides[offset : offset + len(batch)]):
+                frames = row[int(round(left * ratio)) : row.shape[0] - int(round(right * ratio))]
+                chunk_ids.append(torch.argmax(frames, dim=-1))
+            offset += len(batch)
+
+        # Decode the stitched ids in one go, and each chunk's ids for the segments
+        transcription = self.processor.batch_decode(torch.cat(chunk_ids).unsqueeze(0), skip_special_tokens=True)[0]
+        padded_ids = pad_sequence(chunk_ids, batch_first=True, padding_value=self.model.config.pad_token_id)
+        chunk_transcriptions = self.processor.batch_decode(padded_ids, skip_special_tokens=True)
+        segments = [
+            {
+                "tokens": chunk_transcription,
+                "start": start / model_sampling_rate,
+                "end": end / model_sampling_rate,
+            }
+            for chunk_transcription, (start, end, _, _) in zip(chunk_transcriptions, strides)
+        ]
+
+        return {"transcription": transcription.strip(), "segments": segments}
+
+    def process_wav2vec2_batch(
+        self,
+        audio_inputs: List[torch.Tensor],
+        model_sampling_rate: int,
+        processor_args: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        """
+        Processes a batch of unchunked audio inputs with the Wav2Vec2 model in a single forward pass.
 
-        segments = []
-        for chunk_id, chunk in enumerate(chunks):
-            processed = self.processor(
-                chunk,
-                return_tensors="pt",
-                sampling_rate=model_sampling_rate,
-                truncation=False,
-                padding="longest",
-                do_normalize=True,
-                **processor_args,
-            )
+        Args:
+            audio_inputs (List[torch.Tensor]): The decoded audio inputs for transcription.
+            model_sampling_rate (int): The sampling rate of the model.
+            processor_args (Dict[str, Any]): Arguments for the audio processor.
 
-            if self.use_cuda:
-                input_values = processed.input_values.to(self.device_map)
-                if hasattr(processed, "attention_mask"):
-                    attention_mask = processed.attention_mask.to(self.device_map)
-            else:
-                input_values = processed.input_values
-                if hasattr(processed, "attention_mask"):
-                    attention_mask = processed.attention_mask
-
-            if self.model.config.feat_extract_norm == "layer":
-                logits = self.model(input_values, attention_mask=attention_mask).logits
-            else:
-                logits = self.model(input_values).logits
-
-            predicted_ids = torch.argmax(logits, dim=-1)
-
-            # Decode each chunk
-            chunk_transcription = self.processor.batch_decode(predicted_ids, skip_special_tokens=True)
-            segments.append(
-                {
-                    "tokens": chunk_transcription[0],
-                    "start": chunk_id * overlap_size,
-                    "end": (chunk_id + 1) * overlap_size,
-                }
-            )
+        Returns:
+            List[Dict[str, Any]]: One dictionary of transcription results per audio input.
+        """
+        torch.set_float32_matmul_precision("high")
+        audios = [audio_input.squeeze(0).cpu().numpy() for audio_input in audio_inputs]
 
-        transcription = " ".join([s["tokens"].strip() for s in segments])
-        return {"transcription": transcription, "segments": segments}
+        logits = self._wav2vec2_logits(audios, model_sampling_rate, processor_args)
+
+        predicted_ids = torch.argmax(logits, dim=-1)
+        transcriptions = self.processor.batch_decode(predicted_ids, skip_special_tokens=True)
+        return [
+            {
+                "transcription": transcription.strip(),
+                "segments": [{"tokens": transcription.strip(), "start": 0.0, "end": len(audio) / model_sampling_rate}],
+            }
+            for transcription, audio in zip(transcriptions, audios)
+        ]
+
+    def _wav2vec2_logits(self, audios: Any, model_sampling_rate: int, processor_args: Dict[str, Any]) -> torch.Tensor:
+        """
+        Runs a batch of audio through the Wav2Vec2 model.
+
+        Args:
+            audios (Any): A 2-D array or a list of 1-D arrays of audio.
+            model_sampling_rate (int): The sampling rate of the model.
+            processor_args (Dict[str, Any]): Arguments for the audio processor.
+
+        Returns:
+            torch.Tensor: The CTC logits of shape (batch, frames, vocabulary).
+        """
+        processed = self.processor(
+            audios,
+            return_tensors="pt",
+            sampling_rate=model_sampling_rate,
+            truncation=False,
+            padding="longest",
+            do_normalize=True,
+            **processor_args,
+        )
+
+        input_values = processed.input_values
+        attention_mask = processed.get("attention_mask")
+        if self.use_cuda:
+            input_values = input_values.to(self.device_map)
+            if attention_mask is not None:
+                attention_mask = attention_mask.to(self.device_map)
+
+        with torch.no_grad():
+            # Models with group norm feature extractors are not trained with attention masks
+            if self.model.config.feat_extract_norm == "layer" and attention_mask is not None:
+                return self.model(input_values, attention_mask=attention_mask).logits.cpu()
+            return self.model(input_values).logits.cpu()
 
 
 class SpeechToTextInference(AudioBulk, _SpeechToTextInference):
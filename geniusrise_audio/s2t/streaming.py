@@ -0,0 +1,223 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Sessions that received no audio for this long are dropped
+STREAM_IDLE_TIMEOUT_S = 60.0
+
+# Number of committed words compared against the start of a hypothesis after the buffer was trimmed
+DEDUPE_MAX_WORDS = 5
+
+
+def pcm_to_float32(pcm: bytes, encoding: str = "pcm_s16le") -> np.ndarray:
+    """
+    Converts raw mono PCM frames to float32 samples.
+
+    Args:
+        pcm (bytes): The raw PCM frames.
+        encoding (str): Either "pcm_s16le" (16 bit signed little endian) or "pcm_f32le" (32 bit float little endian).
+
+    Returns:
+        np.ndarray: The samples in [-1, 1].
+    """
+    if encoding == "pcm_s16le":
+        return np.frombuffer(pcm[: len(pcm) - len(pcm) % 2], dtype="<i2").astype(np.float32) / 32768.0
+    elif encoding == "pcm_f32le":
+        return np.frombuffer(pcm[: len(pcm) - len(pcm) % 4], dtype="<f4").astype(np.float32)
+    raise ValueError(f"Unsupported PCM encoding: {encoding}. Supported encodings are ['pcm_s16le', 'pcm_f32le'].")
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def common_prefix(a: List[str], b: List[str]) -> List[str]:
+    """
+    Returns the longest common prefix of two word sequences, ignoring case and punctuation.
+
+    Args:
+        a (List[str]): The first sequence.
+        b (List[str]): The second sequence.
+
+    Returns:
+        List[str]: The common prefix, with the words as they appear in `b`.
+    """
+    length = 0
+    for x, y in zip(a, b):
+        if _normalize(x) != _normalize(y):
+            break
+        length += 1
+    return b[:length]
+
+
+class StreamingSession:
+    """
+    StreamingSession holds the rolling audio buffer and the transcript of one streaming client.
+
+    Every time enough new audio has arrived the whole buffer is transcribed again. Words are committed with the
+    local agreement policy: a word is final once two consecutive hypotheses agree on it and on everything before
+    it. The uncommitted tail of the latest hypothesis is the partial transcript.
+
+    The buffer is a sliding window, once it grows beyond `max_buffer_s` the latest hypothesis is committed and only
+    the last `overlap_s` seconds of audio are kept. Words of the next hypotheses that repeat the end of the
+    committed transcript are dropped.
+
+    Attributes:
+        session_id (str): The id of the session.
+        sampling_rate (int): The sampling rate of the buffered audio.
+        min_chunk_ms (float): Minimum amount of new audio before the buffer is transcribed again.
+        max_buffer_s (float): Maximum length of the buffer.
+        overlap_s (float): Audio kept when the buffer is trimmed.
+        params (Dict[str, Any]): The transcription arguments of the session.
+        lock (threading.Lock): Serializes the requests of the session.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        sampling_rate: int = 16_000,
+        min_chunk_ms: float = 500.0,
+        max_buffer_s: float = 15.0,
+        overlap_s: float = 1.0,
+        params: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Initializes an empty session.
+
+        Args:
+            session_id (str): The id of the session.
+            sampling_rate (int): The sampling rate of the buffered audio.
+            min_chunk_ms (float): Minimum amount of new audio before the buffer is transcribed again.
+            max_buffer_s (float): Maximum length of the buffer.
+            overlap_s (float): Audio kept when the buffer is trimmed.
+            params (Optional[Dict[str, Any]]): The transcription arguments of the session.
+        """
+        self.session_id = session_id
+        self.sampling_rate = sampling_rate
+        self.min_chunk_ms = min_chunk_ms
+        self.max_buffer_s = max_buffer_s
+        self.overlap_s = min(overlap_s, max_buffer_s)
+        self.params = params or {}
+        self.lock = threading.Lock()
+
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.pending_samples = 0
+        self.last_active = time.monotonic()
+
+        self.committed: List[str] = []
+        # Words of the current buffer that are committed, and the previous hypothesis of the buffer
+        self.buffer_committed: List[str] = []
+        self.previous: Optional[List[str]] = None
+        self.partial: List[str] = []
+        # Committed words whose audio may still be at the start of the buffer after it was trimmed
+        self.context: List[str] = []
+
+    def append(self, samples: np.ndarray) -> None:
+        """
+        Appends audio to the buffer.
+
+        Args:
+            samples (np.ndarray): Mono float32 samples at `sampling_rate`.
+        """
+        self.buffer = np.concatenate([self.buffer, samples.astype(np.float32, copy=False)])
+        self.pending_samples += len(samples)
+        self.last_active = time.monotonic()
+
+    def ready(self) -> bool:
+        """
+        Whether enough new audio has arrived to transcribe the buffer again.
+
+        Returns:
+            bool: True if the buffer should be transcribed.
+        """
+        return self.pending_samples > 0 and self.pending_samples >= self.min_chunk_ms * self.sampling_rate / 1000
+
+    def update(self, text: str, final: bool = False) -> Dict[str, Any]:
+        """
+        Updates the transcript with a new hypothesis of the whole buffer.
+
+        Args:
+            text (str): The transcription of the current buffer.
+            final (bool): Whether the stream ended, commits the whole hypothesis.
+
+        Returns:
+            Dict[str, Any]: The newly committed text, the partial transcript and the whole committed transcript.
+        """
+        self.pending_samples = 0
+        words = self._dedupe(text.split())
+
+        agreed = words if final else common_prefix(self.previous or [], words)
+        newly_committed: List[str] = []
+        if len(agreed) > len(self.buffer_committed):
+            newly_committed = agreed[len(self.buffer_committed) :]
+            self.buffer_committed = agreed
+            self.committed.extend(newly_committed)
+
+        self.previous = words
+        self.partial = words[len(self.buffer_committed) :] if len(words) > len(self.buffer_committed) else []
+
+        # Slide the window, everything heard so far is committed
+        window_full = len(self.buffer) > self.max_buffer_s * self.sampling_rate
+        if window_full and not final:
+            newly_committed.extend(self.partial)
+            self.committed.extend(self.partial)
+            self.partial = []
+            keep = int(self.overlap_s * self.sampling_rate)
+            self.buffer = self.buffer[len(self.buffer) - keep :]
+            self.buffer_committed = []
+            self.previous = None
+            self.context = self.committed[-DEDUPE_MAX_WORDS:] if self.overlap_s > 0 else []
+
+        return self.result(" ".join(newly_committed), final=final or window_full)
+
+    def result(self, committed: str = "", final: bool = False) -> Dict[str, Any]:
+        """
+        Formats the state of the session as a response.
+
+        Args:
+            committed (str): The text committed by the last update.
+            final (bool): Whether the returned segment is final.
+
+        Returns:
+            Dict[str, Any]: The response of a streaming request.
+        """
+        return {
+            "session_id": self.session_id,
+            "committed": committed,
+            "partial": " ".join(self.partial),
+            "transcription": " ".join(self.committed),
+            "final": final,
+        }
+
+    def _dedupe(self, words: List[str]) -> List[str]:
+        """
+        Drops the words at the start of a hypothesis that were already committed before the buffer was trimmed.
+
+        Args:
+            words (List[str]): The hypothesis of the current buffer.
+
+        Returns:
+            List[str]: The hypothesis without the repeated words.
+        """
+        for n in range(min(len(self.context), len(words)), 0, -1):
+            if [_normalize(w) for w in self.context[-n:]] == [_normalize(w) for w in words[:n]]:
+                return words[n:]
+        return words
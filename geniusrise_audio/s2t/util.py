@@ -14,10 +14,22 @@
 # limitations under the License.
 
 import io
-from typing import Tuple
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import librosa
+import numpy as np
 import torch
+import torch.nn.functional as F
 import torchaudio
 from pydub import AudioSegment
 
@@ -38,6 +50,14 @@ whisper_alignment_heads = {
 }
 # fmt: on
 
+# Bytes per second of a 128 kbit/s mp3, used to estimate durations missing from file headers
+MP3_BYTES_PER_SECOND = 128_000 / 8
+
+# Resamplers keyed by (orig_freq, new_freq, dtype), see `get_resampler`
+RESAMPLER_CACHE_SIZE = 8
+_resamplers: "OrderedDict[Tuple[int, int, torch.dtype], torchaudio.transforms.Resample]" = OrderedDict()
+_resamplers_lock = threading.Lock()
+
 
 def decode_audio(audio_bytes: bytes, model_type: str, model_sampling_rate: int) -> Tuple[torch.Tensor, int]:
     """
@@ -67,37 +87,283 @@ def decode_audio(audio_bytes: bytes, model_type: str, model_sampling_rate: int)
             _waveform = torch.mean(_waveform, dim=0, keepdim=True)  # type: ignore
 
         # Resample to 16kHz if needed
-        if original_sampling_rate != model_sampling_rate:
-            _waveform = torchaudio.functional.resample(
-                _waveform, orig_freq=original_sampling_rate, new_freq=model_sampling_rate
-            )
+        _waveform = resample(_waveform, orig_freq=original_sampling_rate, new_freq=model_sampling_rate)
 
         return _waveform, original_sampling_rate  # type: ignore
 
     else:
         # For whisper, seamlessm4t
-        # Using PyDub for other models
-        audio = AudioSegment.from_file(audio_stream)
+        if ffmpeg_available():
+            try:
+                return decode_audio_ffmpeg(audio_bytes, model_sampling_rate)
+            except RuntimeError:
+                # Containers that need seeking (e.g. some m4a) cannot be piped, let pydub deal with them
+                pass
+        return decode_audio_pydub(audio_bytes, model_sampling_rate)
 
-        # Get the sampling rate of the audio file
-        original_sampling_rate = audio.frame_rate
 
-        # Convert to mono (if not already)
-        if audio.channels > 1:
-            audio = audio.set_channels(1)
+@lru_cache(maxsize=1)
+def ffmpeg_available() -> bool:
+    """
+    Checks whether the ffmpeg binary is available on the PATH.
 
-        # Export to a uniform format (e.g., WAV) keeping original sampling rate
-        audio_stream = io.BytesIO()
-        audio.export(audio_stream, format="wav")
-        audio_stream.seek(0)
+    Returns:
+        bool: True if ffmpeg can be used for decoding.
+    """
+    return shutil.which("ffmpeg") is not None
 
-        # Load the audio into a tensor
-        waveform, _ = torchaudio.load(audio_stream, backend="ffmpeg")
 
-        waveform = torchaudio.functional.resample(
-            waveform, orig_freq=original_sampling_rate, new_freq=model_sampling_rate
-        )
-        return waveform, int(original_sampling_rate)
+def decode_audio_ffmpeg(audio_bytes: bytes, model_sampling_rate: int) -> Tuple[torch.Tensor, int]:
+    """
+    Decodes audio in a single pass by piping it through one ffmpeg process, which downmixes to mono and resamples
+    to the model's sampling rate while emitting raw float32 PCM.
+
+    Args:
+        audio_bytes (bytes): The encoded audio file.
+        model_sampling_rate (int): The sampling rate of the model.
+
+    Returns:
+        torch.Tensor: Mono audio of shape (1, num_samples) at `model_sampling_rate`.
+        int: The sampling rate of the audio file.
+
+    Raises:
+        RuntimeError: If ffmpeg fails to decode the audio.
+    """
+    # fmt: off
+    command = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "1", "-ar", str(model_sampling_rate),
+        "pipe:1",
+    ]
+    # fmt: on
+    process = subprocess.run(command, input=audio_bytes, capture_output=True)
+    stderr = process.stderr.decode("utf-8", errors="ignore")
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode audio: {stderr.strip()[-500:]}")
+
+    # ffmpeg reports the input stream before converting it
+    match = re.search(r"Stream #\d+:\d+.*?: Audio: .*?(\d+) Hz", stderr)
+    original_sampling_rate = int(match.group(1)) if match else model_sampling_rate
+
+    waveform = torch.from_numpy(np.frombuffer(process.stdout, dtype=np.float32).copy()).unsqueeze(0)
+    return waveform, original_sampling_rate
+
+
+def decode_audio_pydub(audio_bytes: bytes, model_sampling_rate: int) -> Tuple[torch.Tensor, int]:
+    """
+    Decodes audio with pydub, downmixes it to mono and resamples it to the model's sampling rate.
+
+    Args:
+        audio_bytes (bytes): The encoded audio file.
+        model_sampling_rate (int): The sampling rate of the model.
+
+    Returns:
+        torch.Tensor: Mono audio of shape (1, num_samples) at `model_sampling_rate`.
+        int: The sampling rate of the audio file.
+    """
+    audio = AudioSegment.from_file(io.BytesIO(audio_bytes))
+
+    # Get the sampling rate of the audio file
+    original_sampling_rate = audio.frame_rate
+
+    # Convert to mono (if not already)
+    if audio.channels > 1:
+        audio = audio.set_channels(1)
+
+    # Export to a uniform format (e.g., WAV) keeping original sampling rate
+    audio_stream = io.BytesIO()
+    audio.export(audio_stream, format="wav")
+    audio_stream.seek(0)
+
+    # Load the audio into a tensor
+    waveform, _ = torchaudio.load(audio_stream, backend="ffmpeg")
+
+    waveform = resample(waveform, orig_freq=original_sampling_rate, new_freq=model_sampling_rate)
+    return waveform, int(original_sampling_rate)
+
+
+def get_resampler(orig_freq: int, new_freq: int, dtype: torch.dtype = torch.float32) -> torchaudio.transforms.Resample:
+    """
+    Returns a resampler for the given rates, reusing its precomputed sinc kernel across calls.
+
+    Resamplers are kept in a bounded LRU keyed by `(orig_freq, new_freq, dtype)`, bulk jobs typically only see a
+    handful of distinct rate pairs.
+
+    Args:
+        orig_freq (int): The sampling rate of the input.
+        new_freq (int): The sampling rate of the output.
+        dtype (torch.dtype): The dtype of the waveforms to resample.
+
+    Returns:
+        torchaudio.transforms.Resample: The cached resampler.
+    """
+    key = (int(orig_freq), int(new_freq), dtype)
+    with _resamplers_lock:
+        resampler = _resamplers.get(key)
+        if resampler is not None:
+            _resamplers.move_to_end(key)
+            return resampler
+
+    resampler = torchaudio.transforms.Resample(orig_freq=int(orig_freq), new_freq=int(new_freq), dtype=dtype)
+
+    with _resamplers_lock:
+        _resamplers[key] = resampler
+        _resamplers.move_to_end(key)
+        while len(_resamplers) > RESAMPLER_CACHE_SIZE:
+            _resamplers.popitem(last=False)
+    return resampler
+
+
+def resample(waveform: torch.Tensor, orig_freq: int, new_freq: int) -> torch.Tensor:
+    """
+    Resamples a waveform with a cached resampler, returning it untouched if the rates already match.
+
+    Args:
+        waveform (torch.Tensor): The waveform to resample, time is the last dimension.
+        orig_freq (int): The sampling rate of the input.
+        new_freq (int): The sampling rate of the output.
+
+    Returns:
+        torch.Tensor: The resampled waveform.
+    """
+    if orig_freq == new_freq:
+        return waveform
+    return get_resampler(orig_freq, new_freq, waveform.dtype)(waveform)
+
+
+def load_audio(
+    audio_file: str, model_type: Optional[str], model_sampling_rate: int, decode: bool = True
+) -> Tuple[bytes, Optional[torch.Tensor]]:
+    """
+    Reads an audio file and optionally decodes it for the given model type.
+
+    Args:
+        audio_file (str): Path of the audio file.
+        model_type (Optional[str]): The type of model to be used for transcription.
+        model_sampling_rate (int): The sampling rate of the model.
+        decode (bool): Whether to decode the audio, backends like faster-whisper decode the raw bytes themselves.
+
+    Returns:
+        bytes: The raw contents of the audio file.
+        Optional[torch.Tensor]: The decoded audio, or None if `decode` is False.
+    """
+    with open(audio_file, "rb") as f:
+        audio_bytes = f.read()
+
+    if not decode:
+        return audio_bytes, None
+
+    waveform, _ = decode_audio(audio_bytes=audio_bytes, model_type=model_type, model_sampling_rate=model_sampling_rate)
+    return audio_bytes, waveform
+
+
+def prefetch_audio(
+    audio_files: Iterable[str],
+    model_type: Optional[str],
+    model_sampling_rate: int,
+    decode: bool = True,
+    num_workers: int = 2,
+    queue_depth: int = 16,
+    use_processes: bool = False,
+) -> Iterator[Tuple[str, bytes, Optional[torch.Tensor]]]:
+    """
+    Reads and decodes audio files in the background while the caller runs inference on earlier files.
+
+    At most `queue_depth` files are read or decoded ahead of the consumer, which caps the memory held by the
+    pipeline. Files are yielded in the same order as `audio_files`.
+
+    Args:
+        audio_files (Iterable[str]): Paths of the audio files.
+        model_type (Optional[str]): The type of model to be used for transcription.
+        model_sampling_rate (int): The sampling rate of the model.
+        decode (bool): Whether to decode the audio or only read the raw bytes.
+        num_workers (int): Number of background decoders, 0 decodes inline in the calling thread.
+        queue_depth (int): Maximum number of files prefetched ahead of the consumer.
+        use_processes (bool): Use a process pool instead of a thread pool.
+
+    Yields:
+        Tuple[str, bytes, Optional[torch.Tensor]]: The file path, its raw bytes and the decoded audio.
+    """
+    if num_workers <= 0:
+        for audio_file in audio_files:
+            yield (audio_file, *load_audio(audio_file, model_type, model_sampling_rate, decode))
+        return
+
+    executor: Executor = (
+        ProcessPoolExecutor(max_workers=num_workers) if use_processes else ThreadPoolExecutor(max_workers=num_workers)
+    )
+    pending: Deque = deque()
+    files = iter(audio_files)
+    try:
+        for audio_file in files:
+            pending.append(
+                (audio_file, executor.submit(load_audio, audio_file, model_type, model_sampling_rate, decode))
+            )
+            if len(pending) >= max(queue_depth, 1):
+                break
+
+        while pending:
+            audio_file, future = pending.popleft()
+            audio_bytes, waveform = future.result()
+
+            # Keep the queue full before handing the file over
+            next_file = next(files, None)
+            if next_file is not None:
+                pending.append(
+                    (next_file, executor.submit(load_audio, next_file, model_type, model_sampling_rate, decode))
+                )
+
+            yield audio_file, audio_bytes, waveform
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def probe_duration(audio_file: str) -> float:
+    """
+    Reads the duration of an audio file from its header, without decoding it.
+
+    Args:
+        audio_file (str): Path of the audio file.
+
+    Returns:
+        float: The duration in seconds. Files whose header has no length, e.g. some mp3s, are estimated from their
+            size at 128 kbit/s.
+    """
+    import soundfile as sf
+
+    try:
+        info = sf.info(audio_file)
+        if info.frames > 0 and info.samplerate > 0:
+            return info.frames / info.samplerate
+    except Exception:
+        pass
+    try:
+        metadata = torchaudio.info(audio_file)
+        if metadata.num_frames > 0 and metadata.sample_rate > 0:
+            return metadata.num_frames / metadata.sample_rate
+    except Exception:
+        pass
+    return os.path.getsize(audio_file) / MP3_BYTES_PER_SECOND
+
+
+def sort_by_duration(audio_files: List[str], num_workers: int = 4) -> List[str]:
+    """
+    Sorts audio files by duration, longest first, so that batches hold files of similar length and little padding.
+
+    Args:
+        audio_files (List[str]): Paths of the audio files.
+        num_workers (int): Number of threads reading the file headers.
+
+    Returns:
+        List[str]: The files, longest first. Files of equal duration keep their order.
+    """
+    with ThreadPoolExecutor(max_workers=max(num_workers, 1)) as executor:
+        durations = list(executor.map(probe_duration, audio_files))
+    order = sorted(range(len(audio_files)), key=lambda i: -durations[i])
+    return [audio_files[i] for i in order]
 
 
 def chunk_audio(audio_input, chunk_size, stride_left, stride_right):
@@ -149,3 +415,109 @@ def chunk_audio_batched(audio_input, chunk_size, stride_left, stride_right):
         chunks.append(chunk)
 
     return chunks
+
+
+def chunk_audio_strided(
+    audio_input: torch.Tensor, chunk_size: int, stride_left: int, stride_right: int
+) -> Tuple[torch.Tensor, List[Tuple[int, int, int, int]]]:
+    """
+    Splits the audio input into overlapping chunks as a single strided view, so that all chunks can be fed to the
+    model as one batch.
+
+    The audio is zero padded by `stride_left` samples at the start and up to a full window at the end, after which
+    every chunk has the same length of `chunk_size + stride_left + stride_right` samples.
+
+    Args:
+        audio_input (torch.Tensor): The 1-D input audio tensor.
+        chunk_size (int): The size of each audio chunk, excluding the overlap.
+        stride_left (int): The size of the left stride for overlap.
+        stride_right (int): The size of the right stride for overlap.
+
+    Returns:
+        torch.Tensor: Chunks of shape (num_chunks, chunk_size + stride_left + stride_right).
+        List[Tuple[int, int, int, int]]: Per chunk, the start and end sample of the original audio the chunk is
+            responsible for, and the number of samples to drop from the left and right of the chunk to get there.
+    """
+    length = audio_input.shape[-1]
+    num_chunks = max(math.ceil(length / chunk_size), 1)
+    window = chunk_size + stride_left + stride_right
+
+    padded_length = (num_chunks - 1) * chunk_size + window
+    padded = F.pad(audio_input, (stride_left, padded_length - stride_left - length))
+    chunks = padded.unfold(-1, window, chunk_size)
+
+    strides = []
+    for chunk_id in range(num_chunks):
+        start = chunk_id * chunk_size
+        end = min(start + chunk_size, length)
+        strides.append((start, end, stride_left, window - stride_left - (end - start)))
+
+    return chunks, strides
+
+
+def chunk_batches(chunks: torch.Tensor, max_batch_samples: int = 0) -> Iterator[torch.Tensor]:
+    """
+    Groups chunks into batches that hold at most `max_batch_samples` audio samples each.
+
+    Args:
+        chunks (torch.Tensor): Chunks of shape (num_chunks, window), as returned by `chunk_audio_strided`.
+        max_batch_samples (int): Maximum number of samples per batch, 0 yields all chunks as a single batch.
+
+    Yields:
+        torch.Tensor: Consecutive batches of chunks, at least one chunk each.
+    """
+    if max_batch_samples <= 0:
+        yield chunks
+        return
+
+    chunks_per_batch = max(max_batch_samples // chunks.shape[-1], 1)
+    for i in range(0, chunks.shape[0], chunks_per_batch):
+        yield chunks[i : i + chunks_per_batch]
+
+
+def transcription_size(transcription: Any) -> int:
+    """
+    Estimates the memory held by a transcription result, for sizing the result cache.
+
+    Args:
+        transcription (Any): The transcription result.
+
+    Returns:
+        int: The size of the result serialized as JSON, in bytes.
+    """
+    return len(json.dumps(transcription, default=str))
+
+
+def normalize_transcription(transcription: Any) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Converts the result of any transcription backend into its text and a list of timed segments.
+
+    Args:
+        transcription (Any): The result of whisper.cpp (a string), faster-whisper, or the whisper, seamless and
+            wav2vec2 processing methods.
+
+    Returns:
+        str: The transcribed text.
+        List[Dict[str, Any]]: The segments, each with "text", "start" and "end" in seconds.
+    """
+    if isinstance(transcription, str):
+        return transcription.strip(), []
+
+    # faster-whisper
+    if "transcriptions" in transcription:
+        return " ".join(t.strip() for t in transcription["transcriptions"]), []
+
+    text = transcription.get("transcription", "")
+    if isinstance(text, list):
+        text = " ".join(text)
+
+    def seconds(value: Any) -> Optional[float]:
+        if isinstance(value, list):
+            value = value[0] if value else None
+        return float(value) if value is not None else None
+
+    segments = [
+        {"text": segment.get("tokens", ""), "start": seconds(segment.get("start")), "end": seconds(segment.get("end"))}
+        for segment in transcription.get("segments", [])
+    ]
+    return text.strip(), segments
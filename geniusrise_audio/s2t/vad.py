@@ -0,0 +1,184 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import torch
+
+from geniusrise_audio.s2t.util import normalize_transcription, resample
+
+# Methods supported by `detect_speech`
+VAD_METHODS = ["energy", "silero"]
+
+# Sampling rate of the silero VAD model
+SILERO_SAMPLING_RATE = 16_000
+
+
+def energy_speech_frames(
+    waveform: np.ndarray, sampling_rate: int, frame_ms: float = 30.0, margin_db: float = 10.0, floor_db: float = -50.0
+) -> Tuple[np.ndarray, int]:
+    """
+    Flags the frames of a waveform whose energy is above the noise floor.
+
+    The noise floor is the 10th percentile of the frame energies, frames louder than it by `margin_db` are speech.
+    Frames quieter than `floor_db` (dBFS) are never speech.
+
+    Args:
+        waveform (np.ndarray): Mono samples in [-1, 1].
+        sampling_rate (int): The sampling rate of the waveform.
+        frame_ms (float): Length of a frame.
+        margin_db (float): Margin above the noise floor.
+        floor_db (float): Absolute energy threshold.
+
+    Returns:
+        np.ndarray: One flag per frame.
+        int: The length of a frame in samples.
+    """
+    frame = max(int(sampling_rate * frame_ms / 1000), 1)
+    num_frames = int(np.ceil(len(waveform) / frame))
+    if num_frames == 0:
+        return np.zeros(0, dtype=bool), frame
+
+    padded = np.zeros(num_frames * frame, dtype=np.float32)
+    padded[: len(waveform)] = waveform
+    energy = 10 * np.log10(np.mean(padded.reshape(num_frames, frame) ** 2, axis=1) + 1e-10)
+    threshold = max(float(np.percentile(energy, 10)) + margin_db, floor_db)
+    return energy > threshold, frame
+
+
+def _frames_to_regions(
+    speech: np.ndarray, frame: int, num_samples: int, min_speech: int, min_silence: int
+) -> List[Tuple[int, int]]:
+    regions: List[Tuple[int, int]] = []
+    start = None
+    for i, is_speech in enumerate(list(speech) + [False]):
+        if is_speech and start is None:
+            start = i * frame
+        elif not is_speech and start is not None:
+            end = min(i * frame, num_samples)
+            # Short pauses do not end a region
+            if regions and start - regions[-1][1] < min_silence:
+                regions[-1] = (regions[-1][0], end)
+            else:
+                regions.append((start, end))
+            start = None
+    return [(start, end) for start, end in regions if end - start >= min_speech]
+
+
+def _pad_and_split(
+    regions: List[Tuple[int, int]], num_samples: int, pad: int, max_region: int
+) -> List[Tuple[int, int]]:
+    padded: List[Tuple[int, int]] = []
+    for start, end in regions:
+        start, end = max(start - pad, 0), min(end + pad, num_samples)
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], max(end, padded[-1][1]))
+        else:
+            padded.append((start, end))
+
+    split: List[Tuple[int, int]] = []
+    for start, end in padded:
+        while max_region > 0 and end - start > max_region:
+            split.append((start, start + max_region))
+            start += max_region
+        split.append((start, end))
+    return split
+
+
+def detect_speech(
+    waveform: Any,
+    sampling_rate: int,
+    method: str = "energy",
+    min_speech_ms: float = 250.0,
+    min_silence_ms: float = 300.0,
+    pad_ms: float = 200.0,
+    max_region_s: float = 30.0,
+) -> List[Tuple[int, int]]:
+    """
+    Finds the regions of a waveform that contain speech.
+
+    Args:
+        waveform (Any): Mono audio, a tensor or array of shape (samples,) or (1, samples).
+        sampling_rate (int): The sampling rate of the waveform.
+        method (str): "energy" thresholds the frame energy against the noise floor, cheap but it keeps music and
+            loud noise. "silero" runs the silero ONNX model bundled with faster-whisper on CPU.
+        min_speech_ms (float): Regions shorter than this are dropped.
+        min_silence_ms (float): Pauses shorter than this do not split a region.
+        pad_ms (float): Audio kept around every region.
+        max_region_s (float): Longer regions are split, e.g. to fit whisper's 30 second window. 0 for no limit.
+
+    Returns:
+        List[Tuple[int, int]]: Start and end sample of every region, in order.
+    """
+    audio = torch.as_tensor(waveform).reshape(-1).float()
+    num_samples = audio.shape[-1]
+    to_samples = sampling_rate / 1000
+
+    if method == "energy":
+        speech, frame = energy_speech_frames(audio.cpu().numpy(), sampling_rate)
+        regions = _frames_to_regions(
+            speech, frame, num_samples, int(min_speech_ms * to_samples), int(min_silence_ms * to_samples)
+        )
+    elif method == "silero":
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+        audio_16k = resample(audio.cpu(), sampling_rate, SILERO_SAMPLING_RATE).numpy()
+        options = VadOptions(
+            min_speech_duration_ms=int(min_speech_ms),
+            min_silence_duration_ms=int(min_silence_ms),
+            speech_pad_ms=0,
+        )
+        scale = sampling_rate / SILERO_SAMPLING_RATE
+        regions = [
+            (int(stamp["start"] * scale), min(int(stamp["end"] * scale), num_samples))
+            for stamp in get_speech_timestamps(audio_16k, options)
+        ]
+    else:
+        raise ValueError(f"Unsupported VAD method: {method}. Supported methods are {VAD_METHODS}.")
+
+    return _pad_and_split(regions, num_samples, int(pad_ms * to_samples), int(max_region_s * sampling_rate))
+
+
+def merge_region_results(results: List[Any], regions: List[Tuple[int, int]], sampling_rate: int) -> Dict[str, Any]:
+    """
+    Merges the transcriptions of the speech regions of one file, mapping their timestamps back to the file.
+
+    Args:
+        results (List[Any]): The transcription of every region, as returned by any backend.
+        regions (List[Tuple[int, int]]): Start and end sample of every region.
+        sampling_rate (int): The sampling rate of the file.
+
+    Returns:
+        Dict[str, Any]: The transcription of the file, with one or more segments per region.
+    """
+    texts: List[str] = []
+    segments: List[Dict[str, Any]] = []
+    for result, (start, end) in zip(results, regions):
+        text, region_segments = normalize_transcription(result)
+        if not text:
+            continue
+        texts.append(text)
+
+        offset = start / sampling_rate
+        timed = [s for s in region_segments if s["start"] is not None and s["end"] is not None]
+        if not timed:
+            segments.append({"tokens": text, "start": offset, "end": end / sampling_rate})
+            continue
+        segments.extend(
+            {"tokens": s["text"].strip(), "start": offset + s["start"], "end": offset + s["end"]} for s in timed
+        )
+
+    return {"transcription": " ".join(texts), "segments": segments}
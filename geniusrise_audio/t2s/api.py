@@ -14,14 +14,29 @@
 # limitations under the License.
 
 import base64
+import os
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
 
 import cherrypy
 from geniusrise import BatchInput, BatchOutput, State
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
 
+from geniusrise_audio.base.cache import FileStore, ResultCache, cache_key
 from geniusrise_audio.t2s.inference import _TextToSpeechInference
 from geniusrise_audio import AudioAPI
-from geniusrise_audio.t2s.util import convert_waveform_to_audio_file
+from geniusrise_audio.t2s.util import (
+    AUDIO_MIME_TYPES,
+    STREAMABLE_FORMATS,
+    convert_waveform_to_audio_file,
+    encode_waveform_stream,
+)
+
+if TYPE_CHECKING:
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+# Texts longer than this are sent with chunked transfer encoding by `synthesize_audio`
+STREAM_TEXT_LENGTH = 1000
+# Size of the chunks of a chunked response
+STREAM_CHUNK_BYTES = 64 * 1024
 
 
 class TextToSpeechAPI(AudioAPI, _TextToSpeechInference):
@@ -35,6 +50,8 @@ class TextToSpeechAPI(AudioAPI, _TextToSpeechInference):
     Methods:
         synthesize(text_input: str) -> bytes:
             Converts the given text input to speech using the text-to-speech model.
+        synthesize_audio() -> bytes:
+            Converts the given text input to speech and responds with the audio file itself.
 
     Example CLI Usage:
 
@@ -66,8 +83,11 @@ class TextToSpeechAPI(AudioAPI, _TextToSpeechInference):
     ```
     """
 
-    model: AutoModelForSeq2SeqLM
-    tokenizer: AutoTokenizer
+    model: "AutoModelForSeq2SeqLM"
+    tokenizer: "AutoTokenizer"
+
+    # Characters of text of the synthetic warmup requests, see `AudioAPI.listen`
+    WARMUP_SIZES = [40.0, 400.0]
 
     def __init__(
         self,
@@ -96,7 +116,8 @@ class TextToSpeechAPI(AudioAPI, _TextToSpeechInference):
     def synthesize(self):
         """
         API endpoint to convert text input to speech using the text-to-speech model.
-        Expects a JSON input with 'text' as a key containing the text to be synthesized.
+        Expects a JSON input with 'text' as a key containing the text to be synthesized. When the API serves several
+        models (see `listen`), e.g. one MMS model per language, 'model' picks the one synthesizing the request.
 
         Returns:
             Dict[str, str]: A dictionary containing the base64 encoded audio data.
@@ -112,9 +133,292 @@ class TextToSpeechAPI(AudioAPI, _TextToSpeechInference):
             }' | jq -r '.audio_file' | base64 -d > output.mp3 && vlc output.mp3
         ```
         """
-        input_json = cherrypy.request.json
+        input_json = cherrypy.request.json.copy()
         text_data = input_json.get("text")
         output_type = input_json.get("output_type")
+        model = input_json.pop("model", None)
+
+        with self.serving_model(model):
+            audio_file = self._synthesize(input_json, output_type)
+        audio_base64 = base64.b64encode(audio_file)
+
+        return {"audio_file": audio_base64.decode("utf-8"), "input": text_data}
+
+    @cherrypy.expose
+    @cherrypy.tools.json_in()
+    @cherrypy.config(**{"response.stream": True})
+    def synthesize_audio(self):
+        """
+        API endpoint to convert text input to speech, returning the audio file itself instead of base64 encoded JSON.
+        Expects the same JSON input as `synthesize`. The format is taken from 'output_type', or negotiated from the
+        `Accept` header (e.g. `audio/mpeg`) when 'output_type' is not given, and defaults to wav.
+
+        Responses carry the matching `Content-Type` and a `Content-Length`. Texts longer than `STREAM_TEXT_LENGTH`
+        characters, or requests with `"stream": true`, are streamed with chunked transfer encoding instead. For the
+        `STREAMABLE_FORMATS` every sentence is encoded and sent as soon as it is synthesized, so the first audio
+        arrives while later sentences are still generating. Cached audio files are streamed as they are, sentence
+        streams are not cached.
+
+        Returns:
+            bytes: The audio file.
+
+        Example CURL Request:
+        ```
+        /usr/bin/curl -X POST localhost:3000/api/v1/synthesize_audio \
+            -H "Content-Type: application/json" \
+            -H "Accept: audio/mpeg" \
+            -u user:password \
+            -d '{"text": "This is a test text for speech synthesis."}' \
+            -o output.mp3 && vlc output.mp3
+
+        /usr/bin/curl -N -X POST localhost:3000/api/v1/synthesize_audio \
+            -H "Content-Type: application/json" \
+            -u user:password \
+            -d '{"text": "Hello. This is streamed one sentence at a time.", "output_type": "wav", "stream": true}' \
+            | ffplay -nodisp -autoexit -
+        ```
+        """
+        input_json = cherrypy.request.json
+        text_data = input_json.get("text") or ""
+        stream = input_json.get("stream")
+        output_type = input_json.get("output_type") or self._negotiate_output_type()
+        if output_type not in AUDIO_MIME_TYPES:
+            raise cherrypy.HTTPError(400, f"Unsupported audio format: {output_type}.")
+
+        params = input_json.copy()
+        if "stream" in params:
+            del params["stream"]
+        model = params.pop("model", None)
+        if stream is None:
+            stream = len(text_data) > STREAM_TEXT_LENGTH
+
+        cherrypy.response.headers["Content-Type"] = AUDIO_MIME_TYPES[output_type]
+        if stream and output_type in STREAMABLE_FORMATS:
+            with self.serving_model(model):
+                audio_file = self._cached_synthesis(params, output_type)
+            if audio_file is None:
+                return self._stream_synthesis(params, output_type, model=model)
+        else:
+            with self.serving_model(model):
+                audio_file = self._synthesize(params, output_type)
+
+        if not stream:
+            cherrypy.response.headers["Content-Length"] = str(len(audio_file))
+            return audio_file
+
+        # Without a Content-Length, cherrypy sends the generator with chunked transfer encoding
+        def chunks():
+            view = memoryview(audio_file)
+            for start in range(0, len(view), STREAM_CHUNK_BYTES):
+                yield bytes(view[start : start + STREAM_CHUNK_BYTES])
+
+        return chunks()
+
+    def _stream_synthesis(
+        self, input_json: Dict[str, Any], output_type: str, model: Optional[str] = None
+    ) -> Iterator[bytes]:
+        """
+        Synthesizes the text of a request one sentence at a time, encoding each sentence as soon as it is ready.
+
+        The first sentence is synthesized before returning, so that errors still produce a proper error response.
+        An inference slot is only held while a sentence is synthesized, never while it is sent, so a slow client
+        does not block other requests. The model stays bound until the last sentence has been synthesized, it is
+        released as soon as the request ends, e.g. when the client disconnects mid-stream.
+
+        Args:
+            input_json (Dict[str, Any]): The request, as for `_synthesize`.
+            output_type (str): The audio format, one of `STREAMABLE_FORMATS`.
+            model (Optional[str]): The served model to synthesize with, see `serving_model`.
+
+        Returns:
+            Iterator[bytes]: The encoded audio stream.
+        """
+        text_data, voice_preset, generate_args = self._parse_synthesis_args(input_json)
+
+        def sentences():
+            waveforms = self._stream_waveforms(text_data, voice_preset, generate_args)
+            try:
+                while True:
+                    with self.inference_slot():
+                        waveform = next(waveforms, None)
+                    if waveform is None:
+                        return
+                    yield waveform
+            finally:
+                waveforms.close()
+
+        def synthesize():
+            with self.serving_model(model):
+                yield from encode_waveform_stream(sentences(), format=output_type, sample_rate=self._sample_rate())
+
+        chunks = synthesize()
+        first_chunk = next(chunks)
+
+        # Closing the generator exits its context managers, e.g. when the client disconnects mid-stream
+        cherrypy.request.hooks.attach("on_end_request", chunks.close)
+
+        def stream():
+            try:
+                yield first_chunk
+                yield from chunks
+            finally:
+                chunks.close()
+
+        return stream()
+
+    def _stream_waveforms(self, text_data: str, voice_preset: Any, generate_args: Dict[str, Any]) -> Iterator[Any]:
+        """
+        Synthesizes text one sentence at a time with the loaded model.
+
+        Args:
+            text_data (str): The text to synthesize.
+            voice_preset (Any): The voice preset to use for synthesis.
+            generate_args (Dict[str, Any]): Additional arguments for speech synthesis.
+
+        Returns:
+            Iterator[Any]: The waveform of each sentence.
+        """
+        if self.model.config.model_type == "vits":
+            return self.stream_mms(text_data, generate_args=generate_args)
+        elif self.model.config.model_type == "coarse_acoustics" or self.model.config.model_type == "bark":
+            return self.stream_bark(text_data, voice_preset=voice_preset, generate_args=generate_args)
+        elif self.model.config.model_type == "speecht5":
+            return self.stream_speecht5_tts(text_data, voice_preset=voice_preset, generate_args=generate_args)
+        elif self.model.config.model_type == "seamless_m4t_v2":
+            return self.stream_seamless(text_data, voice_preset=voice_preset, generate_args=generate_args)
+        raise cherrypy.HTTPError(400, f"Streaming is not supported for {self.model.config.model_type} models.")
+
+    def _negotiate_output_type(self) -> str:
+        """
+        Picks the output format from the `Accept` header of the request.
+
+        Returns:
+            str: The first supported format in order of preference, wav if none is acceptable.
+        """
+        accept = cherrypy.request.headers.elements("Accept")
+        for element in accept:
+            for output_type, mime_type in AUDIO_MIME_TYPES.items():
+                if element.value == mime_type:
+                    return output_type
+        if accept and not any(element.value in ["*/*", "audio/*"] for element in accept):
+            raise cherrypy.HTTPError(406, f"Supported audio types are {list(AUDIO_MIME_TYPES.values())}.")
+        return "wav"
+
+    def _synthesize(self, input_json: Dict[str, Any], output_type: str) -> bytes:
+        """
+        Synthesizes the text of a request and encodes it as an audio file.
+
+        Args:
+            input_json (Dict[str, Any]): The request, 'text' and 'voice_preset' are taken from it and everything else
+                other than 'output_type' is passed on to generation.
+            output_type (str): The audio file format.
+
+        Returns:
+            bytes: The audio file.
+        """
+        audio_file = self._cached_synthesis(input_json, output_type)
+        if audio_file is not None:
+            return audio_file
+
+        text_data, voice_preset, generate_args = self._parse_synthesis_args(input_json)
+
+        # Perform inference
+        with self.inference_slot():
+            if self.model.config.model_type == "vits":
+                audio_output = self.process_mms(text_data, generate_args=generate_args)
+            elif self.model.config.model_type == "coarse_acoustics" or self.model.config.model_type == "bark":
+                audio_output = self.process_bark(text_data, voice_preset=voice_preset, generate_args=generate_args)
+            elif self.model.config.model_type == "speecht5":
+                audio_output = self.process_speecht5_tts(
+                    text_data, voice_preset=voice_preset, generate_args=generate_args
+                )
+            elif self.model.config.model_type == "seamless_m4t_v2":
+                audio_output = self.process_seamless(text_data, voice_preset=voice_preset, generate_args=generate_args)
+
+        # Convert audio to the requested format
+        audio_file = convert_waveform_to_audio_file(audio_output, format=output_type, sample_rate=self._sample_rate())
+        if self.cache is not None:
+            self.cache.put(self._synthesis_cache_key(input_json, output_type), audio_file)
+        return audio_file
+
+    def _cached_synthesis(self, input_json: Dict[str, Any], output_type: str) -> Optional[bytes]:
+        """
+        Looks up the audio file of a request in the cache.
+
+        Args:
+            input_json (Dict[str, Any]): The request, as for `_synthesize`.
+            output_type (str): The audio file format.
+
+        Returns:
+            Optional[bytes]: The cached audio file, or None on a miss or if caching is disabled.
+        """
+        if self.cache is None:
+            return None
+        return self.cache.get(self._synthesis_cache_key(input_json, output_type))
+
+    def _synthesis_cache_key(self, input_json: Dict[str, Any], output_type: str) -> str:
+        """
+        Builds the cache key of a request from the model, the text, the voice preset, the generation arguments and
+        the output format.
+
+        Args:
+            input_json (Dict[str, Any]): The request, as for `_synthesize`.
+            output_type (str): The audio file format.
+
+        Returns:
+            str: The cache key.
+        """
+        text_data, voice_preset, generate_args = self._parse_synthesis_args(input_json)
+        return cache_key(self.model_name, self.model_revision, text_data, voice_preset, generate_args, output_type)
+
+    def warmup(self, sizes: List[float]) -> None:
+        """
+        Synthesizes a short English text of every length in `sizes` through the request path. This also downloads
+        the SpeechT5 vocoder and speaker embeddings.
+
+        Args:
+            sizes (List[float]): Lengths of the synthetic texts in characters.
+        """
+        sentence = "The quick brown fox jumps over the lazy dog. "
+        params: Dict[str, Any] = {}
+        if self.model.config.model_type in ["speecht5", "seamless_m4t_v2"]:
+            params["voice_preset"] = 0
+        if self.model.config.model_type == "seamless_m4t_v2":
+            params["tgt_lang"] = "eng"
+
+        for size in sorted(sizes):
+            text = (sentence * (int(size) // len(sentence) + 1))[: max(int(size), 1)].strip()
+            self._synthesize({"text": text, **params}, "wav")
+
+    def create_cache(self, max_memory_bytes: int, max_disk_bytes: int) -> ResultCache:
+        """
+        Creates the cache of synthesized audio files, the on-disk tier lives in `tts_cache` under the output folder.
+
+        Args:
+            max_memory_bytes (int): Maximum size of the in-memory tier.
+            max_disk_bytes (int): Maximum size of the on-disk tier, 0 disables it.
+
+        Returns:
+            ResultCache: The cache.
+        """
+        store = (
+            FileStore(os.path.join(self.output.output_folder, "tts_cache"), max_disk_bytes)
+            if max_disk_bytes > 0
+            else None
+        )
+        return ResultCache(max_memory_bytes=max_memory_bytes, store=store)
+
+    def _parse_synthesis_args(self, input_json: Dict[str, Any]) -> Tuple[str, Any, Dict[str, Any]]:
+        """
+        Splits a request into the text, the voice preset and the generation arguments.
+
+        Args:
+            input_json (Dict[str, Any]): The request.
+
+        Returns:
+            Tuple[str, Any, Dict[str, Any]]: The text, the voice preset and everything else other than 'output_type'.
+        """
+        text_data = input_json.get("text")
         voice_preset = input_json.get("voice_preset")
 
         generate_args = input_json.copy()
@@ -129,21 +433,15 @@ class TextToSpeechAPI(AudioAPI, _TextToSpeechInference):
         if not text_data:
             raise cherrypy.HTTPError(400, "No text data provided.")
 
-        # Perform inference
-        if self.model.config.model_type == "vits":
-            audio_output = self.process_mms(text_data, generate_args=generate_args)
-        elif self.model.config.model_type == "coarse_acoustics" or self.model.config.model_type == "bark":
-            audio_output = self.process_bark(text_data, voice_preset=voice_preset, generate_args=generate_args)
-        elif self.model.config.model_type == "speecht5":
-            audio_output = self.process_speecht5_tts(text_data, voice_preset=voice_preset, generate_args=generate_args)
-        elif self.model.config.model_type == "seamless_m4t_v2":
-            audio_output = self.process_seamless(text_data, voice_preset=voice_preset, generate_args=generate_args)
+        return text_data, voice_preset, generate_args
 
-        # Convert audio to base64 encoded data
-        sample_rate = (
+    def _sample_rate(self) -> int:
+        """
+        Returns the sample rate of the waveforms generated by the model.
+
+        Returns:
+            int: The sample rate, 16kHz if the model does not specify it.
+        """
+        return (
             self.model.generation_config.sample_rate if hasattr(self.model.generation_config, "sample_rate") else 16_000
         )
-        audio_file = convert_waveform_to_audio_file(audio_output, format=output_type, sample_rate=sample_rate)
-        audio_base64 = base64.b64encode(audio_file)
-
-        return {"audio_file": audio_base64.decode("utf-8"), "input": text_data}
@@ -18,19 +18,19 @@ import json
 import os
 import sqlite3
 import xml.etree.ElementTree as ET
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-import pandas as pd
-import yaml  # type: ignore
-from datasets import Dataset, load_from_disk
 from geniusrise import BatchInput, BatchOutput, State
-from pyarrow import feather
-from pyarrow import parquet as pq
-from transformers import AutoModelForCTC, AutoProcessor
 
+from geniusrise_audio.base.sharding import merge_shards, select_shard, shard_folder
 from geniusrise_audio.t2s.inference import TextToSpeechInference
 from geniusrise_audio.t2s.util import convert_waveform_to_audio_file
 
+# pandas, pyarrow, datasets and yaml are imported by the dataset loader
+if TYPE_CHECKING:
+    from datasets import Dataset
+    from transformers import AutoModelForCTC, AutoProcessor
+
 
 class TextToSpeechBulk(TextToSpeechInference):
     r"""
@@ -82,8 +82,8 @@ class TextToSpeechBulk(TextToSpeechInference):
     ```
     """
 
-    model: AutoModelForCTC
-    processor: AutoProcessor
+    model: "AutoModelForCTC"
+    processor: "AutoProcessor"
 
     def __init__(
         self,
@@ -102,8 +102,9 @@ class TextToSpeechBulk(TextToSpeechInference):
             **kwargs: Additional keyword arguments.
         """
         super().__init__(input=input, output=output, state=state, **kwargs)
+        self.output_path = output.output_folder
 
-    def load_dataset(self, dataset_path: str, max_length: int = 512, **kwargs) -> Optional[Dataset]:
+    def load_dataset(self, dataset_path: str, max_length: int = 512, **kwargs) -> Optional["Dataset"]:
         r"""
         Load a completion dataset from a directory.
 
@@ -176,6 +177,9 @@ class TextToSpeechBulk(TextToSpeechInference):
 
         self.label_to_id = self.model.config.label2id if self.model and self.model.config.label2id else {}  # type: ignore
 
+        import pandas as pd
+        from datasets import Dataset, load_from_disk
+
         try:
             self.log.info(f"Loading dataset from {dataset_path}")
             if os.path.isfile(os.path.join(dataset_path, "dataset_info.json")):
@@ -183,7 +187,7 @@ class TextToSpeechBulk(TextToSpeechInference):
                 return load_from_disk(dataset_path)
             else:
                 data = []
-                for filename in glob.glob(f"{dataset_path}/**/*", recursive=True):
+                for filename in sorted(glob.glob(f"{dataset_path}/**/*", recursive=True)):
                     if dataset_path not in filename:
                         filepath = os.path.join(dataset_path, filename)
                     else:
@@ -199,6 +203,8 @@ class TextToSpeechBulk(TextToSpeechInference):
                         data.extend(df.to_dict("records"))
 
                     elif filename.endswith(".parquet"):
+                        from pyarrow import parquet as pq
+
                         df = pq.read_table(filepath).to_pandas()
                         data.extend(df.to_dict("records"))
 
@@ -215,6 +221,8 @@ class TextToSpeechBulk(TextToSpeechInference):
                             data.append({"text": text})
 
                     elif filename.endswith(".yaml") or filename.endswith(".yml"):
+                        import yaml  # type: ignore
+
                         with open(filepath, "r") as f:
                             yaml_data = yaml.safe_load(f)
                             data.extend(yaml_data)
@@ -234,6 +242,8 @@ class TextToSpeechBulk(TextToSpeechInference):
                         data.extend(df.to_dict("records"))
 
                     elif filename.endswith(".feather"):
+                        from pyarrow import feather
+
                         df = feather.read_feather(filepath)
                         data.extend(df.to_dict("records"))
 
@@ -266,6 +276,10 @@ class TextToSpeechBulk(TextToSpeechInference):
         output_type: str = "mp3",
         voice_preset: str = "",
         model_sampling_rate: int = 16_000,
+        shard_index: int = 0,
+        num_shards: int = 1,
+        sort_by_length: bool = False,
+        use_onnxruntime: bool = False,
         **kwargs: Any,
     ) -> None:
         """
@@ -284,6 +298,10 @@ class TextToSpeechBulk(TextToSpeechInference):
             batch_size (int): Number of transcriptions to process simultaneously (default 8).
             notification_email (Optional[str]): Email address for notifications.
             max_length: (int): Maximum length of the input after which to truncate.
+            shard_index (int): The shard of the texts processed by this job, in [0, num_shards) (default 0).
+            num_shards (int): Number of jobs the texts are split between by a stable hash of the text, each shard writes to its own subfolder of the output folder, see `merge_shards` (default 1).
+            sort_by_length (bool): Batch texts of similar length together, so that the padded batches of MMS (VITS) models waste little compute. Audio files are named after the index of their text in the dataset, so they keep the input order (default False).
+            use_onnxruntime (bool): Whether to export MMS (VITS) models to ONNX and run them on onnxruntime's CPU execution provider, threads are set with `model_onnx_intra_op_threads` and `model_onnx_inter_op_threads` (default False).
             **kwargs: Arbitrary keyword arguments for model and generation configurations.
         """
         self.model_class = model_class
@@ -301,6 +319,7 @@ class TextToSpeechBulk(TextToSpeechInference):
         self.output_type = output_type
         self.voice_preset = voice_preset
         self.model_sampling_rate = model_sampling_rate
+        self.use_onnxruntime = use_onnxruntime
 
         if ":" in model_name:
             model_revision = model_name.split(":")[1]
@@ -326,7 +345,8 @@ class TextToSpeechBulk(TextToSpeechInference):
         self.processor_args = processor_args
 
         dataset_path = self.input.input_folder
-        output_path = self.output.output_folder
+        self.output_path = shard_folder(self.output.output_folder, shard_index, num_shards)
+        os.makedirs(self.output_path, exist_ok=True)
 
         self.model, self.processor = self.load_models(
             model_name=self.model_name,
@@ -342,6 +362,7 @@ class TextToSpeechBulk(TextToSpeechInference):
             max_memory=self.max_memory,
             torchscript=self.torchscript,
             compile=self.compile,
+            use_onnxruntime=use_onnxruntime,
             **self.model_args,
         )
 
@@ -350,18 +371,46 @@ class TextToSpeechBulk(TextToSpeechInference):
         if _dataset is None:
             self.log.error("Failed to load dataset.")
             return
-        dataset = _dataset["text"]
+        # Rows keep their index in the whole dataset, it names their audio file
+        rows = select_shard(list(enumerate(_dataset["text"])), shard_index, num_shards, key=lambda row: row[1])
+        if sort_by_length:
+            rows = sorted(rows, key=lambda row: len(row[1]), reverse=True)
 
         # Process the batch of texts
-        for i in range(0, len(dataset), batch_size):
-            batch_texts = dataset[i : i + batch_size]
-            self._process_and_save_batch(batch_texts, i, voice_preset=voice_preset, generate_args=generation_args)
+        for i in range(0, len(rows), batch_size):
+            batch_indices, batch_texts = zip(*rows[i : i + batch_size])
+            self._process_and_save_batch(
+                list(batch_texts),
+                i,
+                voice_preset=voice_preset,
+                generate_args=generation_args,
+                row_indices=list(batch_indices),
+            )
 
         # Finalize
         self._done()
 
+    def merge_shards(self, num_shards: int, **kwargs: Any) -> None:
+        """
+        Merges the outputs of a job run as `num_shards` shards into one result set in the output folder.
+
+        Args:
+            num_shards (int): The number of shards the job was split into.
+            **kwargs: Arbitrary keyword arguments.
+        """
+        result = merge_shards(self.output.output_folder, num_shards)
+        if result["missing_shards"]:
+            self.log.warning(f"Shards without output: {result['missing_shards']}")
+        self.log.info(f"Merged {num_shards} shards, {len(result['copied'])} audio files.")
+        self._done()
+
     def _process_and_save_batch(
-        self, batch_texts: List[str], batch_idx: int, voice_preset: str, generate_args: dict
+        self,
+        batch_texts: List[str],
+        batch_idx: int,
+        voice_preset: str,
+        generate_args: dict,
+        row_indices: Optional[List[int]] = None,
     ) -> None:
         """
         Processes a batch of texts and saves the synthesized speech.
@@ -371,10 +420,30 @@ class TextToSpeechBulk(TextToSpeechInference):
             batch_idx (int): The batch index.
             voice_preset (str): The voice preset to use for synthesis.
             generate_args (dict): Additional arguments for the synthesis process.
+            row_indices (Optional[List[int]]): The index of every text in the dataset, defaults to consecutive
+                indices starting at `batch_idx`.
         """
+        if row_indices is None:
+            row_indices = list(range(batch_idx, batch_idx + len(batch_texts)))
         results = []
 
-        for text_data in batch_texts:
+        # MMS models synthesize the whole batch in one padded forward pass
+        if self.model.config.model_type == "vits" and len(batch_texts) > 1:
+            sample_rate = (
+                self.model.generation_config.sample_rate
+                if hasattr(self.model.generation_config, "sample_rate")
+                else 16_000
+            )
+            waveforms = self.process_mms_batch(batch_texts, generate_args)
+            for row_index, text_data, audio_output in zip(row_indices, batch_texts, waveforms):
+                audio_file = convert_waveform_to_audio_file(
+                    audio_output, format=self.output_type, sample_rate=sample_rate
+                )
+                results.append({"index": row_index, "text": text_data, "audio": audio_file})
+            self.save_speech_to_wav(results, batch_idx)
+            return
+
+        for row_index, text_data in zip(row_indices, batch_texts):
             # Perform inference
             if self.model.config.model_type == "vits":
                 audio_output = self.process_mms(text_data, generate_args=generate_args)
@@ -395,20 +464,20 @@ class TextToSpeechBulk(TextToSpeechInference):
             )
             audio_file = convert_waveform_to_audio_file(audio_output, format=self.output_type, sample_rate=sample_rate)
 
-            results.append({"text": text_data, "audio": audio_file})
+            results.append({"index": row_index, "text": text_data, "audio": audio_file})
 
         self.save_speech_to_wav(results, batch_idx)
 
     def save_speech_to_wav(self, results: List[dict], batch_idx: int) -> None:
         """
-        Saves synthesized speech tensor to a WAV file.
+        Saves the synthesized speech of a batch, one file per text named after the index of the text in the dataset,
+        e.g. `00000042.mp3`. Texts sharing a prefix never overwrite each other and the files sort in input order.
 
         Args:
-            speech (Tensor): The speech tensor output from the TTS model.
-            file_path (str): The file path where the WAV file will be saved.
+            results (List[dict]): The "index", "text" and encoded "audio" of every text of the batch.
+            batch_idx (int): The batch index.
         """
-        # Assuming the speech tensor is in the format expected by torchaudio
         for result in results:
-            file_name = result["text"].replace(" ", "_") + "." + self.output_type
-            with open(f"{self.output.output_folder}/{file_name[:20]}", "wb") as f:
+            file_name = f"{result['index']:08d}.{self.output_type}"
+            with open(os.path.join(self.output_path, file_name), "wb") as f:
                 f.write(result["audio"])
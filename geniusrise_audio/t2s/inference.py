@@ -13,15 +13,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, Iterator, List
 
 import numpy as np
 import torch
-from datasets import load_dataset
 from geniusrise import BatchInput, BatchOutput, State
-from transformers import AutoModelForSeq2SeqLM, AutoProcessor, AutoTokenizer, SpeechT5HifiGan
 
 from geniusrise_audio.base import AudioBulk
+from geniusrise_audio.t2s.util import split_sentences
+
+if TYPE_CHECKING:
+    from transformers import AutoModelForSeq2SeqLM, AutoProcessor, AutoTokenizer
 
 
 class _TextToSpeechInference:
@@ -39,9 +41,9 @@ class _TextToSpeechInference:
         device_map (str | Dict | None): Device mapping for model execution.
     """
 
-    model: AutoModelForSeq2SeqLM
-    tokenizer: AutoTokenizer
-    processor: AutoProcessor
+    model: "AutoModelForSeq2SeqLM"
+    tokenizer: "AutoTokenizer"
+    processor: "AutoProcessor"
     vocoder = None
     embeddings_dataset = None
     use_cuda: bool
@@ -69,6 +71,43 @@ class _TextToSpeechInference:
         waveform = outputs.waveform[0].cpu().numpy().squeeze()
         return waveform
 
+    def process_mms_batch(self, text_inputs: List[str], generate_args: dict) -> List[np.ndarray]:
+        """
+        Processes a batch of text inputs with the MMS model in a single padded forward pass.
+
+        Args:
+            text_inputs (List[str]): The input texts for speech synthesis.
+            generate_args (Dict[str, Any]): Additional arguments for speech synthesis.
+
+        Returns:
+            List[np.ndarray]: The synthesized speech waveforms, trimmed to their own length.
+        """
+        inputs = self.processor(text_inputs, return_tensors="pt", padding=True)
+
+        if self.use_cuda:
+            inputs = inputs.to(self.device_map)
+
+        with torch.no_grad():
+            outputs = self.model(**inputs, **generate_args)
+
+        waveforms = outputs.waveform.cpu().numpy()
+        lengths = outputs.sequence_lengths.cpu().tolist()
+        return [waveform[: int(length)] for waveform, length in zip(waveforms, lengths)]
+
+    def stream_mms(self, text_input: str, generate_args: dict) -> Iterator[np.ndarray]:
+        """
+        Processes text input with the MMS model one sentence at a time.
+
+        Args:
+            text_input (str): The input text for speech synthesis.
+            generate_args (Dict[str, Any]): Additional arguments for speech synthesis.
+
+        Yields:
+            np.ndarray: The synthesized speech waveform of each sentence.
+        """
+        for chunk in split_sentences(text_input):
+            yield self.process_mms(chunk, generate_args)
+
     def process_bark(self, text_input: str, voice_preset: str, generate_args: dict) -> np.ndarray:
         """
         Processes text input with the BARK model.
@@ -81,11 +120,23 @@ class _TextToSpeechInference:
         Returns:
             np.ndarray: The synthesized speech waveform.
         """
+        return np.concatenate(list(self.stream_bark(text_input, voice_preset, generate_args)))
+
+    def stream_bark(self, text_input: str, voice_preset: str, generate_args: dict) -> Iterator[np.ndarray]:
+        """
+        Processes text input with the BARK model one sentence at a time.
+
+        Args:
+            text_input (str): The input text for speech synthesis.
+            voice_preset (str): The voice preset to use for synthesis.
+            generate_args (Dict[str, Any]): Additional arguments for speech synthesis.
+
+        Yields:
+            np.ndarray: The synthesized speech waveform of each sentence.
+        """
         # Process the input text with the selected voice preset
         # Presets here: https://suno-ai.notion.site/8b8e8749ed514b0cbf3f699013548683?v=bc67cff786b04b50b3ceb756fd05f68c
-        chunks = text_input.split(".")
-        audio_arrays: List[np.ndarray] = []
-        for chunk in chunks:
+        for chunk in split_sentences(text_input):
             inputs = self.processor(chunk, voice_preset=voice_preset, return_tensors="pt", return_attention_mask=True)
 
             if self.use_cuda:
@@ -94,10 +145,7 @@ class _TextToSpeechInference:
             # Generate the audio waveform
             with torch.no_grad():
                 audio_array = self.model.generate(**inputs, **generate_args, min_eos_p=0.05)
-                audio_array = audio_array.cpu().numpy().squeeze()
-                audio_arrays.append(audio_array)
-
-        return np.concatenate(audio_arrays)
+            yield audio_array.cpu().numpy().squeeze()
 
     def process_speecht5_tts(self, text_input: str, voice_preset: str, generate_args: dict) -> np.ndarray:
         """
@@ -111,33 +159,48 @@ class _TextToSpeechInference:
         Returns:
             np.ndarray: The synthesized speech waveform.
         """
+        return np.concatenate(list(self.stream_speecht5_tts(text_input, voice_preset, generate_args)))
+
+    def stream_speecht5_tts(self, text_input: str, voice_preset: str, generate_args: dict) -> Iterator[np.ndarray]:
+        """
+        Processes text input with the SpeechT5-TTS model one sentence at a time.
+
+        Args:
+            text_input (str): The input text for speech synthesis.
+            voice_preset (str): The voice preset to use for synthesis.
+            generate_args (Dict[str, Any]): Additional arguments for speech synthesis.
+
+        Yields:
+            np.ndarray: The synthesized speech waveform of each sentence.
+        """
         if not self.vocoder:
+            from transformers import SpeechT5HifiGan
+
             self.vocoder = SpeechT5HifiGan.from_pretrained("microsoft/speecht5_hifigan")
             if self.use_cuda:
                 self.vocoder = self.vocoder.to(self.device_map)  # type: ignore
         if not self.embeddings_dataset:
+            from datasets import load_dataset
+
             # use the CMU arctic dataset for voice presets
             self.embeddings_dataset = load_dataset(
                 "Matthijs/cmu-arctic-xvectors", split="validation", revision="01090996e2ec93b238f194db1ff9c184ed741b07"
             )
 
-        chunks = text_input.split(".")
-        audio_arrays: List[np.ndarray] = []
-        for chunk in chunks:
+        speaker_embeddings = torch.tensor(self.embeddings_dataset[int(voice_preset)]["xvector"]).unsqueeze(0)  # type: ignore
+        if self.use_cuda:
+            speaker_embeddings = speaker_embeddings.to(self.device_map)  # type: ignore
+
+        for chunk in split_sentences(text_input):
             inputs = self.processor(text=chunk, return_tensors="pt")
-            speaker_embeddings = torch.tensor(self.embeddings_dataset[int(voice_preset)]["xvector"]).unsqueeze(0)  # type: ignore
 
             if self.use_cuda:
                 inputs = inputs.to(self.device_map)
-                speaker_embeddings = speaker_embeddings.to(self.device_map)  # type: ignore
 
             with torch.no_grad():
                 # Generate speech tensor
                 speech = self.model.generate_speech(inputs["input_ids"], speaker_embeddings, vocoder=self.vocoder)
-                audio_output = speech.cpu().numpy().squeeze()
-                audio_arrays.append(audio_output)
-
-        return np.concatenate(audio_arrays)
+            yield speech.cpu().numpy().squeeze()
 
     def process_seamless(self, text_input: str, voice_preset: str, generate_args: dict) -> np.ndarray:
         """
@@ -151,19 +214,27 @@ class _TextToSpeechInference:
         Returns:
             np.ndarray: The synthesized speech waveform.
         """
-        # Splitting the input text into chunks based on full stops to manage long text inputs
-        chunks = text_input.split(".")
-        audio_arrays: List[np.ndarray] = []
-
-        for chunk in chunks:
-            inputs = self.processor(
-                text=chunk,
-                return_tensors="pt",
-                src_lang="eng" if "src_lang" not in generate_args else generate_args["src_lang"],
-            )
+        return np.concatenate(list(self.stream_seamless(text_input, voice_preset, generate_args)))
 
-            if "src_lang" in generate_args:
-                del generate_args["src_lang"]
+    def stream_seamless(self, text_input: str, voice_preset: str, generate_args: dict) -> Iterator[np.ndarray]:
+        """
+        Processes text input with the Seamless model one sentence at a time.
+
+        Args:
+            text_input (str): The input text for speech synthesis.
+            voice_preset (str): The voice preset to use for synthesis.
+            generate_args (Dict[str, Any]): Additional arguments for speech synthesis.
+
+        Yields:
+            np.ndarray: The synthesized speech waveform of each sentence.
+        """
+        # The source language is a processor argument, every sentence is in the same language
+        generate_args = generate_args.copy()
+        src_lang = generate_args.pop("src_lang", "eng")
+
+        # Splitting the input text into chunks based on full stops to manage long text inputs
+        for chunk in split_sentences(text_input):
+            inputs = self.processor(text=chunk, return_tensors="pt", src_lang=src_lang)
 
             if self.use_cuda:
                 inputs = inputs.to(self.device_map)
@@ -173,10 +244,7 @@ class _TextToSpeechInference:
                 # Seamless M4T v2 specific generation code
                 outputs = self.model.generate(inputs.input_ids, speaker_id=int(voice_preset), **generate_args)[0]
 
-            audio_array = outputs.cpu().numpy().squeeze()
-            audio_arrays.append(audio_array)
-
-        return np.concatenate(audio_arrays)
+            yield outputs.cpu().numpy().squeeze()
 
 
 class TextToSpeechInference(AudioBulk, _TextToSpeechInference):
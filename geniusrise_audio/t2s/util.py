@@ -14,12 +14,44 @@
 # limitations under the License.
 
 import io
+import struct
+from typing import Iterable, Iterator, List
 
 import numpy as np
 import pydub
 import soundfile as sf
 import torch
 
+# Content types of the output formats supported by `convert_waveform_to_audio_file`
+AUDIO_MIME_TYPES = {
+    "wav": "audio/wav",
+    "mp3": "audio/mpeg",
+    "flac": "audio/flac",
+    "ogg": "audio/ogg",
+    "aac": "audio/aac",
+    "wma": "audio/x-ms-wma",
+    "m4a": "audio/mp4",
+    "opus": "audio/opus",
+    "ac3": "audio/ac3",
+}
+
+# Formats whose files can be concatenated into one playable stream, each chunk of a stream is encoded on its own
+STREAMABLE_FORMATS = ["wav", "mp3", "ogg", "aac", "opus"]
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Splits text on full stops into the sentences that are synthesized one at a time.
+
+    Args:
+        text (str): The input text.
+
+    Returns:
+        List[str]: The non-empty sentences, or the text itself if it has none.
+    """
+    sentences = [sentence for sentence in text.split(".") if sentence.strip()]
+    return sentences if sentences else [text]
+
 
 def convert_waveform_to_audio_file(
     waveform: torch.Tensor | np.ndarray, format: str = "wav", sample_rate: int = 16_000
@@ -61,3 +93,56 @@ def convert_waveform_to_audio_file(
         converted_audio = buffer.read()
 
     return converted_audio
+
+
+def wav_stream_header(sample_rate: int, channels: int = 1) -> bytes:
+    """
+    Builds the header of a 16 bit PCM WAV file of unknown length, for streaming.
+
+    Args:
+        sample_rate (int): The sample rate of the audio.
+        channels (int): The number of channels.
+
+    Returns:
+        bytes: The RIFF header, with the RIFF and data sizes set to the maximum as the length is not known yet.
+    """
+    block_align = channels * 2
+    return (
+        struct.pack("<4sI4s", b"RIFF", 0xFFFFFFFF, b"WAVE")
+        + struct.pack("<4sIHHIIHH", b"fmt ", 16, 1, channels, sample_rate, sample_rate * block_align, block_align, 16)
+        + struct.pack("<4sI", b"data", 0xFFFFFFFF)
+    )
+
+
+def encode_waveform_stream(
+    waveforms: Iterable[torch.Tensor | np.ndarray], format: str = "wav", sample_rate: int = 16_000
+) -> Iterator[bytes]:
+    """
+    Encodes waveforms into a single audio stream as they are produced, e.g. one sentence at a time.
+
+    WAV streams are a header followed by raw 16 bit PCM. The other formats in `STREAMABLE_FORMATS` encode every
+    waveform into its own file, which players decode as one concatenated stream.
+
+    Args:
+        waveforms (Iterable[torch.Tensor | np.ndarray]): The waveforms, in order.
+        format (str): Desired audio format, one of `STREAMABLE_FORMATS`.
+        sample_rate (int): The sample rate of the audio.
+
+    Yields:
+        bytes: The encoded stream, one part per waveform.
+    """
+    if format not in STREAMABLE_FORMATS:
+        raise ValueError(f"Unsupported streaming audio format: {format}. Supported formats are {STREAMABLE_FORMATS}.")
+
+    # The WAV header goes out with the first waveform
+    header = wav_stream_header(sample_rate) if format == "wav" else b""
+    for waveform in waveforms:
+        if format == "wav":
+            audio_numpy = waveform.cpu().numpy() if type(waveform) is torch.Tensor else waveform
+            yield header + (np.clip(audio_numpy, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+            header = b""
+        else:
+            yield convert_waveform_to_audio_file(waveform, format=format, sample_rate=sample_rate)
+
+    if header:
+        yield header
@@ -14,13 +14,16 @@
 # limitations under the License.
 
 import tempfile
+import threading
 import time
 
+import cherrypy
 import pytest
 import requests  # type: ignore
 from geniusrise.core import BatchInput, BatchOutput, InMemoryState
 
 from geniusrise_audio.base.api import AudioAPI
+from geniusrise_audio.base.registry import ModelRegistry
 
 
 @pytest.fixture(scope="module")
@@ -73,8 +76,6 @@ def test_listen(
     password,
 ):
     # Start the API server in a separate thread
-    import threading
-
     server_thread = threading.Thread(
         target=audio_api.listen,
         kwargs={
@@ -112,3 +113,113 @@ def test_listen(
         assert response.status_code == 404
     except requests.exceptions.RequestException as e:
         pytest.fail(f"API request failed: {e}")
+
+
+def test_inference_slot(audio_api):
+    audio_api.inference_semaphore = threading.BoundedSemaphore(1)
+    audio_api.max_queued_queries = 1
+
+    holding = threading.Event()
+    release = threading.Event()
+
+    def hold_slot():
+        with audio_api.inference_slot():
+            holding.set()
+            release.wait(timeout=10)
+
+    def wait_for_slot():
+        with audio_api.inference_slot():
+            pass
+
+    holder = threading.Thread(target=hold_slot)
+    holder.start()
+    holding.wait(timeout=10)
+
+    # One request may wait for the slot, the next one is rejected
+    waiter = threading.Thread(target=wait_for_slot)
+    waiter.start()
+    while audio_api.queued_queries < 1:
+        time.sleep(0.01)
+
+    with pytest.raises(cherrypy.HTTPError) as e:
+        with audio_api.inference_slot():
+            pass
+    assert e.value.status == 429
+
+    release.set()
+    holder.join()
+    waiter.join()
+    assert audio_api.queued_queries == 0
+
+
+def test_serving_model(audio_api):
+    def load(name):
+        return {
+            "model": f"model-{name}",
+            "processor": f"processor-{name}",
+            "model_name": name,
+            "model_revision": None,
+            "processor_name": name,
+            "processor_revision": None,
+        }
+
+    audio_api.model = "model-default"
+    audio_api.model_name = "default"
+    audio_api.default_model = "default"
+    audio_api.served_models = ["default", "small", "large"]
+    audio_api.models = ModelRegistry(load_fn=load, max_models=1, sizeof=lambda attributes: 0)
+
+    seen = {}
+
+    def serve(name):
+        with audio_api.serving_model(name):
+            time.sleep(0.05)
+            seen[name] = (audio_api.model, audio_api.model_name, audio_api.served_model)
+
+    # Concurrent requests each see their own model
+    threads = [threading.Thread(target=serve, args=(name,)) for name in ["small", "large", None]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert seen["small"] == ("model-small", "small", "small")
+    assert seen["large"] == ("model-large", "large", "large")
+    assert seen[None] == ("model-default", "default", "default")
+    assert audio_api.model == "model-default"
+
+    # Only one of the extra models stays loaded
+    assert len(audio_api.models.loaded()) == 1
+
+    with pytest.raises(cherrypy.HTTPError) as e:
+        with audio_api.serving_model("unknown"):
+            pass
+    assert e.value.status == 404
+
+
+def test_warmup(audio_api):
+    calls = []
+
+    def warmup(sizes):
+        calls.append((audio_api.served_model, sizes, audio_api.cache))
+        raise RuntimeError("warmup failed")
+
+    audio_api.is_ready = False
+    audio_api.default_model = "default"
+    audio_api.models = None
+    audio_api.cache = "cache"
+    audio_api.warmup = warmup
+
+    with pytest.raises(cherrypy.HTTPError) as e:
+        audio_api.ready()
+    assert e.value.status == 503
+
+    # Failures are logged, warmup results are not cached
+    audio_api.run_warmup([1.0, 5.0])
+    assert calls == [("default", [1.0, 5.0], None)]
+    assert audio_api.cache == "cache"
+
+    audio_api.is_ready = True
+    assert audio_api.ready()["ready"]
+
+    audio_api.cache = None
+    del audio_api.warmup
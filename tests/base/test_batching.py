@@ -0,0 +1,72 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+import pytest
+
+from geniusrise_audio.base.batching import MicroBatcher
+
+
+@pytest.mark.parametrize(
+    "num_requests, max_batch_size, max_wait_ms",
+    [
+        # fmt: off
+        (1, 8, 10),
+        (16, 4, 50),
+        (10, 8, 100),
+        # fmt: on
+    ],
+)
+def test_micro_batcher(num_requests, max_batch_size, max_wait_ms):
+    batches = []
+
+    def batch_fn(key, items):
+        batches.append((key, list(items)))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    results = {}
+
+    def request(i):
+        results[i] = batcher.submit(i % 2, i).result(timeout=10)
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(num_requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+
+    assert results == {i: i * 2 for i in range(num_requests)}
+    assert all(len(items) <= max_batch_size for _, items in batches)
+    assert all(item % 2 == key for key, items in batches for item in items)
+    if num_requests > 1:
+        assert len(batches) < num_requests
+
+
+def test_micro_batcher_errors():
+    def batch_fn(key, items):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait_ms=1)
+    future = batcher.submit("key", 1)
+    with pytest.raises(ValueError):
+        future.result(timeout=10)
+
+    start = time.monotonic()
+    batcher.close()
+    assert time.monotonic() - start < 5
@@ -0,0 +1,76 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+
+from geniusrise_audio.base.cache import FileStore, ResultCache, SQLiteStore, cache_key
+
+
+def test_cache_key():
+    assert cache_key("model", "text", {"a": 1, "b": 2}) == cache_key("model", "text", {"b": 2, "a": 1})
+    assert cache_key("model", "text", None) != cache_key("model", "text ", None)
+    assert cache_key(b"\x00\x01") != cache_key([0, 1])
+
+
+def test_result_cache_lru():
+    cache = ResultCache(max_memory_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    assert cache.get("a") == b"12345"
+
+    # "b" is the least recently used entry
+    cache.put("c", b"123")
+    assert cache.get("b") is None
+    assert cache.get("c") == b"123"
+
+    # Entries larger than the cache are not kept
+    cache.put("d", b"x" * 11)
+    assert cache.get("d") is None
+    assert cache.stats() == {"memory_hits": 2, "store_hits": 0, "misses": 2, "memory_entries": 2, "memory_bytes": 8}
+
+
+def test_file_store():
+    directory = tempfile.mkdtemp()
+    store = FileStore(directory, max_bytes=10)
+    store.put("a", b"12345")
+    store.put("b", b"12345")
+    assert store.get("a") == b"12345"
+    store.put("c", b"123")
+    assert store.get("b") is None
+    assert sorted(os.listdir(directory)) == ["a", "c"]
+
+    # Files are picked up again on restart, and promoted to memory on a hit
+    cache = ResultCache(max_memory_bytes=100, store=FileStore(directory, max_bytes=10))
+    assert cache.get("a") == b"12345"
+    assert cache.get("a") == b"12345"
+    assert cache.stats()["store_hits"] == 1 and cache.stats()["memory_hits"] == 1
+
+
+def test_sqlite_store():
+    path = os.path.join(tempfile.mkdtemp(), "cache.sqlite")
+    store = SQLiteStore(path, max_bytes=100)
+    store.put("a", {"transcription": "hello", "segments": []})
+    store.put("b", {"transcription": "world", "segments": []})
+    assert store.get("a") == {"transcription": "hello", "segments": []}
+
+    # Each entry takes up 42 bytes, "b" is the least recently used one
+    store.put("c", {"transcription": "again", "segments": []})
+    assert store.get("b") is None
+    store.close()
+
+    store = SQLiteStore(path)
+    assert store.get("c") == {"transcription": "again", "segments": []}
+    assert store.get("a") == {"transcription": "hello", "segments": []}
@@ -0,0 +1,61 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+LAZY_MODULES = [
+    "geniusrise_audio.s2t",
+    "geniusrise_audio.t2s",
+    "transformers",
+    "faster_whisper",
+    "whispercpp",
+    "datasets",
+    "onnxruntime",
+    "pyarrow",
+    "soundfile",
+]
+
+
+def loaded_modules(statement: str):
+    # A fresh interpreter, the test session has imported everything already
+    code = f"import json, sys\n{statement}\nprint(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+@pytest.mark.parametrize("module", LAZY_MODULES)
+def test_import_is_lazy(module):
+    assert module not in loaded_modules("import geniusrise_audio")
+
+
+def test_s2t_import_is_lazy():
+    # Output formats and header probing load their libraries on use
+    assert "pyarrow" not in loaded_modules("from geniusrise_audio.s2t.util import decode_audio")
+
+
+def test_lazy_attributes():
+    modules = loaded_modules("from geniusrise_audio import SpeechToTextBulk")
+    assert "geniusrise_audio.s2t" in modules
+    assert "geniusrise_audio.t2s" not in modules
+
+    import geniusrise_audio
+
+    assert "TextToSpeechAPI" in dir(geniusrise_audio)
+    with pytest.raises(AttributeError):
+        geniusrise_audio.NotABolt
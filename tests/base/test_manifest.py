@@ -0,0 +1,50 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+
+from geniusrise_audio.base.manifest import Manifest
+
+
+def test_manifest():
+    directory = tempfile.mkdtemp()
+    audio_file = os.path.join(directory, "a.wav")
+    with open(audio_file, "wb") as f:
+        f.write(b"audio")
+
+    manifest = Manifest(os.path.join(directory, "manifest.jsonl"))
+    assert not manifest.is_done("a.wav", audio_file)
+    manifest.record([Manifest.entry("a.wav", audio_file, "predictions-0.json")])
+
+    # A crashed run may leave a partial line behind
+    with open(manifest.path, "a") as f:
+        f.write('{"input": "b.wav", "si')
+
+    manifest = Manifest(manifest.path)
+    assert manifest.is_done("a.wav", audio_file, incremental=True)
+    assert not manifest.is_done("b.wav", os.path.join(directory, "b.wav"))
+    assert manifest.records["a.wav"]["output"] == "predictions-0.json"
+
+    manifest.record([Manifest.entry("a.wav", audio_file, "predictions-1.json")])
+    assert Manifest(manifest.path).records["a.wav"]["output"] == "predictions-1.json"
+
+    # Touched files with the same contents are still done, changed files are not
+    os.utime(audio_file, (0, 0))
+    assert manifest.is_done("a.wav", audio_file, incremental=True)
+    with open(audio_file, "wb") as f:
+        f.write(b"other")
+    assert manifest.is_done("a.wav", audio_file)
+    assert not manifest.is_done("a.wav", audio_file, incremental=True)
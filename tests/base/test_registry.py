@@ -0,0 +1,131 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+import pytest
+
+from geniusrise_audio.base.registry import ModelRegistry
+
+SIZES = {"tiny": 10, "small": 30, "medium": 60, "large": 100}
+
+
+class Loader:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, name):
+        with self.lock:
+            self.calls.append(name)
+        time.sleep(self.delay)
+        if name == "broken":
+            raise RuntimeError("cannot load")
+        return {"name": name, "size": SIZES[name]}
+
+
+def create_registry(loader, **kwargs):
+    evicted = []
+    registry = ModelRegistry(load_fn=loader, sizeof=lambda model: model["size"], on_evict=evicted.append, **kwargs)
+    return registry, evicted
+
+
+def test_concurrent_loads_collapse():
+    loader = Loader(delay=0.2)
+    registry, _ = create_registry(loader)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("small"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loader.calls == ["small"]
+    assert len(results) == 8 and all(result is results[0] for result in results)
+    assert registry.stats()["loads"] == 1
+
+
+def test_lru_eviction_by_memory():
+    loader = Loader()
+    registry, evicted = create_registry(loader, max_memory_bytes=100)
+
+    registry.get("tiny")
+    registry.get("small")
+    registry.get("medium")
+    assert evicted == []
+
+    # Using tiny makes small the least recently used model
+    registry.get("tiny")
+    registry.get("large")
+    assert evicted == ["small", "medium", "tiny"]
+    assert registry.loaded() == ["large"]
+    assert registry.stats()["bytes"] == 100
+
+
+def test_lru_eviction_by_count():
+    loader = Loader()
+    registry, evicted = create_registry(loader, max_models=2)
+
+    for name in ["tiny", "small", "medium"]:
+        registry.get(name)
+    assert evicted == ["tiny"]
+    assert registry.loaded() == ["small", "medium"]
+
+
+def test_pinned_and_used_models_stay():
+    loader = Loader()
+    registry, evicted = create_registry(loader, max_memory_bytes=50, max_models=1)
+
+    registry.pin("medium")
+    with registry.acquire("small") as model:
+        assert model["name"] == "small"
+        registry.get("tiny")
+        # small is in use, tiny goes instead
+        assert evicted == ["tiny"]
+    assert evicted == ["tiny", "small"]
+    assert registry.loaded() == ["medium"]
+
+    registry.unpin("medium")
+    assert registry.loaded() == []
+
+
+def test_failed_load():
+    loader = Loader(delay=0.1)
+    registry, _ = create_registry(loader)
+
+    errors = []
+
+    def get():
+        try:
+            registry.get("broken")
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=get) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 4
+    assert registry.loaded() == []
+
+    # The failure is not cached
+    with pytest.raises(RuntimeError):
+        registry.get("broken")
+    assert len(loader.calls) >= 2
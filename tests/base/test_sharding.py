@@ -0,0 +1,86 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from geniusrise_audio.base.sharding import merge_shards, select_shard, shard_folder, shard_of
+from geniusrise_audio.base.sinks import create_sink
+
+SCHEMA = pa.schema([("input", pa.string()), ("transcription", pa.string())])
+
+
+@pytest.mark.parametrize("num_shards", [1, 2, 3, 8])
+def test_select_shard(num_shards):
+    files = [f"speaker-{i}/{i}.wav" for i in range(100)]
+    shards = [select_shard(files, i, num_shards) for i in range(num_shards)]
+
+    # Every file is in exactly one shard, in the original order
+    assert sorted(f for shard in shards for f in shard) == sorted(files)
+    for shard in shards:
+        assert shard == [f for f in files if f in shard]
+
+    # The assignment does not depend on the other files of the job
+    assert all(shard_of(f, num_shards) == i for i, shard in enumerate(shards) for f in shard)
+
+
+@pytest.mark.parametrize("shard_index,num_shards", [(-1, 2), (2, 2), (0, 0)])
+def test_select_shard_invalid(shard_index, num_shards):
+    with pytest.raises(ValueError):
+        select_shard(["a.wav"], shard_index, num_shards)
+
+
+def test_merge_shards():
+    output_path = tempfile.mkdtemp()
+    files = [f"{i}.wav" for i in range(20)]
+    num_shards = 3
+
+    for i in range(num_shards):
+        path = shard_folder(output_path, i, num_shards)
+        os.makedirs(path)
+        shard = select_shard(files, i, num_shards)
+        with open(os.path.join(path, "predictions-0-x.json"), "w") as f:
+            json.dump([{"input": name, "prediction": "hello"} for name in shard], f)
+        with open(os.path.join(path, "manifest.jsonl"), "w") as f:
+            f.writelines(json.dumps({"input": name}) + "\n" for name in shard)
+        sink = create_sink("parquet", path, schema=SCHEMA)
+        sink.write([{"input": name, "transcription": "hello"} for name in shard])
+        sink.close()
+        with open(os.path.join(path, f"{i}.mp3"), "wb") as f:
+            f.write(b"audio")
+
+    result = merge_shards(output_path, num_shards)
+    assert result["missing_shards"] == []
+    assert len(result["copied"]) == num_shards
+
+    with open(os.path.join(output_path, "predictions-merged.json")) as f:
+        assert sorted(row["input"] for row in json.load(f)) == sorted(files)
+    with open(os.path.join(output_path, "manifest.jsonl")) as f:
+        assert sorted(json.loads(line)["input"] for line in f) == sorted(files)
+    table = pq.read_table(os.path.join(output_path, "predictions-merged.parquet"))
+    assert sorted(table.column("input").to_pylist()) == sorted(files)
+    assert all(os.path.exists(os.path.join(output_path, f"{i}.mp3")) for i in range(num_shards))
+
+
+def test_merge_shards_missing():
+    output_path = tempfile.mkdtemp()
+    os.makedirs(shard_folder(output_path, 0, 2))
+    result = merge_shards(output_path, 2)
+    assert result["missing_shards"] == [shard_folder(output_path, 1, 2)]
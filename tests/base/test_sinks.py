@@ -0,0 +1,104 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import glob
+import json
+import os
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from geniusrise_audio.base.sinks import PredictionSink, create_sink, transcription_schema
+
+SCHEMA = pa.schema([("input", pa.string()), ("transcription", pa.string())])
+
+
+def test_jsonl_sink():
+    output_path = tempfile.mkdtemp()
+    sink = create_sink("jsonl", output_path, max_file_bytes=100)
+
+    committed = []
+    for i in range(10):
+        committed.extend(sink.write([{"input": f"{i}.wav", "transcription": "hello world"}], keys=[i]))
+    committed.extend(sink.close())
+
+    # Rows are committed as soon as they are written, files rotate by size
+    assert [key for key, _ in committed] == list(range(10))
+    assert len(sink.files) > 1
+    rows = [json.loads(line) for path in sink.files for line in open(path)]
+    assert [row["input"] for row in rows] == [f"{i}.wav" for i in range(10)]
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_columnar_sink(format):
+    output_path = tempfile.mkdtemp()
+    sink = create_sink(format, output_path, schema=SCHEMA, row_group_size=4, max_file_bytes=1)
+
+    committed = []
+    for i in range(10):
+        committed.extend(sink.write([{"input": f"{i}.wav", "transcription": "hello world"}], keys=[i]))
+    # Rows are committed once their file is closed
+    assert [key for key, _ in committed] == list(range(8))
+    committed.extend(sink.close())
+    assert [key for key, _ in committed] == list(range(10))
+
+    files = sorted(glob.glob(os.path.join(output_path, f"*.{format}")))
+    assert len(files) == 3
+    if format == "parquet":
+        table = pa.concat_tables([pq.read_table(f) for f in files])
+    else:
+        table = pa.concat_tables([pa.ipc.open_file(f).read_all() for f in files])
+    assert table.schema == SCHEMA
+    assert table.column("input").to_pylist() == [f"{i}.wav" for i in range(10)]
+
+
+def test_transcription_schema():
+    output_path = tempfile.mkdtemp()
+    sink = create_sink("parquet", output_path, schema=transcription_schema())
+    row = {
+        "input": "a.wav",
+        "transcription": "hello world",
+        "segments": [{"text": "hello world", "start": 0.0, "end": 1.5}],
+        "audio_duration": 1.5,
+        "inference_time": 0.1,
+        "model": "openai/whisper-small",
+        "model_revision": None,
+        "backend": "hf",
+    }
+    sink.write([row], keys=[0])
+    sink.close()
+
+    assert pq.read_table(sink.files[0]).to_pylist() == [row]
+
+
+def test_unsupported_sink():
+    with pytest.raises(ValueError):
+        create_sink("csv", tempfile.mkdtemp())
+    with pytest.raises(ValueError):
+        create_sink("parquet", tempfile.mkdtemp())
+
+
+def test_incomplete_sink():
+    class NoCloseSink(PredictionSink):
+        def write(self, rows, keys=None):
+            return []
+
+    # Sinks missing a method fail when they are created, not partway through a job
+    with pytest.raises(TypeError):
+        NoCloseSink(tempfile.mkdtemp())
+    with pytest.raises(TypeError):
+        PredictionSink(tempfile.mkdtemp())
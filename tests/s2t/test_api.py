@@ -14,12 +14,17 @@
 # limitations under the License.
 
 import base64
+import io
 import os
 import tempfile
+import threading
 import time
+from contextlib import contextmanager
 
+import numpy as np
 import pytest
 import requests  # type: ignore
+import soundfile as sf
 from geniusrise.core import BatchInput, BatchOutput, InMemoryState
 
 from geniusrise_audio import SpeechToTextAPI
@@ -80,8 +85,6 @@ def test_transcribe(
     use_faster_whisper,
 ):
     # Start the API server in a separate thread
-    import threading
-
     server_thread = threading.Thread(
         target=speech_to_text_api.listen,
         kwargs={
@@ -143,3 +146,177 @@ def test_transcribe(
         assert "transcriptions" in response.json()
     except requests.exceptions.RequestException as e:
         pytest.fail(f"API request failed: {e}")
+
+
+@pytest.mark.parametrize(
+    "model_name, model_class, processor_class, use_cuda, precision, device_map, port, multipart",
+    [
+        # fmt: off
+        ("facebook/wav2vec2-large-960h-lv60-self", "Wav2Vec2ForCTC", "Wav2Vec2Processor", False, "float32", None, 3005, False),
+        ("openai/whisper-small", "WhisperForConditionalGeneration", "AutoProcessor", False, "float32", None, 3006, True),
+        # fmt: on
+    ],
+)
+def test_transcribe_raw(
+    speech_to_text_api, model_name, model_class, processor_class, use_cuda, precision, device_map, port, multipart
+):
+    server_thread = threading.Thread(
+        target=speech_to_text_api.listen,
+        kwargs={
+            "model_name": model_name,
+            "model_class": model_class,
+            "processor_class": processor_class,
+            "use_cuda": use_cuda,
+            "precision": precision,
+            "device_map": device_map,
+            "endpoint": "*",
+            "port": port,
+        },
+    )
+    server_thread.start()
+    time.sleep(5)
+
+    url = f"http://localhost:{port}/api/v1/transcribe_raw"
+    with open("./assets/sample.flac", "rb") as audio_file:
+        audio_bytes = audio_file.read()
+
+    try:
+        if multipart:
+            # Text fields lose their raw bytes, only file uploads are accepted
+            response = requests.post(url, data={"audio_file": audio_bytes.decode("latin-1")})
+            assert response.status_code == 400
+            response = requests.post(url, files={"audio_file": audio_bytes}, data={"model_sampling_rate": "16000"})
+        else:
+            response = requests.post(
+                url,
+                params={"model_sampling_rate": 16000, "chunk_size": 1280000},
+                data=audio_bytes,
+                headers={"Content-Type": "application/octet-stream"},
+            )
+        response.raise_for_status()
+        assert "transcriptions" in response.json()
+    except requests.exceptions.RequestException as e:
+        pytest.fail(f"API request failed: {e}")
+
+
+def test_transcribe_stream(speech_to_text_api):
+    port = 3007
+    server_thread = threading.Thread(
+        target=speech_to_text_api.listen,
+        kwargs={
+            "model_name": "facebook/wav2vec2-large-960h-lv60-self",
+            "model_class": "Wav2Vec2ForCTC",
+            "processor_class": "Wav2Vec2Processor",
+            "use_cuda": False,
+            "precision": "float32",
+            "device_map": None,
+            "endpoint": "*",
+            "port": port,
+        },
+    )
+    server_thread.start()
+    time.sleep(5)
+
+    url = f"http://localhost:{port}/api/v1/transcribe_stream"
+    audio, sample_rate = sf.read("./assets/sample.flac", dtype="int16")
+    if audio.ndim > 1:
+        audio = audio[:, 0]
+    frame = sample_rate // 2
+
+    try:
+        session_id = None
+        for start in range(0, len(audio), frame):
+            params = {"sample_rate": sample_rate}
+            if session_id:
+                params["session_id"] = session_id
+            response = requests.post(url, params=params, data=audio[start : start + frame].tobytes())
+            response.raise_for_status()
+            session_id = response.json()["session_id"]
+            assert "partial" in response.json()
+
+        response = requests.post(url, params={"session_id": session_id, "end": "true"}, data=b"")
+        response.raise_for_status()
+        assert response.json()["final"]
+        assert response.json()["transcription"]
+    except requests.exceptions.RequestException as e:
+        pytest.fail(f"API request failed: {e}")
+
+
+def test_warmup_ready(speech_to_text_api):
+    port = 3008
+    server_thread = threading.Thread(
+        target=speech_to_text_api.listen,
+        kwargs={
+            "model_name": "facebook/wav2vec2-large-960h-lv60-self",
+            "model_class": "Wav2Vec2ForCTC",
+            "processor_class": "Wav2Vec2Processor",
+            "use_cuda": False,
+            "precision": "float32",
+            "device_map": None,
+            "warmup": True,
+            "warmup_sizes": "1,5",
+            "endpoint": "*",
+            "port": port,
+        },
+    )
+    server_thread.start()
+
+    # The port only opens once the warmup has finished
+    deadline = time.time() + 300
+    while True:
+        try:
+            response = requests.get(f"http://localhost:{port}/api/v1/ready")
+            break
+        except requests.exceptions.ConnectionError:
+            if time.time() > deadline:
+                pytest.fail("API did not start")
+            time.sleep(1)
+
+    assert response.status_code == 200
+    assert response.json()["ready"]
+    assert response.json()["warmup_seconds"] > 0
+
+
+def test_transcribe_vad_batches_regions(speech_to_text_api, monkeypatch):
+    speech_to_text_api.use_whisper_cpp = False
+    speech_to_text_api.use_faster_whisper = False
+    speech_to_text_api.model, speech_to_text_api.processor = speech_to_text_api.load_models(
+        model_name="facebook/wav2vec2-large-960h-lv60-self",
+        processor_name="facebook/wav2vec2-large-960h-lv60-self",
+        model_class="Wav2Vec2ForCTC",
+        processor_class="Wav2Vec2Processor",
+        use_cuda=False,
+        precision="float32",
+        device_map=None,
+    )
+
+    slots = []
+    inference_slot = speech_to_text_api.inference_slot
+
+    @contextmanager
+    def counting_slot(*args, **kwargs):
+        slots.append(1)
+        with inference_slot(*args, **kwargs):
+            yield
+
+    batches = []
+    process_wav2vec2_batch = speech_to_text_api.process_wav2vec2_batch
+
+    def counting_batch(audio_inputs, *args, **kwargs):
+        batches.append(len(audio_inputs))
+        return process_wav2vec2_batch(audio_inputs, *args, **kwargs)
+
+    monkeypatch.setattr(speech_to_text_api, "inference_slot", counting_slot)
+    monkeypatch.setattr(speech_to_text_api, "process_wav2vec2_batch", counting_batch)
+
+    # Two utterances separated by silence give at least two speech regions
+    audio, sample_rate = sf.read("./assets/sample.flac", dtype="float32")
+    silence = np.zeros(2 * sample_rate, dtype=np.float32)
+    buffer = io.BytesIO()
+    sf.write(buffer, np.concatenate([audio, silence, audio]), sample_rate, format="WAV")
+
+    result = speech_to_text_api._transcribe(buffer.getvalue(), {"model_sampling_rate": 16000, "vad": "energy"})
+
+    assert result["transcriptions"]["transcription"]
+    assert slots == [1]
+    assert len(batches) == 1 and batches[0] > 1
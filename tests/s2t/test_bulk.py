@@ -13,7 +13,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import glob
+import json
 import os
+import shutil
 
 import pytest
 from geniusrise.core import BatchInput, BatchOutput, InMemoryState
@@ -41,6 +44,26 @@ def speech_to_text_bulk():
     yield speech_to_text_bulk
 
 
+@pytest.fixture
+def tmp_speech_to_text_bulk(tmp_path):
+    input_dir = tmp_path / "input"
+    output_dir = tmp_path / "output"
+
+    os.makedirs(input_dir, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+
+    input = BatchInput(str(input_dir), "geniusrise-test-bucket", "api_input")
+    output = BatchOutput(str(output_dir), "geniusrise-test-bucket", "api_output")
+    state = InMemoryState(1)
+
+    speech_to_text_bulk = SpeechToTextBulk(
+        input=input,
+        output=output,
+        state=state,
+    )
+    yield speech_to_text_bulk
+
+
 @pytest.mark.parametrize(
     "model_name, model_class, processor_class, use_cuda, precision, quantization, device_map, torchscript, compile, batch_size, notification_email, model_sampling_rate, chunk_size, overlap_size, generation_tgt_lang, use_whisper_cpp, use_faster_whisper",
     [
@@ -98,3 +121,98 @@ def test_transcribe(
     speech_to_text_bulk.transcribe(**input_data)
 
     # TODO: read the output files and verify contents
+
+
+def test_transcribe_duplicates(tmp_speech_to_text_bulk, tmp_path):
+    speech_to_text_bulk = tmp_speech_to_text_bulk
+    input_dir = speech_to_text_bulk.input.input_folder
+    output_dir = speech_to_text_bulk.output.output_folder
+    for name in ["first.flac", "second.flac"]:
+        shutil.copy("./assets/sample.flac", os.path.join(input_dir, name))
+
+    speech_to_text_bulk.transcribe(
+        model_name="facebook/wav2vec2-large-960h-lv60-self",
+        model_class="Wav2Vec2ForCTC",
+        processor_class="Wav2Vec2Processor",
+        use_cuda=False,
+        precision="float32",
+        device_map=None,
+        batch_size=8,
+        cache_db=str(tmp_path / "cache.sqlite"),
+    )
+
+    predictions = []
+    for filename in glob.glob(os.path.join(output_dir, "predictions-*.json")):
+        with open(filename) as f:
+            predictions.extend(json.load(f))
+
+    # Both files are written, the audio is only transcribed once
+    assert sorted(os.path.basename(p["input"]) for p in predictions) == ["first.flac", "second.flac"]
+    assert predictions[0]["prediction"] == predictions[1]["prediction"]
+    assert speech_to_text_bulk.cache.stats()["misses"] == 1
+
+
+def test_transcribe_resume(tmp_speech_to_text_bulk):
+    speech_to_text_bulk = tmp_speech_to_text_bulk
+    input_dir = speech_to_text_bulk.input.input_folder
+    output_dir = speech_to_text_bulk.output.output_folder
+    shutil.copy("./assets/sample.flac", os.path.join(input_dir, "first.flac"))
+
+    args = {
+        "model_name": "facebook/wav2vec2-large-960h-lv60-self",
+        "model_class": "Wav2Vec2ForCTC",
+        "processor_class": "Wav2Vec2Processor",
+        "use_cuda": False,
+        "precision": "float32",
+        "device_map": None,
+    }
+    speech_to_text_bulk.transcribe(**args)
+    assert len(glob.glob(os.path.join(output_dir, "predictions-*.json"))) == 1
+
+    # Only the new file is transcribed by the second run
+    shutil.copy("./assets/sample.flac", os.path.join(input_dir, "second.flac"))
+    speech_to_text_bulk.transcribe(**args)
+    assert len(glob.glob(os.path.join(output_dir, "predictions-*.json"))) == 2
+    assert set(speech_to_text_bulk.manifest.records) == {"first.flac", "second.flac"}
+
+
+@pytest.mark.parametrize("use_faster_whisper", [False, True])
+def test_transcribe_workers(tmp_speech_to_text_bulk, use_faster_whisper):
+    speech_to_text_bulk = tmp_speech_to_text_bulk
+    input_dir = speech_to_text_bulk.input.input_folder
+    output_dir = speech_to_text_bulk.output.output_folder
+    for i in range(4):
+        shutil.copy("./assets/sample.flac", os.path.join(input_dir, f"{i}.flac"))
+
+    speech_to_text_bulk.transcribe(
+        model_name="large-v3" if use_faster_whisper else "facebook/wav2vec2-large-960h-lv60-self",
+        model_class="Wav2Vec2ForCTC",
+        processor_class="Wav2Vec2Processor",
+        use_cuda=False,
+        precision="float32",
+        device_map="cpu" if use_faster_whisper else None,
+        use_faster_whisper=use_faster_whisper,
+        batch_size=1,
+        cache=False,
+        num_workers=2,
+        output_format="jsonl",
+    )
+
+    # Results of all workers go through the sink of the job
+    files = glob.glob(os.path.join(output_dir, "predictions-*.jsonl"))
+    rows = [json.loads(line) for path in files for line in open(path)]
+    assert sorted(os.path.basename(row["input"]) for row in rows) == [f"{i}.flac" for i in range(4)]
+    assert len(speech_to_text_bulk.manifest.records) == 4
+
+
+def test_transcribe_workers_cuda(speech_to_text_bulk):
+    # Forked workers cannot share the CUDA context of the job, the job fails before loading the model
+    with pytest.raises(ValueError, match="use_cuda"):
+        speech_to_text_bulk.transcribe(
+            model_name="facebook/wav2vec2-large-960h-lv60-self",
+            model_class="Wav2Vec2ForCTC",
+            processor_class="Wav2Vec2Processor",
+            use_cuda=True,
+            device_map="cuda:0",
+            num_workers=2,
+        )
@@ -13,14 +13,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import glob
 import io
 import os
 
 import numpy as np
 import pytest
+import torch
+from datasets import load_dataset
 from geniusrise.core import BatchInput, BatchOutput, InMemoryState
 
 from geniusrise_audio.s2t.inference import SpeechToTextInference
+from geniusrise_audio.s2t.util import normalize_transcription
 
 
 @pytest.fixture(scope="module")
@@ -235,3 +239,122 @@ def test_process_seamless(
 
     assert isinstance(result["transcription"], str)
     assert isinstance(result["segments"], list)
+
+
+@pytest.fixture(scope="module")
+def speech_samples():
+    # Utterances of different lengths, padded to the longest one in a batch
+    dataset = load_dataset("hf-internal-testing/librispeech_asr_dummy", "clean", split="validation")
+    samples = [torch.tensor(dataset[i]["audio"]["array"], dtype=torch.float32).unsqueeze(0) for i in range(3)]
+    assert len({sample.shape[-1] for sample in samples}) == len(samples)
+    return samples
+
+
+def process_batch(s2t_inference, audio_inputs, generate_args):
+    model_type = s2t_inference.model.config.model_type
+    if model_type == "whisper":
+        return s2t_inference.process_whisper_batch(audio_inputs, 16000, {}, generate_args)
+    elif model_type == "seamless_m4t_v2":
+        return s2t_inference.process_seamless_batch(audio_inputs, 16000, {}, generate_args)
+    return s2t_inference.process_wav2vec2_batch(audio_inputs, 16000, {})
+
+
+@pytest.mark.parametrize(
+    "model_name, model_class, processor_class, generate_args",
+    [
+        # fmt: off
+        ("openai/whisper-tiny.en", "WhisperForConditionalGeneration", "AutoProcessor", {}),
+        ("facebook/seamless-m4t-v2-large", "SeamlessM4Tv2ForSpeechToText", "AutoProcessor", {"tgt_lang": "eng"}),
+        ("facebook/wav2vec2-large-960h-lv60-self", "Wav2Vec2ForCTC", "Wav2Vec2Processor", {}),
+        # fmt: on
+    ],
+)
+def test_process_batch_matches_single(
+    s2t_inference, speech_samples, model_name, model_class, processor_class, generate_args
+):
+    s2t_inference.model, s2t_inference.processor = s2t_inference.load_models(
+        model_name=model_name,
+        processor_name=model_name,
+        model_class=model_class,
+        processor_class=processor_class,
+        use_cuda=False,
+        precision="float32",
+        device_map="cpu",
+    )
+    s2t_inference.model_name = model_name
+    s2t_inference.use_cuda = False
+
+    batched = [normalize_transcription(r)[0] for r in process_batch(s2t_inference, speech_samples, generate_args)]
+    single = [
+        normalize_transcription(process_batch(s2t_inference, [sample], generate_args)[0])[0]
+        for sample in speech_samples
+    ]
+
+    assert all(batched)
+    assert batched == single
+
+
+def test_load_models_dynamic_int8(s2t_inference, tmp_path):
+    cache_dir = str(tmp_path)
+    audio_input = np.random.rand(16000)
+
+    transcriptions = []
+    for _ in range(2):
+        # The second load reads the quantized weights from the cache
+        s2t_inference.model, s2t_inference.processor = s2t_inference.load_models(
+            model_name="facebook/wav2vec2-base-960h",
+            processor_name="facebook/wav2vec2-base-960h",
+            model_class="Wav2Vec2ForCTC",
+            processor_class="Wav2Vec2Processor",
+            use_cuda=False,
+            precision="float32",
+            quantization=8,
+            device_map="cpu",
+            quantization_cache_dir=cache_dir,
+        )
+        s2t_inference.use_cuda = False
+        assert any(isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in s2t_inference.model.modules())
+
+        result = s2t_inference.process_wav2vec2(
+            audio_input=audio_input, model_sampling_rate=16000, processor_args={}, chunk_size=0, overlap_size=0
+        )
+        transcriptions.append(result["transcription"])
+
+    assert len(glob.glob(f"{cache_dir}/*.int8.pt")) == 1
+    assert transcriptions[0] == transcriptions[1]
+
+
+def test_load_models_onnxruntime(s2t_inference, tmp_path):
+    cache_dir = str(tmp_path)
+    audio_input = np.random.rand(16000)
+    load_args = dict(
+        model_name="facebook/wav2vec2-base-960h",
+        processor_name="facebook/wav2vec2-base-960h",
+        model_class="Wav2Vec2ForCTC",
+        processor_class="Wav2Vec2Processor",
+        use_cuda=False,
+        precision="float32",
+        device_map="cpu",
+    )
+    s2t_inference.use_cuda = False
+
+    s2t_inference.model, s2t_inference.processor = s2t_inference.load_models(**load_args)
+    expected = s2t_inference.process_wav2vec2(
+        audio_input=audio_input, model_sampling_rate=16000, processor_args={}, chunk_size=0, overlap_size=0
+    )
+
+    for _ in range(2):
+        # The second load creates the session from the cached export
+        s2t_inference.model, s2t_inference.processor = s2t_inference.load_models(
+            **load_args, use_onnxruntime=True, onnx_intra_op_threads=2, onnx_cache_dir=cache_dir
+        )
+        result = s2t_inference.process_wav2vec2(
+            audio_input=audio_input, model_sampling_rate=16000, processor_args={}, chunk_size=8000, overlap_size=4000
+        )
+        assert isinstance(result["transcription"], str)
+        result = s2t_inference.process_wav2vec2(
+            audio_input=audio_input, model_sampling_rate=16000, processor_args={}, chunk_size=0, overlap_size=0
+        )
+        assert result["transcription"] == expected["transcription"]
+
+    assert len(glob.glob(f"{cache_dir}/*.wav2vec2.onnx")) == 1
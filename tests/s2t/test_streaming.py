@@ -0,0 +1,73 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from geniusrise_audio.s2t.streaming import StreamingSession, common_prefix, pcm_to_float32
+
+
+@pytest.mark.parametrize(
+    "encoding, pcm, expected",
+    [
+        # fmt: off
+        ("pcm_s16le", np.array([0, 16384, -32768], dtype="<i2").tobytes(), [0.0, 0.5, -1.0]),
+        ("pcm_f32le", np.array([0.25, -0.25], dtype="<f4").tobytes(), [0.25, -0.25]),
+        # fmt: on
+    ],
+)
+def test_pcm_to_float32(encoding, pcm, expected):
+    assert np.allclose(pcm_to_float32(pcm, encoding), expected)
+
+
+def test_common_prefix():
+    assert common_prefix(["Hello,", "this", "is"], ["hello", "this", "was"]) == ["hello", "this"]
+    assert common_prefix([], ["hello"]) == []
+
+
+def test_local_agreement():
+    session = StreamingSession("test", sampling_rate=1000, min_chunk_ms=100, max_buffer_s=10)
+    session.append(np.zeros(100, dtype=np.float32))
+    assert session.ready()
+
+    result = session.update("hello this")
+    assert result["committed"] == "" and result["partial"] == "hello this"
+    assert not session.ready()
+
+    result = session.update("hello this is a")
+    assert result["committed"] == "hello this" and result["partial"] == "is a"
+
+    # Committed words stay committed even if the model changes its mind
+    result = session.update("hello these is a test")
+    assert result["committed"] == "" and result["transcription"] == "hello this"
+
+    result = session.update("hello this is a test", final=True)
+    assert result["final"] and result["transcription"] == "hello this is a test"
+
+
+def test_sliding_window():
+    session = StreamingSession("test", sampling_rate=1000, min_chunk_ms=100, max_buffer_s=1, overlap_s=0.5)
+    session.append(np.zeros(1200, dtype=np.float32))
+
+    result = session.update("one two three")
+    assert result["final"] and result["transcription"] == "one two three"
+    assert len(session.buffer) == 500
+
+    # The kept overlap is transcribed again, its words are not committed twice
+    session.append(np.zeros(300, dtype=np.float32))
+    session.update("two three four")
+    result = session.update("two three four five")
+    assert result["committed"] == "four"
+    assert result["transcription"] == "one two three four"
@@ -0,0 +1,259 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+import soundfile as sf
+import torch
+
+from geniusrise_audio.s2t import util
+from geniusrise_audio.s2t.util import (
+    chunk_audio,
+    chunk_audio_strided,
+    chunk_batches,
+    decode_audio,
+    decode_audio_ffmpeg,
+    get_resampler,
+    normalize_transcription,
+    prefetch_audio,
+    probe_duration,
+    resample,
+    sort_by_duration,
+)
+
+
+@pytest.mark.parametrize(
+    "length, chunk_size, stride_left, stride_right",
+    [
+        # fmt: off
+        (16000, 4000, 0, 0),
+        (16000, 4000, 1000, 1000),
+        (17001, 4000, 666, 666),
+        (3000, 4000, 500, 500),
+        # fmt: on
+    ],
+)
+def test_chunk_audio_strided(length, chunk_size, stride_left, stride_right):
+    audio_input = torch.randn(length)
+    chunks, strides = chunk_audio_strided(audio_input, chunk_size, stride_left, stride_right)
+
+    assert chunks.shape == (len(strides), chunk_size + stride_left + stride_right)
+    assert len(strides) == len(chunk_audio(audio_input, chunk_size, stride_left, stride_right))
+
+    # Dropping the strides of every chunk gives back the original audio
+    blocks = [chunk[left : chunk.shape[-1] - right] for chunk, (_, _, left, right) in zip(chunks, strides)]
+    assert torch.equal(torch.cat(blocks), audio_input)
+    assert [(start, end) for start, end, _, _ in strides][-1][1] == length
+
+
+@pytest.mark.parametrize(
+    "num_chunks, window, max_batch_samples, expected_batches",
+    [
+        # fmt: off
+        (10, 100, 0, 1),
+        (10, 100, 250, 5),
+        (10, 100, 50, 10),
+        (10, 100, 10_000, 1),
+        # fmt: on
+    ],
+)
+def test_chunk_batches(num_chunks, window, max_batch_samples, expected_batches):
+    chunks = torch.randn(num_chunks, window)
+    batches = list(chunk_batches(chunks, max_batch_samples))
+
+    assert len(batches) == expected_batches
+    assert torch.equal(torch.cat(batches), chunks)
+
+
+@pytest.mark.parametrize(
+    "result, transcription, segments",
+    [
+        # fmt: off
+        (" hello world ", "hello world", []),
+        ({"transcriptions": [" hello", " world"], "transcription_info": {}}, "hello world", []),
+        ({"transcription": ["hello world"], "segments": []}, "hello world", []),
+        ({"transcription": "hello", "segments": [{"tokens": "hello", "start": 0, "end": [1.5]}]}, "hello", [{"text": "hello", "start": 0.0, "end": 1.5}]),
+        # fmt: on
+    ],
+)
+def test_normalize_transcription(result, transcription, segments):
+    assert normalize_transcription(result) == (transcription, segments)
+
+
+def test_sort_by_duration():
+    input_dir = tempfile.mkdtemp()
+    audio_files = []
+    for name, seconds in [("a.wav", 1.0), ("b.flac", 3.0), ("c.wav", 0.5), ("d.ogg", 2.0)]:
+        path = os.path.join(input_dir, name)
+        sf.write(path, np.zeros(int(seconds * 16_000), dtype=np.float32), 16_000)
+        audio_files.append(path)
+
+    assert probe_duration(audio_files[0]) == pytest.approx(1.0)
+    sorted_files = sort_by_duration(audio_files, num_workers=2)
+    assert [os.path.basename(f) for f in sorted_files] == ["b.flac", "d.ogg", "a.wav", "c.wav"]
+
+
+@pytest.mark.parametrize("num_workers", [0, 1, 4])
+def test_prefetch_audio_order(monkeypatch, num_workers):
+    def load_audio(audio_file, model_type, model_sampling_rate, decode):
+        # Later files finish decoding first
+        time.sleep(0.01 * (10 - int(audio_file)))
+        return audio_file.encode(), torch.zeros(1, int(audio_file) + 1)
+
+    monkeypatch.setattr(util, "load_audio", load_audio)
+    audio_files = [str(i) for i in range(10)]
+    results = list(prefetch_audio(audio_files, "wav2vec2", 16_000, num_workers=num_workers, queue_depth=4))
+
+    assert [audio_file for audio_file, _, _ in results] == audio_files
+    assert [audio_bytes.decode() for _, audio_bytes, _ in results] == audio_files
+    assert [waveform.shape[-1] for _, _, waveform in results] == list(range(1, 11))
+
+
+def test_prefetch_audio_depth(monkeypatch):
+    lock = threading.Lock()
+    started = []
+
+    def load_audio(audio_file, model_type, model_sampling_rate, decode):
+        with lock:
+            started.append(audio_file)
+        return b"", None
+
+    monkeypatch.setattr(util, "load_audio", load_audio)
+    ahead = []
+    for received, _ in enumerate(
+        prefetch_audio([str(i) for i in range(20)], None, 16_000, num_workers=8, queue_depth=3)
+    ):
+        # A slow consumer, the workers have time to decode everything they are given
+        time.sleep(0.02)
+        with lock:
+            ahead.append(len(started) - (received + 1))
+
+    assert max(ahead) == 3
+    assert len(started) == 20
+
+
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_prefetch_audio_failure(monkeypatch, num_workers):
+    def load_audio(audio_file, model_type, model_sampling_rate, decode):
+        if audio_file == "bad":
+            raise ValueError(f"cannot decode {audio_file}")
+        return audio_file.encode(), None
+
+    monkeypatch.setattr(util, "load_audio", load_audio)
+    received = []
+    with pytest.raises(ValueError, match="cannot decode bad"):
+        for audio_file, _, _ in prefetch_audio(["a", "b", "bad", "c"], None, 16_000, num_workers=num_workers):
+            received.append(audio_file)
+
+    # The files before the failing one are delivered, the error surfaces in its place
+    assert received == ["a", "b"]
+
+
+@pytest.mark.parametrize(
+    "stderr, sampling_rate",
+    [
+        # fmt: off
+        ("Input #0, mp3, from 'pipe:0':\n  Stream #0:0: Audio: mp3, 44100 Hz, stereo, fltp, 128 kb/s\n", 44100),
+        ("  Stream #0:0(und): Audio: aac (LC) (mp4a / 0x6134706D), 48000 Hz, stereo, fltp, 96 kb/s (default)\n", 48000),
+        ("  Stream #0:0: Audio: pcm_s16le ([1][0][0][0] / 0x0001), 22050 Hz, 1 channels, s16, 352 kb/s\n", 22050),
+        ("no stream information\n", 16000),
+        # fmt: on
+    ],
+)
+def test_decode_audio_ffmpeg(monkeypatch, stderr, sampling_rate):
+    samples = np.linspace(-1, 1, 1600, dtype=np.float32)
+    commands = []
+
+    def run(command, input, capture_output):
+        commands.append(command)
+        return subprocess.CompletedProcess(command, 0, stdout=samples.tobytes(), stderr=stderr.encode())
+
+    monkeypatch.setattr(util.subprocess, "run", run)
+    waveform, original_sampling_rate = decode_audio_ffmpeg(b"encoded", 16000)
+
+    assert torch.equal(waveform, torch.from_numpy(samples).unsqueeze(0))
+    assert original_sampling_rate == sampling_rate
+    # Downmixed and resampled by ffmpeg itself
+    assert commands[0][commands[0].index("-ac") + 1] == "1"
+    assert commands[0][commands[0].index("-ar") + 1] == "16000"
+
+
+def test_decode_audio_ffmpeg_failure(monkeypatch):
+    def run(command, input, capture_output):
+        return subprocess.CompletedProcess(command, 1, stdout=b"", stderr=b"pipe:0: Invalid data found")
+
+    monkeypatch.setattr(util.subprocess, "run", run)
+    with pytest.raises(RuntimeError, match="Invalid data found"):
+        decode_audio_ffmpeg(b"encoded", 16000)
+
+
+@pytest.mark.parametrize(
+    "ffmpeg, returncode, backend",
+    [
+        # fmt: off
+        (True, 0, "ffmpeg"),
+        (True, 1, "pydub"),
+        (False, 0, "pydub"),
+        # fmt: on
+    ],
+)
+def test_decode_audio_fallback(monkeypatch, ffmpeg, returncode, backend):
+    def run(command, input, capture_output):
+        return subprocess.CompletedProcess(command, returncode, stdout=np.zeros(160, np.float32).tobytes(), stderr=b"")
+
+    def decode_audio_pydub(audio_bytes, model_sampling_rate):
+        return torch.ones(1, 320), 8000
+
+    monkeypatch.setattr(util, "ffmpeg_available", lambda: ffmpeg)
+    monkeypatch.setattr(util.subprocess, "run", run)
+    monkeypatch.setattr(util, "decode_audio_pydub", decode_audio_pydub)
+    waveform, _ = decode_audio(b"encoded", "whisper", 16000)
+
+    assert waveform.shape[-1] == (160 if backend == "ffmpeg" else 320)
+
+
+def test_get_resampler_cache(monkeypatch):
+    monkeypatch.setattr(util, "_resamplers", OrderedDict())
+
+    resampler = get_resampler(44100, 16000)
+    assert get_resampler(44100, 16000) is resampler
+    assert get_resampler(48000, 16000) is not resampler
+    assert get_resampler(44100, 16000, torch.float64) is not resampler
+
+    # The least recently used rates are evicted first
+    for orig_freq in range(8000, 8000 + util.RESAMPLER_CACHE_SIZE * 1000, 1000):
+        get_resampler(orig_freq, 16000)
+    assert len(util._resamplers) == util.RESAMPLER_CACHE_SIZE
+    assert get_resampler(44100, 16000) is not resampler
+
+
+def test_resample(monkeypatch):
+    monkeypatch.setattr(util, "_resamplers", OrderedDict())
+    waveform = torch.randn(1, 44100)
+
+    assert resample(waveform, 16000, 16000) is waveform
+    assert len(util._resamplers) == 0
+
+    resampled = resample(waveform, 44100, 16000)
+    assert resampled.shape == (1, 16000)
+    assert torch.equal(resample(waveform, 44100, 16000), resampled)
+    assert len(util._resamplers) == 1
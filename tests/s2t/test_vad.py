@@ -0,0 +1,81 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+import torch
+
+from geniusrise_audio.s2t.vad import detect_speech, merge_region_results
+
+SAMPLING_RATE = 16_000
+
+
+def tone_bursts(bursts, seconds=10):
+    rng = np.random.default_rng(0)
+    audio = rng.normal(0, 0.001, seconds * SAMPLING_RATE).astype(np.float32)
+    for start, end in bursts:
+        t = np.arange((end - start) * SAMPLING_RATE) / SAMPLING_RATE
+        audio[start * SAMPLING_RATE : end * SAMPLING_RATE] += 0.3 * np.sin(2 * np.pi * 220 * t)
+    return torch.from_numpy(audio).unsqueeze(0)
+
+
+@pytest.mark.parametrize(
+    "bursts, max_region_s, expected",
+    [
+        # fmt: off
+        ([(2, 4), (6, 8)], 30.0, [(2, 4), (6, 8)]),
+        ([(2, 4)], 1.5, [(2, 3.5), (3.5, 4)]),
+        ([], 30.0, []),
+        # fmt: on
+    ],
+)
+def test_detect_speech_energy(bursts, max_region_s, expected):
+    regions = detect_speech(tone_bursts(bursts), SAMPLING_RATE, method="energy", pad_ms=0, max_region_s=max_region_s)
+
+    assert len(regions) == len(expected)
+    for (start, end), (expected_start, expected_end) in zip(regions, expected):
+        assert start / SAMPLING_RATE == pytest.approx(expected_start, abs=0.05)
+        assert end / SAMPLING_RATE == pytest.approx(expected_end, abs=0.05)
+
+
+def test_detect_speech_invalid_method():
+    with pytest.raises(ValueError):
+        detect_speech(tone_bursts([(2, 4)]), SAMPLING_RATE, method="webrtc")
+
+
+def test_merge_region_results():
+    results = [
+        "hello",
+        {"transcription": "", "segments": []},
+        {
+            "transcription": "big world",
+            "segments": [{"tokens": "big", "start": 0.5, "end": 1.0}, {"tokens": "world", "start": 1.0, "end": 1.5}],
+        },
+    ]
+    regions = [
+        (2 * SAMPLING_RATE, 4 * SAMPLING_RATE),
+        (4 * SAMPLING_RATE, 5 * SAMPLING_RATE),
+        (6 * SAMPLING_RATE, 8 * SAMPLING_RATE),
+    ]
+
+    merged = merge_region_results(results, regions, SAMPLING_RATE)
+
+    # Timestamps are moved to the timeline of the file, regions without text are dropped
+    assert merged["transcription"] == "hello big world"
+    assert merged["segments"] == [
+        {"tokens": "hello", "start": 2.0, "end": 4.0},
+        {"tokens": "big", "start": 6.5, "end": 7.0},
+        {"tokens": "world", "start": 7.0, "end": 7.5},
+    ]
@@ -15,6 +15,7 @@
 
 import base64
 import tempfile
+import threading
 import time
 
 import pytest
@@ -70,8 +71,6 @@ def test_synthesize(
     password,
 ):
     # Start the API server in a separate thread
-    import threading
-
     server_thread = threading.Thread(
         target=text_to_speech_api.listen,
         kwargs={
@@ -132,3 +131,116 @@ def test_synthesize(
 
     except requests.exceptions.RequestException as e:
         pytest.fail(f"API request failed: {e}")
+
+
+@pytest.mark.parametrize(
+    "model_name, model_class, processor_class, port, accept, stream",
+    [
+        # fmt: off
+        ("facebook/mms-tts-eng", "VitsModel", "VitsTokenizer", 3004, "audio/wav", False),
+        ("facebook/mms-tts-eng", "VitsModel", "VitsTokenizer", 3005, "audio/mpeg", True),
+        # fmt: on
+    ],
+)
+def test_synthesize_audio(text_to_speech_api, model_name, model_class, processor_class, port, accept, stream):
+    server_thread = threading.Thread(
+        target=text_to_speech_api.listen,
+        kwargs={
+            "model_name": model_name,
+            "model_class": model_class,
+            "processor_class": processor_class,
+            "use_cuda": False,
+            "precision": "float32",
+            "endpoint": "*",
+            "port": port,
+        },
+    )
+    server_thread.start()
+    time.sleep(30)
+
+    url = f"http://localhost:{port}/api/v1/synthesize_audio"
+    payload = {"text": "This is a test text for speech synthesis.", "stream": stream}
+
+    try:
+        response = requests.post(url, json=payload, headers={"Accept": accept})
+        response.raise_for_status()
+        assert response.headers["Content-Type"] == accept
+        if stream:
+            assert response.headers["Transfer-Encoding"] == "chunked"
+        else:
+            assert int(response.headers["Content-Length"]) == len(response.content)
+        assert len(response.content) > 0
+    except requests.exceptions.RequestException as e:
+        pytest.fail(f"API request failed: {e}")
+
+
+def test_synthesize_cache(text_to_speech_api):
+    port = 3006
+    server_thread = threading.Thread(
+        target=text_to_speech_api.listen,
+        kwargs={
+            "model_name": "facebook/mms-tts-eng",
+            "model_class": "VitsModel",
+            "processor_class": "VitsTokenizer",
+            "use_cuda": False,
+            "precision": "float32",
+            "cache": True,
+            "cache_disk_mb": 16,
+            "endpoint": "*",
+            "port": port,
+        },
+    )
+    server_thread.start()
+    time.sleep(30)
+
+    url = f"http://localhost:{port}/api/v1/synthesize_audio"
+    payload = {"text": "Press one for sales.", "output_type": "wav"}
+
+    try:
+        first = requests.post(url, json=payload)
+        first.raise_for_status()
+        second = requests.post(url, json=payload)
+        second.raise_for_status()
+        assert first.content == second.content
+
+        stats = requests.get(f"http://localhost:{port}/api/v1/cache_stats").json()
+        assert stats["enabled"] and stats["memory_hits"] == 1 and stats["misses"] == 1
+    except requests.exceptions.RequestException as e:
+        pytest.fail(f"API request failed: {e}")
+
+
+def test_synthesize_audio_slow_reader(text_to_speech_api):
+    port = 3007
+    server_thread = threading.Thread(
+        target=text_to_speech_api.listen,
+        kwargs={
+            "model_name": "facebook/mms-tts-eng",
+            "model_class": "VitsModel",
+            "processor_class": "VitsTokenizer",
+            "use_cuda": False,
+            "precision": "float32",
+            "endpoint": "*",
+            "port": port,
+        },
+    )
+    server_thread.start()
+    time.sleep(30)
+
+    url = f"http://localhost:{port}/api/v1/synthesize_audio"
+    # Far more audio than the socket buffers hold, the server waits for the reader between sentences
+    text = " ".join(f"This is sentence number {i} of a very long text that is read slowly." for i in range(40))
+
+    try:
+        slow = requests.post(url, json={"text": text, "stream": True, "output_type": "wav"}, stream=True)
+        slow.raise_for_status()
+        assert next(slow.iter_content(1024))
+
+        # The stalled stream does not hold the inference slot, other requests still complete
+        fast = requests.post(url, json={"text": "Hello.", "stream": False, "output_type": "wav"}, timeout=60)
+        fast.raise_for_status()
+        assert len(fast.content) > 0
+
+        assert sum(len(chunk) for chunk in slow.iter_content(65536)) > 0
+        slow.close()
+    except requests.exceptions.RequestException as e:
+        pytest.fail(f"API request failed: {e}")
@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
 import os
 
 import pytest
@@ -41,6 +42,26 @@ def text_to_speech_bulk():
     yield text_to_speech_bulk
 
 
+@pytest.fixture
+def tmp_text_to_speech_bulk(tmp_path):
+    input_dir = tmp_path / "input"
+    output_dir = tmp_path / "output"
+
+    os.makedirs(input_dir, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+
+    input = BatchInput(str(input_dir), "geniusrise-test-bucket", "t2s-inputs")
+    output = BatchOutput(str(output_dir), "geniusrise-test-bucket", "t2s-outputs")
+    state = InMemoryState(1)
+
+    text_to_speech_bulk = TextToSpeechBulk(
+        input=input,
+        output=output,
+        state=state,
+    )
+    yield text_to_speech_bulk
+
+
 @pytest.mark.parametrize(
     "model_name, model_class, processor_class, use_cuda, precision, quantization, device_map, torchscript, compile, batch_size, notification_email, max_length, output_type, voice_preset, model_sampling_rate, generation_tgt_lang",
     [
@@ -97,3 +118,30 @@ def test_synthesize_speech(
     text_to_speech_bulk.synthesize_speech(**input_data)
 
     # TODO: read the output files and verify contents
+
+
+def test_synthesize_speech_file_names(tmp_text_to_speech_bulk):
+    text_to_speech_bulk = tmp_text_to_speech_bulk
+    input_dir = text_to_speech_bulk.input.input_folder
+    output_dir = text_to_speech_bulk.output.output_folder
+    # The first texts share a long prefix, sorting by length reorders them
+    texts = ["The weather today is sunny.", "The weather today is cold and rainy.", "Hello.", "The weather today"]
+    with open(os.path.join(input_dir, "texts.jsonl"), "w") as f:
+        f.writelines(json.dumps({"text": text}) + "\n" for text in texts)
+
+    text_to_speech_bulk.synthesize_speech(
+        model_name="facebook/mms-tts-eng",
+        model_class="VitsModel",
+        processor_class="VitsTokenizer",
+        use_cuda=False,
+        precision="float32",
+        device_map=None,
+        batch_size=2,
+        output_type="wav",
+        sort_by_length=True,
+    )
+
+    # One file per text, named after its index in the input
+    assert sorted(os.listdir(output_dir)) == [f"{i:08d}.wav" for i in range(len(texts))]
+    sizes = [os.path.getsize(os.path.join(output_dir, f"{i:08d}.wav")) for i in range(len(texts))]
+    assert sizes[1] > sizes[0] > sizes[2]
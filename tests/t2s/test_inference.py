@@ -13,12 +13,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import glob
 import os
 
 import numpy as np
 import pytest
+import torch
 from geniusrise.core import BatchInput, BatchOutput, InMemoryState
+from transformers import VitsModel, VitsTokenizer
 
+from geniusrise_audio.base.onnx_model import ONNXModel, export_onnx
 from geniusrise_audio.t2s.inference import TextToSpeechInference
 
 
@@ -86,6 +90,81 @@ def test_process_mms(
     assert len(result) > 0
 
 
+def test_process_mms_batch(t2s_inference):
+    t2s_inference.model, t2s_inference.processor = t2s_inference.load_models(
+        model_name="facebook/mms-tts-eng",
+        processor_name="facebook/mms-tts-eng",
+        model_class="VitsModel",
+        processor_class="VitsTokenizer",
+        use_cuda=False,
+        precision="float32",
+        device_map=None,
+    )
+
+    text_inputs = ["This is a much longer test sentence.", "Short."]
+    results = t2s_inference.process_mms_batch(text_inputs=text_inputs, generate_args={})
+
+    # Padding is trimmed, the short text gets a short waveform
+    assert len(results) == 2
+    assert all(isinstance(result, np.ndarray) for result in results)
+    assert len(results[0]) > len(results[1]) > 0
+
+
+def test_process_mms_onnxruntime(t2s_inference, tmp_path):
+    cache_dir = str(tmp_path)
+    for _ in range(2):
+        # The second load creates the session from the cached export
+        t2s_inference.model, t2s_inference.processor = t2s_inference.load_models(
+            model_name="facebook/mms-tts-eng",
+            processor_name="facebook/mms-tts-eng",
+            model_class="VitsModel",
+            processor_class="VitsTokenizer",
+            use_cuda=False,
+            precision="float32",
+            device_map=None,
+            use_onnxruntime=True,
+            onnx_intra_op_threads=2,
+            onnx_cache_dir=cache_dir,
+        )
+        t2s_inference.use_cuda = False
+
+        # Dynamic axes, texts and batches of any length run through one export
+        results = t2s_inference.process_mms_batch(
+            text_inputs=["This is a much longer test sentence.", "Short."], generate_args={}
+        )
+        assert len(results[0]) > len(results[1]) > 0
+        assert isinstance(t2s_inference.process_mms(text_input="Hello world.", generate_args={}), np.ndarray)
+
+    assert len(glob.glob(f"{cache_dir}/*.vits.onnx")) == 1
+
+
+def test_export_onnx_vits(tmp_path):
+    model = VitsModel.from_pretrained("facebook/mms-tts-eng").eval()
+    tokenizer = VitsTokenizer.from_pretrained("facebook/mms-tts-eng")
+    # Without noise torch and onnxruntime are deterministic and must agree
+    model.noise_scale = 0.0
+    model.noise_scale_duration = 0.0
+
+    path = str(tmp_path / "mms-tts-eng.vits.onnx")
+    export_onnx(model, path)
+    onnx_model = ONNXModel(path, model.config)
+
+    # Texts shorter and longer than the traced inputs
+    lengths = []
+    for text in ["Hi.", "This sentence is a good deal longer than the one the model was traced with."]:
+        inputs = tokenizer(text, return_tensors="pt")
+        with torch.no_grad():
+            expected = model(**inputs)
+        result = onnx_model(input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"])
+
+        assert torch.equal(result.sequence_lengths, expected.sequence_lengths)
+        assert result.waveform.shape == expected.waveform.shape
+        assert torch.allclose(result.waveform, expected.waveform, atol=1e-3)
+        lengths.append(result.waveform.shape[-1])
+
+    assert lengths[0] < lengths[1]
+
+
 @pytest.mark.parametrize(
     "model_name, model_class, processor_class, use_cuda, precision, quantization, device_map, torchscript, compile",
     [
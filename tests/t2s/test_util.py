@@ -0,0 +1,52 @@
+# 🧠 Geniusrise
+# Copyright (C) 2023  geniusrise.ai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from geniusrise_audio.t2s.util import encode_waveform_stream, split_sentences
+
+
+@pytest.mark.parametrize(
+    "text, sentences",
+    [
+        # fmt: off
+        ("Hello. How are you.", ["Hello", " How are you"]),
+        ("No full stop", ["No full stop"]),
+        ("...", ["..."]),
+        # fmt: on
+    ],
+)
+def test_split_sentences(text, sentences):
+    assert split_sentences(text) == sentences
+
+
+@pytest.mark.parametrize("lengths", [[1600], [1600, 800, 3200]])
+def test_encode_waveform_stream_wav(lengths):
+    waveforms = [np.sin(np.arange(length) / 10.0).astype(np.float32) * 0.5 for length in lengths]
+    chunks = list(encode_waveform_stream(iter(waveforms), format="wav", sample_rate=16_000))
+    assert len(chunks) == len(waveforms)
+
+    # Patch in the real sizes, the stream header has them set to the maximum
+    stream = bytearray(b"".join(chunks))
+    stream[4:8] = (len(stream) - 8).to_bytes(4, "little")
+    stream[40:44] = (len(stream) - 44).to_bytes(4, "little")
+    decoded, sample_rate = sf.read(io.BytesIO(bytes(stream)), dtype="float32")
+
+    assert sample_rate == 16_000
+    assert np.allclose(decoded, np.concatenate(waveforms), atol=1e-4)